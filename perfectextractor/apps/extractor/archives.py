@@ -0,0 +1,144 @@
+import fnmatch
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+from typing import Dict, IO, List, Optional, Tuple
+
+ZIP_EXTENSIONS = ('.zip',)
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+
+class Archive:
+    """
+    Provides access to the members of a zip or tar archive.
+    The members are listed from the central directory (zip) or a single scan over the headers (tar),
+    after which members can be opened directly and streamed into the parser.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        if path.endswith(ZIP_EXTENSIONS):
+            self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(path)
+            self._tar: Optional[tarfile.TarFile] = None
+            members = [(i.filename, i) for i in self._zip.infolist() if not i.is_dir()]
+        else:
+            self._zip = None
+            self._tar = tarfile.open(path)
+            members = [(m.name, m) for m in self._tar.getmembers() if m.isfile()]
+
+        self.members: Dict[str, object] = {posixpath.normpath(name): info for name, info in members}
+        self.directories = {''}
+        for name in self.members:
+            directory = posixpath.dirname(name)
+            while directory not in self.directories:
+                self.directories.add(directory)
+                directory = posixpath.dirname(directory)
+
+    def isfile(self, member: str) -> bool:
+        return member in self.members
+
+    def isdir(self, member: str) -> bool:
+        return member in self.directories
+
+    def listdir(self, member: str) -> List[str]:
+        """
+        Lists the names of the files and directories directly within a directory of the archive.
+        """
+        names = set()
+        for name in list(self.members) + list(self.directories):
+            if name and posixpath.dirname(name) == member:
+                names.add(posixpath.basename(name))
+        return sorted(names)
+
+    def open(self, member: str) -> IO[bytes]:
+        """
+        Opens a member of the archive for (streaming) reading.
+        """
+        if self._zip is not None:
+            return self._zip.open(self.members[member])
+        # Reads from a tar archive go through the same file object, so guard these against concurrent use
+        return LockedReader(self._tar.extractfile(self.members[member]), self._lock)
+
+
+class LockedReader:
+    """
+    Wraps a file object, only allowing a single read at a time.
+    """
+    def __init__(self, fileobj: IO[bytes], lock: threading.Lock) -> None:
+        self._fileobj = fileobj
+        self._lock = lock
+
+    def read(self, size: int = -1) -> bytes:
+        with self._lock:
+            return self._fileobj.read(size)
+
+    def close(self) -> None:
+        self._fileobj.close()
+
+    def __enter__(self) -> 'LockedReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+_archives: Dict[str, Archive] = dict()
+
+
+def is_archive(path: str) -> bool:
+    return path.endswith(ZIP_EXTENSIONS + TAR_EXTENSIONS) and os.path.isfile(path)
+
+
+def split_path(path: str) -> Tuple[Optional[Archive], str]:
+    """
+    Splits a path into the archive it points into (if any) and the path of the member in that archive.
+    Paths into an archive treat the archive as a directory, e.g. corpora/europarl.zip/en/ep-00-12-15.xml.
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    for n in range(1, len(parts) + 1):
+        candidate = os.sep.join(parts[:n]) or os.sep
+        if candidate in _archives or is_archive(candidate):
+            if candidate not in _archives:
+                _archives[candidate] = Archive(candidate)
+            return _archives[candidate], posixpath.join('', *parts[n:]) if parts[n:] else ''
+    return None, path
+
+
+def isfile(path: str) -> bool:
+    archive, member = split_path(path)
+    return archive.isfile(member) if archive else os.path.isfile(path)
+
+
+def isdir(path: str) -> bool:
+    archive, member = split_path(path)
+    return archive.isdir(member) if archive else os.path.isdir(path)
+
+
+def listdir(path: str) -> List[str]:
+    archive, member = split_path(path)
+    return archive.listdir(member) if archive else os.listdir(path)
+
+
+def glob(dir_name: str, pattern: str) -> List[str]:
+    """
+    Lists the files in a directory (that might be in an archive) that match the pattern.
+    """
+    return [os.path.join(dir_name, name) for name in listdir(dir_name)
+            if fnmatch.fnmatch(name, pattern) and isfile(os.path.join(dir_name, name))]
+
+
+def open_file(path: str) -> IO[bytes]:
+    archive, member = split_path(path)
+    return archive.open(member) if archive else open(path, 'rb')
+
+
+def flatten(path: str) -> str:
+    """
+    Flattens a path into an archive into a path next to the archive, e.g. for writing output files.
+    """
+    archive, member = split_path(path)
+    if archive:
+        return '-'.join([archive.path] + member.split('/'))
+    return path
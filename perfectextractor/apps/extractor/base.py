@@ -1,18 +1,61 @@
 from abc import ABC, abstractmethod
 import codecs
+import collections
+import concurrent.futures
 import configparser
+import io
+import itertools
 import os
+import pickle
+import random
 import time
-from typing import Dict, Generator, Iterator, List, Optional, Tuple, Union
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import click
 from lxml import etree
 
+from . import archives
+from .cache import CACHE_SIZE, ResultCache, hash_file, hash_key
+from .checkpoint import Checkpoint, Journal
+from .discovery import scan_directories
 from .models import Alignment, MultiWordExpression
-from .utils import TXT, XML, CSV, open_csv, open_xlsx, CachedConfig
+from .parts import SPLIT_SIZE, FilePart, parse_part, split_file
+from .patterns import Token
+from .records import HIT_FIELDS, ResultRecord, RowRecord
+from .index import CorpusIndex, get_index_file
+from .store import TokenStore
+from .utils import TXT, XML, CSV, JSONL, OPENERS, compressed_filename, get_compression, iterparse_xml, parse_xml, \
+    CachedConfig
+from .xml_utils import attribute_literals, contains_literals
 
 LEMMATA_CONFIG = os.path.join(os.path.dirname(__file__), 'config/{language}_lemmata.txt')
 
+# The parameters that do not change the results of a file, and thus are not part of its cache key
+CACHE_IGNORED = {'file_names', 'outfile', 'format_', 'compression', 'sort_by_certainty', 'file_limit', 'min_file_size',
+                 'max_file_size', 'prefilter', 'use_index', 'use_store', 'prefetch', 'workers', 'split_size',
+                 'resume', 'cache_dir', 'cache_size', 'sample', 'seed', 'config', 'other_extractors',
+                 'alignment_xmls'}
+
+# The columns that can be selected in the output (metadata and translations hold multiple columns)
+COLUMNS = ['document', 'sentence', 'type', 'words', 'ids', 'text', 'metadata', 'translations']
+
+
+_part_extractor: Optional['BaseExtractor'] = None  # the extractor of a worker process
+_part_payload: Optional[bytes] = None  # the pickled extractor of a worker process
+
+
+def process_part(payload: bytes, filename: str, part: FilePart) -> List[str]:
+    """
+    Processes a part of a file in a worker process. The extractor is sent (pickled) along with each part,
+    but only unpickled once per process, so that it can keep the trees it shares between the parts.
+    (ProcessPoolExecutor only supports an initializer from Python 3.7 onwards.)
+    """
+    global _part_extractor, _part_payload
+    if payload != _part_payload:
+        _part_extractor = pickle.loads(payload)
+        _part_payload = payload
+    return list(_part_extractor.search_file(filename, _part_extractor.load_part(filename, part)))
+
 
 class BaseExtractor(ABC):
     def __init__(self,
@@ -28,12 +71,26 @@ class BaseExtractor(ABC):
                  position: Optional[int] = None,
                  output: str = TXT,
                  format_: str = CSV,
+                 compression: Optional[str] = None,
                  one_per_sentence: bool = False,
                  sort_by_certainty: bool = False,
                  no_order_languages: bool = False,
                  file_limit: int = 0,
                  min_file_size: int = 0,
-                 max_file_size: int = 0) -> None:
+                 max_file_size: int = 0,
+                 prefilter: bool = False,
+                 use_index: bool = False,
+                 use_store: bool = False,
+                 prefetch: int = 0,
+                 workers: int = 0,
+                 split_size: int = SPLIT_SIZE,
+                 resume: bool = False,
+                 cache_dir: Optional[str] = None,
+                 cache_size: int = CACHE_SIZE,
+                 columns: Optional[List[str]] = None,
+                 count_only: bool = False,
+                 sample: int = 0,
+                 seed: Optional[int] = None) -> None:
         """
         Initializes the extractor for the given source and target language(s).
         :param language_from: the source language
@@ -47,13 +104,28 @@ class BaseExtractor(ABC):
         :param outfile: the filename to output the results to
         :param position: whether to limit the search to a certain position (e.g. only sentence-initial)
         :param output: whether to output the results in text or XML format
-        :param format_: whether to output the file as .csv or .xlsx
+        :param format_: whether to output the file as .csv, .xlsx, .parquet, .sqlite or .jsonl
+        :param compression: whether to compress the output file (gzip or zstd, CSV and JSON Lines only);
+        this is also inferred from the extension of the outfile (.gz or .zst)
         :param one_per_sentence: whether to output all lines, and allow one classification per sentence
         :param sort_by_certainty: whether to sort the files by average alignment certainty
         :param no_order_languages: whether to order the languages on alignment
         :param file_limit: whether to limit the number of files searched in
         :param min_file_size: whether to only use files larger (or equal) than a certain size
         :param max_file_size: whether to only use files smaller (or equal) than a certain size
+        :param prefilter: whether to skip files that cannot contain a match, based on a search in their raw bytes
+        :param use_index: whether to only search in the candidate files and sentences from the corpus index
+        :param use_store: whether to read the files from their columnar stores (if available) instead of parsing XML
+        :param prefetch: the number of files (and their translations) to load in the background, 0 to disable
+        :param workers: the number of processes that search in the parts of large files in parallel, 0 to disable
+        :param split_size: the size (in bytes) from which files are split into parts of about this size
+        :param resume: whether to resume a previous run from its checkpoints, skipping the completed files
+        :param cache_dir: the directory to cache the results per file in, None to disable
+        :param cache_size: the maximum size (in bytes) of the cache
+        :param columns: whether to limit the output to certain columns (see COLUMNS), the others are not computed
+        :param count_only: whether to only output the number of results per file, type, construction and lemma
+        :param sample: whether to only output a random sample of this number of results (per Extractor), 0 to disable
+        :param seed: the seed for drawing the random sample, None for a different sample on every run
         """
         self.l_from = language_from
         self.l_to = languages_to or []
@@ -66,12 +138,26 @@ class BaseExtractor(ABC):
         self.position = position
         self.output = output
         self.format_ = format_
+        self.compression = compression
         self.one_per_sentence = one_per_sentence
         self.sort_by_certainty = sort_by_certainty
         self.no_order_languages = no_order_languages
         self.file_limit = file_limit
         self.min_file_size = min_file_size
         self.max_file_size = max_file_size
+        self.prefilter = prefilter
+        self.use_index = use_index
+        self.use_store = use_store
+        self.prefetch = prefetch
+        self.workers = workers
+        self.split_size = split_size
+        self.resume = resume
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.columns = list(columns) if columns else None
+        self.count_only = count_only
+        self.sample = sample
+        self.seed = seed
 
         # Read in the lemmata list (if provided)
         self.lemmata_list: List[str] = []
@@ -86,6 +172,35 @@ class BaseExtractor(ABC):
         self.other_extractors: List[BaseExtractor] = []
         self.alignment_xmls: Dict[str, str] = dict()
         self._index: Dict[str, etree._Element] = dict()  # save segments indexed by id
+        self._candidates: Dict[str, Optional[Set[str]]] = dict()  # candidate sentences per file from the corpus index
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None  # the processes that search in parts
+        self._part_futures: Deque[concurrent.futures.Future] = collections.deque()  # the parts being searched
+        self._part_payload: Optional[bytes] = None  # this extractor, pickled for the processes
+        self._part_trees: Tuple[Optional[str], Tuple] = (None, ())  # the alignment and translation trees of the parts
+        self._cache = ResultCache(cache_dir, cache_size) if cache_dir else None
+        self._cache_keys: Dict[str, str] = dict()  # the cache keys of the files that are about to be processed
+        self._file_hashes: Dict[str, str] = dict()  # the hashes of the aligned files
+
+        # Check the selected columns
+        if self.columns and self.count_only:
+            raise click.ClickException('Columns cannot be selected when only counting the results')
+        if self.sample and self.count_only:
+            raise click.ClickException('The results cannot be sampled when only counting the results')
+        if self.columns:
+            fields = [field for field, _ in self.get_columns()]
+            unknown = [column for column in self.columns if column not in fields]
+            if unknown:
+                raise click.ClickException('Unknown column(s) {}, choose from: {}'.format(
+                    ', '.join(unknown), ', '.join(dict.fromkeys(fields))))
+
+    def __getstate__(self) -> Dict:
+        """
+        Drops the parsed trees and the process pool when sending the extractor to a worker process.
+        """
+        state = dict(self.__dict__)
+        state.update(alignment_xmls=dict(), _index=dict(), _pool=None, _part_futures=collections.deque(),
+                     _part_payload=None, _part_trees=(None, ()), _cache=None)
+        return state
 
     def read_lemmata(self, lemmata: Optional[Union[Tuple[str], List[str], bool]]) -> None:
         """
@@ -113,30 +228,77 @@ class BaseExtractor(ABC):
         """
         Creates a result file and processes each file in a folder.
         """
-        file_names = self.collect_file_names(dir_name)
-        progress_total = len(file_names)
+        file_names = self.collect_file_names(dir_name, lazy=True)
+        progress_total = len(file_names) if isinstance(file_names, list) else None  # unknown when streaming
+
+        name = '-'.join([archives.flatten(dir_name), self.l_from] + (['counts'] if self.count_only else []))
+        result_file = self.outfile or name + '.' + self.format_
+        if self.compression:
+            result_file = compressed_filename(result_file, self.compression)
+        compressed = get_compression(result_file) is not None
+        if compressed and self.format_ not in [CSV, JSONL]:
+            raise click.ClickException('Compression is only supported for CSV and JSON Lines output')
+        opener = OPENERS[self.format_]
+
+        # Keep a journal of the completed files (for uncompressed CSV output), and resume from it if requested
+        journal = Journal(result_file) if self.format_ == CSV and not compressed and not self.sample else None
+        checkpoints = []
+        if self.resume:
+            if journal is None:
+                raise click.ClickException('Resuming is only supported for uncompressed CSV output '
+                                           '(and not when sampling)')
+            checkpoints = journal.read() if os.path.exists(result_file) else []
+            if checkpoints:
+                click.echo('Resuming after {} completed files...'.format(len(checkpoints)))
+                file_names = self.skip_completed(file_names, checkpoints)
+            else:
+                click.echo('No checkpoints found for {}, starting from the first file'.format(result_file))
+        file_names, completed_names = itertools.tee(file_names)
 
-        result_file = self.outfile or '-'.join([dir_name, self.l_from]) + '.' + self.format_
-        opener = open_csv if self.format_ == CSV else open_xlsx
+        with opener(result_file, checkpoints[-1].offset) if checkpoints else opener(result_file) as writer:
+            if not checkpoints:
+                header = self.generate_header()
+                writer.writerow(header, is_header=True)
+            if journal:
+                journal.start(checkpoints)
 
-        with opener(result_file) as writer:
-            header = self.generate_header()
-            writer.writerow(header) if self.format_ == CSV else writer.writerow(header, is_header=True)
-            for i, part in enumerate(self.generate_results(dir_name, file_names)):
+            results = self.generate_results(dir_name, file_names)
+            for i, (part, file_name) in enumerate(zip(results, completed_names), start=len(checkpoints)):
                 writer.writerows(part)
+                if journal:
+                    journal.record(file_name, writer.checkpoint())
                 if progress_cb:
                     progress_cb(i + 1, progress_total)
 
+            if journal:
+                journal.finish()
+
             if done_cb:
                 done_cb(result_file)
 
-    def collect_file_names(self, dir_name: str) -> List[str]:
+    def skip_completed(self, file_names: Iterable[str], checkpoints: List[Checkpoint]) -> Iterator[str]:
+        """
+        Skips the files that have been completed in a previous run, checking these are still processed in order.
+        """
+        file_names = iter(file_names)
+        for checkpoint in checkpoints:
+            if next(file_names, None) != checkpoint.file_name:
+                raise click.ClickException('The files to process do not match the checkpoints, cannot resume')
+        return file_names
+
+    def collect_file_names(self, dir_name: str, lazy: bool = False) -> Union[List[str], Iterator[str]]:
         """
         Collects the file names in a given directory and (potentially) filters these based on file size,
         alignment certainty or a limited number of files.
         :param dir_name: The current directory
-        :return: A list of files to consider.
+        :param lazy: whether to stream the file names (if no filter requires the complete list)
+        :return: A list (or iterator) of files to consider.
         """
+        if lazy and not (self.file_names or self.min_file_size or self.max_file_size or
+                         self.use_index or self.sort_by_certainty):
+            click.echo('Streaming file names, starting processing...')
+            return itertools.islice(self.iter_filenames(dir_name), self.file_limit or None)
+
         click.echo('Collecting file names...')
 
         if self.file_names:
@@ -147,6 +309,9 @@ class BaseExtractor(ABC):
         if self.min_file_size or self.max_file_size:
             file_names = self.filter_by_file_size(file_names)
 
+        if self.use_index:
+            file_names = self.filter_by_index(dir_name, file_names)
+
         if self.sort_by_certainty:
             file_names = self.sort_by_alignment_certainty(file_names)
 
@@ -156,59 +321,555 @@ class BaseExtractor(ABC):
         click.echo('Finished collecting file names, starting processing...')
         return file_names
 
-    def generate_results(self, dir_name: str, file_names: List[str] = None) -> Generator[List[str], List[str], None]:
+    def generate_results(self,
+                         dir_name: str,
+                         file_names: Optional[Iterable[str]] = None) -> Iterator[Iterator[List[str]]]:
+        """
+        Generates the results for a directory or a set of files: a generator over the result lines per file.
+        The results of a file are only searched for while these are consumed, so that these are never all in memory.
+        """
+        for records in self.generate_file_records(dir_name, file_names):
+            yield self.records_to_rows(records)
+
+    def generate_records(self, dir_name: str, file_names: Optional[Iterable[str]] = None) -> Iterator[ResultRecord]:
+        """
+        Generates the results for a directory or a set of files as records, of which the fields
+        are only computed when accessed (see ResultRecord). This allows to use the Extractor as a library.
+        """
+        for records in self.generate_file_records(dir_name, file_names):
+            yield from records
+
+    def generate_file_records(self,
+                              dir_name: str,
+                              file_names: Optional[Iterable[str]] = None) -> Iterator[Iterator[ResultRecord]]:
         """
-        Generates the results for a directory or a set of files.
+        Generates the results for a directory or a set of files: a generator over the result records per file.
         """
         if file_names is None:
             file_names = self.collect_file_names(dir_name)
 
-        for f in file_names:
-            yield self.process_file(f)
+        if self.sample:
+            yield from self.generate_sampled_records(file_names)
+        else:
+            yield from self.stream_files(file_names)
 
-    def process_file(self, filename: str) -> List[str]:
+    def stream_files(self, file_names: Iterable[str]) -> Iterator[Iterator[ResultRecord]]:
         """
-        Processes a single file.
+        Streams the result records of a set of files, one generator per file.
+        """
+        try:
+            if self.prefetch:
+                yield from self.generate_prefetched_records(file_names)
+                return
+
+            for f in file_names:
+                yield self.stream_records(f)
+        finally:
+            if self._pool is not None:
+                for future in self._part_futures:
+                    future.cancel()
+                self._pool.shutdown()
+                self._pool = None
+
+    def generate_sampled_records(self, file_names: Iterable[str]) -> Iterator[Iterator[ResultRecord]]:
+        """
+        Generates a random sample of the results (per Extractor, when these are combined), in document order.
+        The sample is drawn in two passes: the first pass keeps a reservoir of the positions of the results,
+        counting these like count_only does, so that no sentences are marked and no translations are loaded.
+        The second pass then only searches the files that hold a sampled result,
+        stopping at the last sampled result of each file.
+        """
+        file_names, sampled_names = itertools.tee(file_names)
+        rng = random.Random(self.seed)
+        reservoirs: Dict[str, List[Tuple[int, int]]] = collections.defaultdict(list)
+        seen: Dict[str, int] = collections.Counter()
+
+        extractors = [self] + self.other_extractors
+        try:
+            for extractor in extractors:
+                extractor.count_only = True
+            for n, records in enumerate(self.stream_files(file_names)):
+                for i, record in enumerate(records):
+                    stratum = record.extractor.name
+                    seen[stratum] += 1
+                    reservoir = reservoirs[stratum]
+                    if len(reservoir) < self.sample:
+                        reservoir.append((n, i))
+                    else:
+                        j = rng.randrange(seen[stratum])
+                        if j < self.sample:
+                            reservoir[j] = (n, i)
+        finally:
+            for extractor in extractors:
+                extractor.count_only = False
+
+        sampled: Dict[int, Set[int]] = collections.defaultdict(set)
+        for reservoir in reservoirs.values():
+            for n, i in reservoir:
+                sampled[n].add(i)
+        click.echo('Sampled {} of {} results'.format(sum(len(r) for r in reservoirs.values()), sum(seen.values())))
+
+        files = [(f, sampled[n]) for n, f in enumerate(sampled_names) if n in sampled]
+        for records, (_, positions) in zip(self.stream_files(f for f, _ in files), files):
+            yield self.pick_records(records, positions)
+
+    @staticmethod
+    def pick_records(records: Iterable[ResultRecord], positions: Set[int]) -> Iterator[ResultRecord]:
+        """
+        Picks the records at the given positions, and stops searching after the last of these.
+        """
+        last = max(positions)
+        for i, record in enumerate(records):
+            if i in positions:
+                yield record
+            if i == last:
+                break
+
+    def generate_prefetched_records(self, file_names: Iterable[str]) -> Iterator[Iterator[ResultRecord]]:
+        """
+        Generates the result records for a set of files, while a pool of threads loads the next files in the background.
+        At most self.prefetch files are loaded ahead of the file currently processed.
+        """
+        file_names = iter(file_names)
+
+        # Process the first file on its own, so that shared caches (e.g. of the alignment files) are filled
+        first = next(file_names, None)
+        if first is None:
+            return
+        yield self.stream_records(first)
+
+        with concurrent.futures.ThreadPoolExecutor(self.prefetch) as executor:
+            pending: collections.deque = collections.deque()
+            def submit(f: str) -> Optional[concurrent.futures.Future]:
+                # Files that are split into parts are loaded by the worker processes, cached files are not loaded at all
+                if self.can_split(f) or self.is_cached(f):
+                    return None
+                return executor.submit(self.load_file, f, True)
+
+            for f in itertools.islice(file_names, self.prefetch):
+                pending.append((f, submit(f)))
+
+            try:
+                while pending:
+                    f, future = pending.popleft()
+                    # Keep the pipeline filled before processing the current file
+                    next_file = next(file_names, None)
+                    if next_file is not None:
+                        pending.append((next_file, submit(next_file)))
+                    yield self.stream_records(f, future.result() if future else None)
+            finally:
+                # Do not load files that have not been started when the iteration stops early
+                for _, future in pending:
+                    if future:
+                        future.cancel()
+
+    def load_file(self, filename: str, eager: bool = False) -> Optional[Tuple[Iterable, Dict, Dict]]:
+        """
+        Loads a file: its sentence trees, and the alignment and translation trees per target language.
+        :param filename: the file to load
+        :param eager: whether to parse the sentence trees right away, rather than while iterating over them
+        :return: The sentence, alignment and translation trees, or None if the file cannot contain any results
+        """
+        # Skip the file if it cannot contain a match
+        if self.prefilter and not self.may_contain_results(filename):
+            return None
+
+        # Parse the current tree (create a iterator over 's' elements),
+        # or read the candidate sentences from the columnar store of the file
+        store = self.open_store(filename)
+        if store is not None:
+            queries = [(extractor.get_prefilter(), extractor.get_word_pattern())
+                       for extractor in [self] + self.other_extractors]
+            s_trees = store.iter_sentences(store.select(queries))
+            if eager:
+                s_trees = list(s_trees)
+        elif eager:
+            s_trees = [('end', s) for s in parse_xml(filename).iter(self.sentence_tag)]
+        else:
+            s_trees = iterparse_xml(filename, self.sentence_tag)
+
+        # Parse the alignment and translation trees (if the translations are output)
+        alignment_trees, translation_trees = self.load_alignment_trees(filename)
+
+        return s_trees, alignment_trees, translation_trees
+
+    def load_alignment_trees(self, filename: str) -> Tuple[Dict, Dict]:
+        """
+        Parses the alignment and translation trees for a file, unless the translations are not in the output.
+        """
+        if not self.selects('translations'):
+            return dict(), dict()
+        return self.parse_alignment_trees(filename)
+
+    def process_file(self, filename: str, loaded: Optional[Tuple[Iterable, Dict, Dict]] = None) -> List[List[str]]:
+        """
+        Processes a single file, returning all results at once (see stream_file).
+        :param filename: the file to process
+        :param loaded: the trees of the file if these were loaded already (see load_file), None to load these here
+        """
+        return list(self.stream_file(filename, loaded))
+
+    def stream_file(self,
+                    filename: str,
+                    loaded: Optional[Tuple[Iterable, Dict, Dict]] = None) -> Iterator[List[str]]:
+        """
+        Streams the result lines of a single file (see stream_records).
+        :param filename: the file to process
+        :param loaded: the trees of the file if these were loaded already (see load_file), None to load these here
+        """
+        yield from self.records_to_rows(self.stream_records(filename, loaded))
+
+    def stream_records(self,
+                       filename: str,
+                       loaded: Optional[Tuple[Iterable, Dict, Dict]] = None) -> Iterator[ResultRecord]:
+        """
+        Streams the results of a single file, taking these from the cache (if enabled) when nothing has changed.
+        The results are generated while searching, so they do not need to be kept in memory
+        (unless these are to be cached).
+        :param filename: the file to process
+        :param loaded: the trees of the file if these were loaded already (see load_file), None to load these here
         """
-        t0 = time.time()
         click.echo('Now processing {}...'.format(filename))
 
-        # Parse the current tree (create a iterator over 's' elements)
-        s_trees = etree.iterparse(filename, tag=self.sentence_tag)
+        if self._cache is None:
+            yield from self.search_records(filename, loaded)
+            return
 
-        # Filter the sentence trees
-        s_trees = self.filter_sentences(s_trees)
+        key = self._cache_keys.pop(filename, None) or self.cache_key(filename)
+        results = self._cache.get(key)
+        if results is not None:
+            click.echo('Taken the results from the cache')
+            yield from (self.to_record(result) for result in results)
+            return
+
+        results = []
+        for record in self.search_records(filename, loaded):
+            results.append(self.record_to_row(record))
+            yield record
+        self._cache.put(key, results)
+
+    def search_file(self,
+                    filename: str,
+                    loaded: Optional[Tuple[Iterable, Dict, Dict]] = None) -> Iterator[List[str]]:
+        """
+        Searches for the result lines in a single file (see search_records).
+        :param filename: the file to search in
+        :param loaded: the trees of the file if these were loaded already (see load_file), None to load these here
+        """
+        for record in self.search_records(filename, loaded):
+            yield self.record_to_row(record)
+
+    def search_records(self,
+                       filename: str,
+                       loaded: Optional[Tuple[Iterable, Dict, Dict]] = None) -> Iterator[ResultRecord]:
+        """
+        Searches for the results in a single file.
+        :param filename: the file to search in
+        :param loaded: the trees of the file if these were loaded already (see load_file), None to load these here
+        """
+        t0 = time.time()
+
+        if loaded is None and self.can_split(filename):
+            yield from (self.to_record(result) for result in self.process_parts(filename))
+            return
 
-        # Parse the alignment and translation trees
-        alignment_trees, translation_trees = self.parse_alignment_trees(filename)
+        if loaded is None:
+            loaded = self.load_file(filename)
+        if loaded is None:
+            click.echo('Skipped, as the file cannot contain any results')
+            return
+        s_trees, alignment_trees, translation_trees = loaded
+
+        # Filter the sentence trees
+        s_trees = self.filter_sentences(s_trees, filename)
 
         t1 = time.time()
         click.echo('Finished parsing trees, took {:.3} seconds'.format(t1 - t0))
 
-        # Fetch the results
-        results = self.fetch_results(filename, s_trees, alignment_trees, translation_trees)
+        # Fetch the results (for all combined Extractors at once, if any)
+        if self.other_extractors:
+            yield from self.fetch_combined_results(filename, s_trees, alignment_trees, translation_trees)
+        else:
+            for result in self.fetch_results(filename, s_trees, alignment_trees, translation_trees):
+                yield self.to_record(result, self)
 
         click.echo('Finished fetching results, took {:.3} seconds'.format(time.time() - t1))
 
         # Free index memory
         self._index = dict()
 
-        return results
+    def cache_key(self, filename: str) -> str:
+        """
+        Computes the cache key for a file: a hash of the contents of the file and its aligned files,
+        the effective config and the parameters of this Extractor (and all added Extractors).
+        The names of the files are part of the key as well, as the results hold the name of the document
+        (and identical documents might be aligned with different translations).
+        """
+        aligned_hashes = []
+        aligned_files = self.get_aligned_files(filename) if self.selects('translations') else []
+        for aligned_file in aligned_files:
+            if aligned_file not in self._file_hashes:
+                self._file_hashes[aligned_file] = hash_file(aligned_file)
+            aligned_hashes.append(self._file_hashes[aligned_file])
+
+        extractors = [extractor.get_fingerprint() for extractor in [self] + self.other_extractors]
+        names = [os.path.basename(f) for f in [filename] + aligned_files]
+        return hash_key([hash_file(filename), aligned_hashes, names, extractors])
+
+    def is_cached(self, filename: str) -> bool:
+        """
+        Checks whether the results of a file are in the cache (if enabled).
+        """
+        if self._cache is None:
+            return False
+        self._cache_keys[filename] = self.cache_key(filename)
+        return self._cache_keys[filename] in self._cache
+
+    def get_fingerprint(self) -> Dict:
+        """
+        Returns everything the results of this Extractor depend upon, besides the files:
+        its class, its (public) parameters and the effective config.
+        """
+        config = io.StringIO()
+        self.config.config.write(config)
+        parameters = {key: value for key, value in vars(self).items()
+                      if not key.startswith('_') and key not in CACHE_IGNORED}
+        return dict(cls='.'.join([type(self).__module__, type(self).__qualname__]),
+                    parameters=parameters, config=config.getvalue())
+
+    def get_aligned_files(self, filename: str) -> List[str]:
+        """
+        Returns the files (besides the file itself) whose contents determine the results of a file,
+        i.e. the alignment and translation files. By default, there are none.
+        """
+        return []
+
+    def can_split(self, filename: str) -> bool:
+        """
+        Checks whether a file should be split into parts that are searched in parallel:
+        this requires a large, uncompressed file that is not read from its columnar store.
+        """
+        if not self.workers or filename.endswith('.gz') or not os.path.isfile(filename):
+            return False
+        if self.store_enabled() and TokenStore.exists(filename):
+            return False
+        return os.path.getsize(filename) > self.split_size
+
+    def process_parts(self, filename: str) -> Iterator[List[str]]:
+        """
+        Processes a large file by splitting it into parts at sentence boundaries,
+        and searching in these parts in parallel. The results are generated in sentence order;
+        at most twice as many parts as there are workers are searched ahead of the part that is consumed.
+        """
+        t0 = time.time()
+
+        # Skip the file if it cannot contain a match
+        if self.prefilter and not self.may_contain_results(filename):
+            click.echo('Skipped, as the file cannot contain any results')
+            return
+
+        parts = iter(split_file(filename, self.sentence_tag, self.split_size))
+        click.echo('Split into parts, took {:.3} seconds'.format(time.time() - t0))
 
-    def filter_sentences(self, s_trees):
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+            self._part_payload = pickle.dumps(self)
+        pending = collections.deque(self._pool.submit(process_part, self._part_payload, filename, part)
+                                    for part in itertools.islice(parts, self.workers * 2))
+        self._part_futures = pending
+        try:
+            while pending:
+                results = pending.popleft().result()
+                part = next(parts, None)
+                if part is not None:
+                    pending.append(self._pool.submit(process_part, self._part_payload, filename, part))
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
+
+        click.echo('Finished fetching results from all parts, took {:.3} seconds'.format(time.time() - t0))
+
+    def load_part(self, filename: str, part: FilePart) -> Tuple[Iterable, Dict, Dict]:
+        """
+        Loads a part of a file, like load_file. The alignment and translation trees are shared between the parts.
+        """
+        s_trees = [('end', s) for s in parse_part(filename, part).iter(self.sentence_tag)]
+
+        if self._part_trees[0] != filename:
+            self._part_trees = (filename, self.load_alignment_trees(filename))
+        alignment_trees, translation_trees = self._part_trees[1]
+
+        return s_trees, alignment_trees, translation_trees
+
+    def get_prefilter(self) -> List[Tuple[str, List[str]]]:
+        """
+        Returns the attribute values that are required for a match: for each attribute, at least one of its values
+        should occur in the file. By default, there are no requirements.
+        """
+        return []
+
+    def get_word_pattern(self) -> Optional[str]:
+        """
+        Returns the regular expression the word form of a match should satisfy, if any.
+        """
+        return None
+
+    def store_enabled(self) -> bool:
+        """
+        Checks whether the columnar stores can be used: these only contain the sentences and words,
+        so the XML files are required to output XML or metadata, and to search for tokens
+        (as a range of tokens is looked up among the siblings in the XML, e.g. in the same chunk).
+        """
+        return self.use_store and self.output != XML and not self.metadata and not self.tokens
+
+    def open_store(self, filename: str) -> Optional[TokenStore]:
+        """
+        Opens the columnar store for the given file, if it can be used and is up-to-date.
+        """
+        if not self.store_enabled():
+            return None
+        if not TokenStore.exists(filename):
+            click.echo('No (up-to-date) store found for {}, parsing XML'.format(filename))
+            return None
+
+        store = TokenStore(filename, self.config.get('all', 'id'))
+        if store.outer_tag != self.sentence_tag:
+            return None
+        return store
+
+    def filter_by_index(self, dir_name: str, file_names: List[str]) -> List[str]:
+        """
+        Filters the files (and sentences) on the candidates from the corpus index in the given directory.
+        """
+        self._candidates = dict()
+        index_file = get_index_file(dir_name)
+        if not os.path.exists(index_file):
+            click.echo('No index found for {}, searching in all files'.format(dir_name))
+            return file_names
+
+        queries = [(extractor.get_prefilter(), extractor.get_word_pattern())
+                   for extractor in [self] + self.other_extractors]
+        with CorpusIndex(index_file) as index:
+            self._candidates = index.find_candidates(file_names, queries)
+        return [f for f in file_names if f in self._candidates]
+
+    def may_contain_results(self, filename: str) -> bool:
+        """
+        Checks whether the file may contain results (for this Extractor or any of the combined Extractors),
+        by searching its raw bytes for the required attribute values.
+        Compressed files and files in archives are always processed.
         """
-        Filters the sentences based on the provided sentence_ids.
+        if filename.endswith('.gz') or not os.path.isfile(filename):
+            return True
+
+        for extractor in [self] + self.other_extractors:
+            groups = [attribute_literals(attr, values) for attr, values in extractor.get_prefilter()]
+            if contains_literals(filename, groups):
+                return True
+        return False
+
+    def fetch_combined_results(self,
+                               filename: str,
+                               s_trees: etree.iterparse,
+                               alignment_trees: Dict[str, List[Alignment]],
+                               translation_trees: Dict[str, etree._ElementTree]) -> Iterator[ResultRecord]:
+        """
+        Fetches the results for a single file for this Extractor and all added Extractors in a single pass.
+        The parsed sentences, alignments and translations are shared between the Extractors,
+        each result is tagged with the name of the Extractor that found it (see record_to_row).
+        """
+        extractors = [self] + self.other_extractors
+        for extractor in self.other_extractors:
+            extractor._index = self._index  # share the segments indexed by id as well
+
+        for event, s in s_trees:
+            for extractor in extractors:
+                for result in extractor.fetch_results(filename, [(event, s)], alignment_trees, translation_trees):
+                    yield self.to_record(result, extractor)
+
+    def create_record(self,
+                      filename: str,
+                      sentence: etree._Element,
+                      mwe: Optional[MultiWordExpression] = None,
+                      alignment_trees: Optional[Dict[str, List[Alignment]]] = None,
+                      translation_trees: Optional[Dict[str, etree._ElementTree]] = None) -> ResultRecord:
+        """
+        Creates a record for a result found by this Extractor, of which the fields are computed when accessed.
+        """
+        return ResultRecord(self, filename, sentence, mwe, alignment_trees, translation_trees)
+
+    def to_record(self,
+                  result: Union[ResultRecord, List[str]],
+                  extractor: Optional['BaseExtractor'] = None) -> ResultRecord:
+        """
+        Converts a result to a record: results can be fetched as result lines as well, and lines taken from the cache
+        (or from the parts of a file) are tagged with the name of the Extractor when Extractors are combined.
+        :param result: the result record or result line
+        :param extractor: the Extractor that found the result, None if a result line has been output already
+        """
+        if isinstance(result, ResultRecord):
+            return result
+        if extractor is not None:
+            return RowRecord(extractor, extractor.project(result))
+
+        # Result lines from the cache (or the parts of a file) have been projected (and tagged) already
+        extractor = self
+        if self.other_extractors:
+            extractors = {e.name: e for e in [self] + self.other_extractors}
+            extractor, result = extractors[result[0]], result[1:]
+        return RowRecord(extractor, result)
+
+    def records_to_rows(self, records: Iterable[ResultRecord]) -> Iterator[List[str]]:
+        """
+        Converts the records of a file to result lines, or counts these when only counting the results.
+        """
+        if self.count_only:
+            yield from self.count_records(records)
+        else:
+            for record in records:
+                yield self.record_to_row(record)
+
+    def count_records(self, records: Iterable[ResultRecord]) -> Iterator[List[str]]:
+        """
+        Counts the records of a file per type, construction and lemma (and per Extractor when these are combined).
+        Only these fields are computed for the records: the sentences are not marked, nor are translations loaded.
+        """
+        counts = collections.Counter(tuple(self.record_to_row(record)) for record in records)
+        for hit, count in counts.most_common():
+            yield list(hit) + [str(count)]
+
+    def record_to_row(self, record: ResultRecord) -> List[str]:
+        """
+        Converts a record to a result line, tagged with the name of the Extractor when Extractors are combined.
+        """
+        row = record.to_row()
+        return [record.extractor.name] + row if self.other_extractors else row
+
+    def filter_sentences(self, s_trees, filename=None):
         """
-        if self.sentence_ids:
+        Filters the sentences based on the provided sentence_ids and the candidate sentences from the corpus index.
+        """
+        candidates = self._candidates.get(filename)
+        if self.sentence_ids or candidates is not None:
             # TODO: preferably, this should also return an iterparse instead of a list
             result = []
             for event, s in s_trees:
-                if s.get(self.config.get('all', 'id')) in self.sentence_ids:
+                sentence_id = s.get(self.config.get('all', 'id'))
+                if (not self.sentence_ids or sentence_id in self.sentence_ids) and \
+                        (candidates is None or sentence_id in candidates):
                     result.append((event, s))
             return result
         else:
             return s_trees
 
+    @property
+    def name(self) -> str:
+        """
+        The name of this Extractor, used to tag the results when Extractors are combined.
+        """
+        return self.__class__.__name__
+
     @property
     def sentence_tag(self) -> str:
         """
@@ -225,21 +886,63 @@ class BaseExtractor(ABC):
 
     def generate_header(self) -> List[str]:
         """
-        Returns the header for the output file.
+        Returns the header for the output file, limited to the selected columns.
         """
-        header = [
-            'document',
-            'sentence',
-            'type {}'.format(self.l_from),
-            'words {}'.format(self.l_from),
-            'ids {}'.format(self.l_from),
-            self.l_from]
+        header = ['extractor'] if self.other_extractors else []
+        if self.count_only:
+            return header + ['document', 'type', 'construction', 'lemma', 'count']
+        header += [name for field, name in self.get_columns() if self.selects(field)]
+        return header
+
+    def get_columns(self) -> List[Tuple[str, str]]:
+        """
+        Returns the columns of the (complete) result lines: the field of the result each column belongs to
+        (see COLUMNS), and its name in the header.
+        """
+        columns = [
+            ('document', 'document'),
+            ('sentence', 'sentence'),
+            ('type', 'type {}'.format(self.l_from)),
+            ('words', 'words {}'.format(self.l_from)),
+            ('ids', 'ids {}'.format(self.l_from)),
+            ('text', self.l_from)]
         for metadata in self.metadata.keys():
-            header.append(metadata)
+            columns.append(('metadata', metadata))
         for language in self.l_to:
-            header.append('alignment type')
-            header.append(language)
-        return header
+            columns.append(('translations', 'alignment type'))
+            columns.append(('translations', language))
+        return columns
+
+    def selects(self, field: str) -> bool:
+        """
+        Checks whether a field of the results is output (or counted).
+        """
+        if self.count_only:
+            return field in HIT_FIELDS
+        return self.columns is None or field in self.columns
+
+    def get_row_fields(self) -> List[str]:
+        """
+        Returns the field of each column in the result lines as these are output
+        (before tagging these with the name of the Extractor, and before counting).
+        """
+        if self.count_only:
+            return HIT_FIELDS
+        return [field for field, _ in self.get_columns() if self.selects(field)]
+
+    def project(self, result: List[str]) -> List[str]:
+        """
+        Limits a (complete) result line to the selected columns, or to the counted fields when only counting.
+        """
+        fields = [field for field, _ in self.get_columns()]
+        if self.count_only:
+            values = dict()
+            for field, value in zip(fields, result):
+                values.setdefault(field, value)
+            return [values.get(field, '') for field in HIT_FIELDS]
+        if self.columns is None:
+            return result
+        return [value for field, value in zip(fields, result) if self.selects(field)]
 
     def generate_result_line(self,
                              filename: str,
@@ -252,57 +955,66 @@ class BaseExtractor(ABC):
         :param mwe: The found MultiWordExpression
         :return: A list of output properties.
         """
-        result: List[Optional[str]] = list()
-        result.append(os.path.basename(filename))
-        result.append(self.get_id(sentence))
+        return self.create_record(filename, sentence, mwe).result_line()
 
-        if mwe:
-            result.append(self.get_type(sentence, mwe=mwe))
-            result.append(mwe.construction_to_string())
-            result.append(mwe.construction_ids())
-            if self.output == XML:
-                result.append('<root>' + str(etree.tostring(sentence, encoding=str)) + '</root>')
-            else:
-                result.append(mwe.mark_sentence())
-            self.append_metadata(sentence, result)
-        else:
-            result.append('')
-            result.append('')
-            result.append('')
-            if self.output == XML:
-                result.append('<root>' + str(etree.tostring(sentence, encoding=str)) + '</root>')
-            else:
-                result.append(self.mark_sentence(sentence))
-            self.append_metadata(sentence, result)
+    def generate_translations(self,
+                              alignment_trees: Dict[str, List[Alignment]],
+                              translation_trees: Dict[str, etree._ElementTree],
+                              sentence: etree._Element) -> List[str]:
+        """
+        Returns the alignment type and translated sentence(s) for a sentence, for each target language.
+        By default, there are no translations.
+        """
+        return []
 
-        return result
+    def render_sentence(self, sentence: etree._Element, mwe: MultiWordExpression = None) -> str:
+        """
+        Renders the sentence for a result: with the found MultiWordExpression marked, or in XML format.
+        """
+        if self.output == XML:
+            return '<root>' + str(etree.tostring(sentence, encoding=str)) + '</root>'
+        return mwe.mark_sentence() if mwe else self.mark_sentence(sentence)
 
-    def append_metadata(self,
-                        s: Optional[etree._Element],
-                        result: List[Optional[str]]) -> None:
+    def get_metadata(self, s: Optional[etree._Element]) -> Dict[str, Optional[str]]:
         """
-        Appends metadata for to a result line.
+        Returns the metadata for a sentence.
         """
+        result = dict()
         for metadata, level in self.metadata.items():
             if s is not None and level == 's':
-                result.append(s.get(metadata))
+                result[metadata] = s.get(metadata)
             elif s is not None and level == 'p':
-                result.append(s.getparent().get(metadata))
+                result[metadata] = s.getparent().get(metadata)
             elif s is not None and level == 'text':
-                result.append(s.getparent().getparent().get(metadata))
+                result[metadata] = s.getparent().getparent().get(metadata)
             else:
                 raise ValueError('Invalid level {}'.format(level))
+        return result
+
+    def append_metadata(self,
+                        s: Optional[etree._Element],
+                        result: List[Optional[str]]) -> None:
+        """
+        Appends metadata for to a result line.
+        """
+        result.extend(self.get_metadata(s).values())
 
     def add_extractor(self, extractor: 'BaseExtractor') -> None:
         """
-        Adds another Extractor to this Extractor. This allows to combine Extractors.
-        The last added Extractor determines the output.
+        Adds another Extractor to this Extractor. This allows to combine Extractors:
+        all Extractors then process the files of this Extractor in a single pass,
+        and write their results into the output of this Extractor (tagged with their name).
         """
+        if extractor.l_from != self.l_from or extractor.l_to != self.l_to:
+            raise ValueError('Only Extractors for the same languages can be combined')
+        if extractor.columns != self.columns or extractor.count_only != self.count_only:
+            raise ValueError('Only Extractors with the same columns can be combined')
+        if extractor.name in [e.name for e in [self] + self.other_extractors]:
+            raise ValueError('Only Extractors of different types can be combined, as the results are tagged by type')
         self.other_extractors.append(extractor)
 
     def list_directories(self, path: str) -> Iterator[str]:
-        directories = [os.path.join(path, directory) for directory in os.listdir(path)]
-        return filter(os.path.isdir, directories)
+        return iter(scan_directories(path))
 
     def languages_ordered(self, language_from: str, language_to: str) -> List[str]:
         return [language_from, language_to] if self.no_order_languages else sorted([language_from, language_to])
@@ -316,6 +1028,19 @@ class BaseExtractor(ABC):
         id_attr = self.config.get('all', 'id')
         return element.get(id_attr, '?')
 
+    def get_words(self, sentence: etree._Element) -> List[etree._Element]:
+        """
+        Returns the words in the given sentence.
+        """
+        return sentence.xpath('.//' + self.word_tag)
+
+    def get_tokens(self, sentence: etree._Element, language: str) -> List[Token]:
+        """
+        Returns a view on the words in the given sentence: their text, lemma and part-of-speech tag.
+        """
+        return [Token(w, self.get_text(w), self.get_lemma(w), self.get_pos(language, w))
+                for w in self.get_words(sentence)]
+
     def get_lemma(self, element: etree._Element) -> str:
         lemma_attr = self.config.get('all', 'lemma_attr')
         return element.get(lemma_attr, '?')
@@ -394,9 +1119,9 @@ class BaseExtractor(ABC):
                       filename: str,
                       s_trees: etree.iterparse,
                       alignment_trees: Dict[str, List[Alignment]],
-                      translation_trees: Dict[str, etree._ElementTree]) -> List[str]:
+                      translation_trees: Dict[str, etree._ElementTree]) -> Iterator[List[str]]:
         """
-        Fetches the results for a single file.
+        Fetches the results for a single file, as a generator over the result lines.
         """
         pass
 
@@ -415,6 +1140,13 @@ class BaseExtractor(ABC):
         """
         pass
 
+    def iter_filenames(self, dir_name: str) -> Iterator[str]:
+        """
+        Lazily yields all to be processed files in the given directory.
+        By default, this iterates over list_filenames.
+        """
+        return iter(self.list_filenames(dir_name))
+
     @abstractmethod
     def get_translated_lines(self,
                              alignment_trees: Dict[str, List[Alignment]],
@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, List, Optional
+
+from . import archives
+
+# The default maximum size (in bytes) of the result cache
+CACHE_SIZE = 1 << 30
+
+# Change this when the format of the results changes, to invalidate all existing entries
+CACHE_VERSION = 1
+
+
+def hash_file(filename: str) -> str:
+    """
+    Hashes the contents of a file (that might be in an archive).
+    """
+    digest = hashlib.sha256()
+    with archives.open_file(filename) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(value: Any) -> Any:
+    """
+    Returns a deterministic, JSON-serializable representation of a (parameter) value.
+    Other objects (e.g. compiled patterns) are represented by their class name only,
+    as these are derived from the parameters and the config, which are part of the key already.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return sorted([str(k), fingerprint(v)] for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [fingerprint(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((fingerprint(v) for v in value), key=json.dumps)
+    return type(value).__qualname__
+
+
+def hash_key(value: Any) -> str:
+    """
+    Hashes the fingerprint of a value into a cache key.
+    """
+    return hashlib.sha256(json.dumps([CACHE_VERSION, fingerprint(value)]).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Caches the results of files on disk, under a key that hashes everything the results depend upon.
+    Each entry is a gzip-compressed JSON file. Once the cache grows beyond its maximum size,
+    the least recently used entries are evicted.
+    """
+    def __init__(self, directory: str, max_size: int = CACHE_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self.entries())
+
+    def entries(self) -> List[str]:
+        return [os.path.join(root, name) for root, _, names in os.walk(self.directory)
+                for name in names if name.endswith('.json.gz')]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json.gz')
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def get(self, key: str) -> Optional[List[List[str]]]:
+        """
+        Returns the cached results for a key, or None if these have not been cached (or were evicted).
+        """
+        path = self.path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark the entry as recently used
+        return results
+
+    def put(self, key: str, results: List[List[str]]) -> None:
+        """
+        Stores the results for a key. The entry is written to a temporary file first,
+        so that an interrupted write never leaves a corrupt entry behind.
+        """
+        path = self.path(key)
+        if os.path.exists(path):
+            self.size -= os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            json.dump(results, f)
+        os.replace(tmp_path, path)
+
+        self.size += os.path.getsize(path)
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits its maximum size again.
+        """
+        entries = sorted((os.stat(path).st_mtime, path) for path in self.entries())
+        self.size = sum(os.path.getsize(path) for _, path in entries)
+        for _, path in entries:
+            if self.size <= self.max_size:
+                break
+            self.size -= os.path.getsize(path)
+            os.remove(path)
@@ -0,0 +1,61 @@
+import json
+import os
+from typing import List, NamedTuple, Optional, TextIO
+
+JOURNAL_SUFFIX = '.journal'
+
+
+class Checkpoint(NamedTuple):
+    """
+    A file of which all results have been written, with the size of the result file (in bytes) after doing so.
+    """
+    file_name: str
+    offset: int
+
+
+class Journal:
+    """
+    Records the completed files of a run in a journal next to the result file, one JSON line per file.
+    The result file is synced to disk before a file is recorded, so that the output of a crashed run
+    can be truncated to the last checkpoint, after which the run can be resumed from the next file.
+    """
+    def __init__(self, result_file: str) -> None:
+        self.filename = result_file + JOURNAL_SUFFIX
+        self._fileobj: Optional[TextIO] = None
+
+    def read(self) -> List[Checkpoint]:
+        """
+        Reads the checkpoints in the journal (if any). A line that was only partially written is ignored.
+        """
+        checkpoints: List[Checkpoint] = []
+        if not os.path.exists(self.filename):
+            return checkpoints
+
+        with open(self.filename) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    checkpoints.append(Checkpoint(entry['file'], entry['offset']))
+                except (ValueError, KeyError):
+                    break
+        return checkpoints
+
+    def start(self, checkpoints: List[Checkpoint]) -> None:
+        """
+        Starts a new journal with the given checkpoints (e.g. those of the run that is resumed).
+        """
+        self._fileobj = open(self.filename, 'w')
+        for checkpoint in checkpoints:
+            self.record(checkpoint.file_name, checkpoint.offset)
+
+    def record(self, file_name: str, offset: int) -> None:
+        self._fileobj.write(json.dumps({'file': file_name, 'offset': offset}) + '\n')
+        self._fileobj.flush()
+        os.fsync(self._fileobj.fileno())
+
+    def finish(self) -> None:
+        """
+        Removes the journal once the run has been completed.
+        """
+        self._fileobj.close()
+        os.remove(self.filename)
@@ -0,0 +1,124 @@
+import concurrent.futures
+import fnmatch
+import os
+from typing import Iterator, List, NamedTuple, Sequence, Union
+
+from . import archives
+
+# The number of threads that list subtrees in parallel
+SCAN_WORKERS = 4
+
+
+class FileEntry(NamedTuple):
+    """
+    A file found during discovery, with its size (in bytes) as reported by the directory entry.
+    """
+    path: str
+    size: int
+
+
+def matches(name: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def scan_tree(dir_name: str,
+              patterns: Sequence[str],
+              exclude: Sequence[str] = (),
+              recursive: bool = True) -> Iterator[FileEntry]:
+    """
+    Lazily yields the files in a directory (and its subdirectories, if recursive) that match any of the patterns,
+    in sorted order. Directories that match any of the exclude patterns are skipped.
+    The directory is listed with os.scandir, so that the type and size of the entries come with the listing.
+    """
+    archive, _ = archives.split_path(dir_name)
+    if archive:
+        yield from scan_archive(dir_name, patterns, exclude, recursive)
+        return
+
+    with os.scandir(dir_name) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    for entry in entries:
+        if entry.is_dir():
+            if recursive and not matches(entry.name, exclude):
+                yield from scan_tree(entry.path, patterns, exclude, recursive)
+        elif matches(entry.name, patterns):
+            yield FileEntry(entry.path, entry.stat().st_size)
+
+
+def scan_archive(dir_name: str,
+                 patterns: Sequence[str],
+                 exclude: Sequence[str] = (),
+                 recursive: bool = True) -> Iterator[FileEntry]:
+    """
+    Yields the files in a directory in an archive, like scan_tree. Sizes are not available here.
+    """
+    for name in archives.listdir(dir_name):
+        path = os.path.join(dir_name, name)
+        if archives.isdir(path):
+            if recursive and not matches(name, exclude):
+                yield from scan_archive(path, patterns, exclude, recursive)
+        elif matches(name, patterns):
+            yield FileEntry(path, -1)
+
+
+def scan_directories(dir_name: str) -> List[str]:
+    """
+    Lists the subdirectories of a directory (that might be in an archive), in sorted order.
+    """
+    archive, _ = archives.split_path(dir_name)
+    if archive:
+        return [os.path.join(dir_name, name) for name in archives.listdir(dir_name)
+                if archives.isdir(os.path.join(dir_name, name))]
+
+    with os.scandir(dir_name) as it:
+        return sorted(entry.path for entry in it if entry.is_dir())
+
+
+def scan_files(dir_name: str,
+               patterns: Sequence[str],
+               exclude: Sequence[str] = (),
+               recursive: bool = True,
+               workers: int = SCAN_WORKERS) -> Iterator[FileEntry]:
+    """
+    Lazily yields the files in a directory that match any of the patterns, in sorted order.
+    The subdirectories of the directory are listed in parallel (by the given number of threads),
+    and the files are yielded as soon as the listing of the subdirectory they are in has finished.
+    :param dir_name: the directory
+    :param patterns: the (glob) patterns of the files to find
+    :param exclude: the (glob) patterns of the directories to skip
+    :param recursive: whether to look into subdirectories
+    :param workers: the number of threads
+    """
+    archive, _ = archives.split_path(dir_name)
+    if archive or not recursive or workers <= 1:
+        yield from scan_tree(dir_name, patterns, exclude, recursive)
+        return
+
+    with os.scandir(dir_name) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    def list_subtree(path: str) -> List[FileEntry]:
+        return list(scan_tree(path, patterns, exclude))
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        # Submit all subtrees upfront, but yield the files in order
+        items: List[Union[FileEntry, concurrent.futures.Future]] = []
+        for entry in entries:
+            if entry.is_dir():
+                if not matches(entry.name, exclude):
+                    items.append(executor.submit(list_subtree, entry.path))
+            elif matches(entry.name, patterns):
+                items.append(FileEntry(entry.path, entry.stat().st_size))
+
+        try:
+            for item in items:
+                if isinstance(item, FileEntry):
+                    yield item
+                else:
+                    yield from item.result()
+        finally:
+            # Do not wait for subtrees that have not been started when the iteration stops early
+            for item in items:
+                if isinstance(item, concurrent.futures.Future):
+                    item.cancel()
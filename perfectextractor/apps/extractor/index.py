@@ -0,0 +1,249 @@
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import click
+
+from . import archives
+from .utils import iterparse_xml
+
+# The file name of the index in a corpus directory
+INDEX_FILE = '.perfectextractor-index.sqlite'
+
+# The pseudo-attribute under which the word forms are indexed
+WORD_FORM = '#text'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS attributes (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, name TEXT UNIQUE, size INTEGER, mtime REAL);
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, attribute TEXT, value TEXT, UNIQUE (attribute, value));
+CREATE TABLE IF NOT EXISTS postings (term INTEGER, file INTEGER, sentences TEXT, PRIMARY KEY (term, file));
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file);
+'''
+
+# A query consists of the allowed values per attribute and (optionally) a regular expression on the word form
+Query = Tuple[List[Tuple[str, List[str]]], Optional[str]]
+
+
+def get_index_file(dir_name: str) -> str:
+    """
+    Returns the index file of a directory. The index of a directory in an archive is stored next to the archive.
+    """
+    archive, _ = archives.split_path(dir_name)
+    if archive:
+        return archives.flatten(dir_name) + INDEX_FILE
+    return os.path.join(dir_name, INDEX_FILE)
+
+
+def batches(values: list, size: int = 500) -> Iterator[list]:
+    """
+    Splits the values into batches, to stay below the maximum number of variables in an SQL statement.
+    """
+    for n in range(0, len(values), size):
+        yield values[n:n + size]
+
+
+class CorpusIndex:
+    """
+    An inverted index from (attribute, value) pairs to the files and sentences in a corpus directory
+    in which a word with this value occurs. The index is stored in a SQLite database in the directory itself.
+    Postings are stored per file, the sentence ids are joined by spaces.
+    """
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.dir_name = os.path.dirname(filename)
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'CorpusIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get_name(self, filename: str) -> str:
+        """
+        Returns the name of a file relative to the index, so that a corpus directory can be moved.
+        """
+        return os.path.relpath(filename, self.dir_name)
+
+    @staticmethod
+    def get_stat(filename: str) -> Tuple[int, float]:
+        """
+        Returns the size and modification time of a file, to detect changes since indexing.
+        The members of an archive cannot be stat'ed: these take the stat of the archive itself,
+        so that all members are re-indexed once the archive changes.
+        """
+        archive, _ = archives.split_path(filename)
+        stat = os.stat(archive.path if archive else filename)
+        return stat.st_size, stat.st_mtime
+
+    def get_attributes(self) -> Set[str]:
+        return {name for name, in self.connection.execute('SELECT name FROM attributes')}
+
+    def get_files(self) -> Dict[str, Tuple[int, int, float]]:
+        """
+        Returns the indexed files, with their id, and their size and modification time at the moment of indexing.
+        """
+        return {name: (i, size, mtime) for i, name, size, mtime in
+                self.connection.execute('SELECT id, name, size, mtime FROM files')}
+
+    def update(self, extractor, file_names: List[str]) -> None:
+        """
+        Updates the index for the given files: only files that are new or have changed since they were indexed
+        are (re-)indexed, and files that no longer exist are removed from the index.
+        :param extractor: the Extractor that is used to find the sentences and words in the files
+        :param file_names: the files that should be in the index
+        """
+        attributes = [extractor.config.get('all', 'lemma_attr'),
+                      extractor.config.get(extractor.l_from, 'pos', fallback=extractor.config.get('all', 'pos'))]
+
+        with self.connection:
+            # If different attributes are indexed, start afresh
+            if self.get_attributes() != set(attributes):
+                self.connection.executescript('DELETE FROM attributes; DELETE FROM files; '
+                                              'DELETE FROM terms; DELETE FROM postings;')
+                self.connection.executemany('INSERT INTO attributes VALUES (?)', [(a,) for a in attributes])
+
+            indexed = self.get_files()
+            names = {self.get_name(f) for f in file_names}
+            for name, (file_id, _, _) in indexed.items():
+                if name not in names:
+                    self.remove(file_id)
+
+        terms = {(attribute, value): i for i, attribute, value in
+                 self.connection.execute('SELECT id, attribute, value FROM terms')}
+        for filename in file_names:
+            name = self.get_name(filename)
+            size, mtime = self.get_stat(filename)
+            if name in indexed and indexed[name][1:] == (size, mtime):
+                continue
+
+            click.echo('Indexing {}...'.format(filename))
+            with self.connection:
+                if name in indexed:
+                    self.remove(indexed[name][0])
+                cursor = self.connection.execute('INSERT INTO files (name, size, mtime) VALUES (?, ?, ?)',
+                                                 (name, size, mtime))
+                self.add_postings(cursor.lastrowid, self.read_terms(extractor, filename, attributes), terms)
+
+    def remove(self, file_id: int) -> None:
+        self.connection.execute('DELETE FROM postings WHERE file = ?', (file_id,))
+        self.connection.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    @staticmethod
+    def read_terms(extractor, filename: str, attributes: List[str]) -> Dict[Tuple[str, str], List[str]]:
+        """
+        Reads the (attribute, value) pairs in a file, with the ids of the sentences they occur in.
+        """
+        id_attr = extractor.config.get('all', 'id')
+
+        result: Dict[Tuple[str, str], List[str]] = dict()
+        for _, s in iterparse_xml(filename, extractor.sentence_tag):
+            sentence_id = s.get(id_attr)
+            if sentence_id:
+                for w in extractor.get_words(s):
+                    values = [(a, w.get(a)) for a in attributes] + [(WORD_FORM, ''.join(w.itertext()))]
+                    for term in values:
+                        if term[1]:
+                            sentences = result.setdefault(term, [])
+                            if not sentences or sentences[-1] != sentence_id:
+                                sentences.append(sentence_id)
+            s.clear()
+        return result
+
+    def add_postings(self,
+                     file_id: int,
+                     postings: Dict[Tuple[str, str], List[str]],
+                     terms: Dict[Tuple[str, str], int]) -> None:
+        for term in postings:
+            if term not in terms:
+                cursor = self.connection.execute('INSERT INTO terms (attribute, value) VALUES (?, ?)', term)
+                terms[term] = cursor.lastrowid
+        self.connection.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                                    [(terms[term], file_id, ' '.join(sentences))
+                                     for term, sentences in postings.items()])
+
+    def find_terms(self, attribute: str, values: Iterable[str]) -> List[int]:
+        values = list(values)
+        result = []
+        for batch in batches(values):
+            query = 'SELECT id FROM terms WHERE attribute = ? AND value IN ({})'.format(', '.join('?' * len(batch)))
+            result.extend(i for i, in self.connection.execute(query, [attribute] + batch))
+        return result
+
+    def match_terms(self, attribute: str, pattern: str) -> List[int]:
+        """
+        Finds the terms for an attribute of which the value (case-insensitively) matches the regular expression.
+        """
+        regex = re.compile(pattern, re.IGNORECASE)
+        return [i for i, value in self.connection.execute('SELECT id, value FROM terms WHERE attribute = ?',
+                                                          (attribute,)) if regex.search(value)]
+
+    def find_postings(self, term_ids: List[int]) -> Dict[int, Set[str]]:
+        """
+        Returns the sentences in which any of the terms occurs, per file id.
+        """
+        result: Dict[int, Set[str]] = dict()
+        for batch in batches(term_ids):
+            query = 'SELECT file, sentences FROM postings WHERE term IN ({})'.format(', '.join('?' * len(batch)))
+            for file_id, sentences in self.connection.execute(query, batch):
+                result.setdefault(file_id, set()).update(sentences.split(' '))
+        return result
+
+    def find_query(self, query: Query) -> Optional[Dict[int, Set[str]]]:
+        """
+        Finds the candidate sentences for a single query, per file id.
+        A sentence is a candidate if it contains a value for each of the filters on attributes in the index.
+        :return: the candidates, or None if the index cannot restrict the query
+        """
+        filters, pattern = query
+        attributes = self.get_attributes()
+
+        groups = [self.find_terms(attribute, values) for attribute, values in filters if attribute in attributes]
+        if pattern:
+            groups.append(self.match_terms(WORD_FORM, pattern))
+        if not groups:
+            return None
+
+        result = None
+        for term_ids in groups:
+            postings = self.find_postings(term_ids)
+            if result is None:
+                result = postings
+            else:
+                result = {f: result[f] & postings[f] for f in result.keys() & postings.keys()}
+                result = {f: sentences for f, sentences in result.items() if sentences}
+        return result
+
+    def find_candidates(self, file_names: List[str], queries: List[Query]) -> Dict[str, Optional[Set[str]]]:
+        """
+        Finds the candidate files and sentences for the given queries (that are combined with OR).
+        Files that have not been indexed or have changed since indexing are always candidates.
+        :param file_names: the files to consider
+        :param queries: the queries
+        :return: the candidate files, with their candidate sentence ids (or None if all sentences are candidates)
+        """
+        results = [self.find_query(query) for query in queries]
+        if any(r is None for r in results):
+            return {f: None for f in file_names}
+
+        indexed = self.get_files()
+        candidates: Dict[str, Optional[Set[str]]] = dict()
+        for filename in file_names:
+            name = self.get_name(filename)
+            if name not in indexed or indexed[name][1:] != self.get_stat(filename):
+                candidates[filename] = None
+                continue
+
+            file_id = indexed[name][0]
+            sentences = set()
+            for result in results:
+                sentences.update(result.get(file_id, set()))
+            if sentences:
+                candidates[filename] = sentences
+        return candidates
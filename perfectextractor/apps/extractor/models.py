@@ -4,6 +4,11 @@ from lxml import etree
 
 MARKUP = u'**{}**'
 
+# Tenses
+PRESENT = 'present'
+PAST = 'past'
+# FUTURE = 'future'  # TODO: implement this somewhere in the near future
+
 
 class Word:
     """
@@ -52,6 +57,12 @@ class MultiWordExpression:
     def construction_ids(self) -> str:
         return ' '.join([w.xml_id for w in self.words if w.in_construction])
 
+    def construction_lemmata(self) -> str:
+        """
+        Returns the lemmata of the words in the construction as a string.
+        """
+        return ' '.join([w.lemma for w in self.words if w.in_construction])
+
     def words_between(self) -> int:
         """
         Returns the total number of words in a MultiWordExpression not of part of the construction.
@@ -108,8 +119,9 @@ class Perfect(MultiWordExpression):
     A Perfect is a special kind of MultiWordExpression, consisting of an auxiliary and one or more past participles.
     """
 
-    def __init__(self, xml_sentence: etree._Element) -> None:
+    def __init__(self, xml_sentence: etree._Element, tense: str = PRESENT) -> None:
         super().__init__(xml_sentence)
+        self.tense = tense
         self.is_passive = False
         self.is_continuous = False
         self.is_reflexive = False
@@ -136,8 +148,8 @@ class Perfect(MultiWordExpression):
         """
         Returns the type of Perfect.
         """
-        # TODO: This should be language-dependent, as well as dependent upon being a Present or Past Perfect
-        result = 'present perfect'
+        # TODO: This should be language-dependent
+        result = '{} perfect'.format(self.tense)
         if self.is_passive:
             result += ' passive'
         if self.is_continuous:
@@ -0,0 +1,85 @@
+import mmap
+import re
+from typing import List, NamedTuple, Pattern, Tuple
+
+from lxml import etree
+
+# The default size (in bytes) from which files are split into parts
+SPLIT_SIZE = 32 << 20
+
+# The attributes of a start tag, which might contain a '>' within quotes
+ATTRIBUTES = rb'(?:[^>"\']|"[^"]*"|\'[^\']*\')*?'
+
+
+class FilePart(NamedTuple):
+    """
+    A part of an XML file: the byte range [start, end) and the markup that makes it a well-formed document.
+    The prefix holds the prolog and the start tags of the ancestors of the part, the suffix closes these again.
+    """
+    start: int
+    end: int
+    prefix: bytes
+    suffix: bytes
+
+
+def token_pattern(sentence_tag: str) -> Pattern:
+    """
+    Compiles a pattern that matches complete sentences (so that the words within these can be skipped at once),
+    as well as the other tags, comments, processing instructions, CDATA sections and the doctype declaration.
+    """
+    s = re.escape(etree.QName(sentence_tag).localname.encode())
+    return re.compile(rb'(?P<sentence><' + s + rb'[\s>]' + rb'.*?</' + s + rb'\s*>)|'
+                      rb'<!--.*?-->|<\?.*?\?>|<!\[CDATA\[.*?\]\]>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|'
+                      rb'<(?P<close>/?)(?P<name>[^\s/>!?]+)' + ATTRIBUTES + rb'(?P<empty>/?)>', re.DOTALL)
+
+
+def split_file(filename: str, sentence_tag: str, size: int = SPLIT_SIZE) -> List[FilePart]:
+    """
+    Splits an XML file into parts of about the given size (in bytes), at the start of a sentence.
+    The file is scanned once with a regular expression (rather than parsed), keeping track of the open elements,
+    so that each part can be parsed on its own while keeping its ancestors (and their attributes).
+    :param filename: the (uncompressed) XML file
+    :param sentence_tag: the tag of the sentences
+    :param size: the size of the parts
+    :return: The parts, in document order
+    """
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        prolog = None
+        stack: List[Tuple[bytes, bytes]] = []  # the names and start tags of the open elements
+        boundaries: List[Tuple[int, List[Tuple[bytes, bytes]]]] = [(0, [])]
+        for match in token_pattern(sentence_tag).finditer(data):
+            if match.group('sentence'):
+                if stack and match.start() >= boundaries[-1][0] + size:
+                    boundaries.append((match.start(), list(stack)))
+            elif match.group('name'):
+                if prolog is None:
+                    prolog = data[:match.start()]
+                if match.group('close'):
+                    if stack:
+                        stack.pop()
+                elif not match.group('empty'):
+                    stack.append((match.group('name'), match.group(0)))
+
+        parts = []
+        for n, (start, context) in enumerate(boundaries):
+            end, next_context = boundaries[n + 1] if n + 1 < len(boundaries) else (len(data), [])
+            prefix = prolog + b''.join(tag for _, tag in context) if n else b''
+            suffix = b''.join(b'</' + name + b'>' for name, _ in reversed(next_context))
+            parts.append(FilePart(start, end, prefix, suffix))
+        return parts
+
+
+def read_part(filename: str, part: FilePart) -> bytes:
+    """
+    Reads a part of an XML file as a well-formed document.
+    """
+    with open(filename, 'rb') as f:
+        f.seek(part.start)
+        return part.prefix + f.read(part.end - part.start) + part.suffix
+
+
+def parse_part(filename: str, part: FilePart) -> etree._Element:
+    """
+    Parses a part of an XML file, returning its root element.
+    """
+    return etree.fromstring(read_part(filename, part), parser=etree.XMLParser(huge_tree=True))
@@ -0,0 +1,55 @@
+from abc import ABC
+from typing import Dict, Iterator, List, Optional
+
+import click
+from lxml import etree
+
+from .base import BaseExtractor
+from .models import MultiWordExpression
+from .patterns import TokenPattern
+
+
+class PatternExtractor(BaseExtractor, ABC):
+    def __init__(self,
+                 language_from: str,
+                 languages_to: Optional[List[str]] = None,
+                 construction: Optional[str] = None,
+                 **kwargs) -> None:
+        """
+        Initializes the extractor for the given source and target language(s).
+        Reads in the pattern for the construction from the config for the source language.
+        :param language_from: the source language
+        :param languages_to: the target language(s)
+        :param construction: the name of the construction, i.e. the key of its pattern in the config
+        """
+        super().__init__(language_from, languages_to, **kwargs)
+
+        self.construction = construction
+        self.patterns: Dict[str, TokenPattern] = dict()
+
+        self.check_language_in_config(language_from)
+        self.get_pattern(language_from)
+
+    def get_pattern(self, language: str) -> TokenPattern:
+        """
+        Returns the (compiled) pattern for the construction in the given language.
+        """
+        if language not in self.patterns:
+            source = self.config.get(language, self.construction, fallback=None) if self.construction else None
+            if not source:
+                msg = 'No pattern for construction {} for language {}'.format(self.construction, language)
+                raise click.ClickException(msg)
+            self.patterns[language] = TokenPattern(source)
+        return self.patterns[language]
+
+    def find_constructions(self, sentence: etree._Element, language: str) -> Iterator[MultiWordExpression]:
+        """
+        Finds the constructions in the given sentence in a single pass.
+        """
+        tokens = self.get_tokens(sentence, language)
+        for match in self.get_pattern(language).finditer(tokens):
+            mwe = MultiWordExpression(sentence)
+            for i, in_construction in match:
+                token = tokens[i]
+                mwe.add_word(token.word, token.lemma, token.pos, self.get_id(token.element), in_construction)
+            yield mwe
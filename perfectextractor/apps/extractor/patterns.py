@@ -0,0 +1,199 @@
+import re
+import string
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from lxml import etree
+
+# Instructions of the compiled patterns
+CONSUME = 'consume'
+SPLIT = 'split'
+JUMP = 'jump'
+MATCH = 'match'
+
+# Quantifiers
+OPTIONAL = '?'
+GAP = '*'
+
+ELEMENT_RE = re.compile(r'\s*\[([^\]]*)\]([?*]?)\s*')
+CONSTRAINT_RE = re.compile(r'^(word|lemma|pos)\s*(!?\^?=)\s*(.+)$')
+
+
+class Token(NamedTuple):
+    """
+    A Token is a view on a word in a sentence: the XML element, its text, lemma and part-of-speech.
+    """
+    element: etree._Element
+    word: str
+    lemma: str
+    pos: str
+
+
+Predicate = Callable[[Token], bool]
+Instruction = Tuple[str, object, object]
+PatternMatch = List[Tuple[int, bool]]
+
+
+def compile_constraint(constraint: str) -> Predicate:
+    """
+    Compiles a single constraint on a Token, e.g. "lemma=venir", "pos^=VER" or "!punct".
+    """
+    constraint = constraint.strip()
+    if constraint in ('punct', '!punct'):
+        negate = constraint.startswith('!')
+        return lambda token: (token.word in string.punctuation) != negate
+
+    match = CONSTRAINT_RE.match(constraint)
+    if not match:
+        raise ValueError('Invalid constraint: {}'.format(constraint))
+
+    attribute, operator, values = match.groups()
+    values = tuple(v.strip() for v in values.split('|'))
+    negate = operator.startswith('!')
+    if '^' in operator:
+        return lambda token: getattr(token, attribute).startswith(values) != negate
+    else:
+        value_set = frozenset(values)
+        return lambda token: (getattr(token, attribute) in value_set) != negate
+
+
+def compile_constraints(constraints: str) -> Predicate:
+    """
+    Compiles the constraints of an element (separated by &) into a single predicate.
+    An element without constraints matches any Token.
+    """
+    predicates = [compile_constraint(c) for c in constraints.split('&') if c.strip()]
+    return lambda token: all(p(token) for p in predicates)
+
+
+class TokenPattern:
+    """
+    A TokenPattern describes a construction as a sequence of elements that each match a single word, e.g.:
+
+        [lemma=venir & pos=VER:pres] [!punct & pos!^=VER]* [lemma=de] [!punct & pos!^=VER]* [pos=VER:infi]
+
+    Each element consists of constraints on the word, lemma or part-of-speech of a word, separated by &.
+    The operators are = (equals any of the values), ^= (starts with any of the values) and their negations != and !^=.
+    Multiple values are separated by |. The constraint punct (or !punct) checks whether the word is punctuation.
+    An element can be followed by a quantifier:
+    - ? makes the element optional (if it is present, it will be part of the construction);
+    - * makes the element a gap: zero or more words that are not part of the construction.
+      The gap stops at the first word that does not satisfy the constraints.
+    A construction can consist of multiple alternative patterns (e.g. one per line in a config file),
+    earlier alternatives take precedence over later ones.
+
+    The pattern is compiled into a finite-state automaton that finds the (non-overlapping) constructions
+    in a sentence in a single left-to-right pass.
+    """
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.program: List[Instruction] = []
+
+        alternatives = [line.strip() for line in source.splitlines() if line.strip()]
+        if not alternatives:
+            raise ValueError('Empty pattern')
+
+        jumps = []
+        for n, alternative in enumerate(alternatives):
+            split = None
+            if n < len(alternatives) - 1:
+                split = len(self.program)
+                self.program.append((SPLIT, split + 1, None))
+            self.compile_alternative(alternative)
+            if split is not None:
+                jumps.append(len(self.program))
+                self.program.append((JUMP, None, None))
+                self.program[split] = (SPLIT, split + 1, len(self.program))
+        for jump in jumps:
+            self.program[jump] = (JUMP, len(self.program), None)
+        self.program.append((MATCH, None, None))
+
+    def compile_alternative(self, alternative: str) -> None:
+        """
+        Compiles a single alternative of the pattern into instructions.
+        """
+        position = 0
+        has_construction = False
+        while position < len(alternative):
+            match = ELEMENT_RE.match(alternative, position)
+            if not match:
+                raise ValueError('Invalid pattern at position {}: {}'.format(position, alternative))
+            position = match.end()
+
+            predicate = compile_constraints(match.group(1))
+            quantifier = match.group(2)
+            start = len(self.program)
+            if quantifier == OPTIONAL:
+                # Greedy: prefer taking the word over skipping it
+                self.program.append((SPLIT, start + 1, start + 2))
+                self.program.append((CONSUME, predicate, True))
+            elif quantifier == GAP:
+                # Lazy: prefer leaving the gap over extending it
+                self.program.append((SPLIT, start + 3, start + 1))
+                self.program.append((CONSUME, predicate, False))
+                self.program.append((JUMP, start, None))
+            else:
+                self.program.append((CONSUME, predicate, True))
+                has_construction = True
+
+        if not has_construction:
+            raise ValueError('Pattern should contain at least one required element: {}'.format(alternative))
+
+    def _add_thread(self, threads: List[Tuple[int, tuple]], seen: set, pc: int, path: tuple) -> None:
+        """
+        Adds a thread for the given instruction, following jumps and splits (in order of precedence).
+        Threads that arrive at an instruction already taken by a thread of higher precedence are dropped.
+        """
+        if pc in seen:
+            return
+        seen.add(pc)
+
+        instruction, a, b = self.program[pc]
+        if instruction == JUMP:
+            self._add_thread(threads, seen, a, path)
+        elif instruction == SPLIT:
+            self._add_thread(threads, seen, a, path)
+            self._add_thread(threads, seen, b, path)
+        else:
+            threads.append((pc, path))
+
+    def search(self, tokens: List[Token], start: int = 0) -> Optional[PatternMatch]:
+        """
+        Finds the leftmost construction in the Tokens from the given start position.
+        :return: the match as a list of Token indices and whether these are part of the construction, or None
+        """
+        matched = None
+        threads: List[Tuple[int, tuple]] = []
+        seen: set = set()
+        for i in range(start, len(tokens) + 1):
+            # Start a new match at every position (with the lowest precedence), until a match has been found
+            if matched is None:
+                self._add_thread(threads, seen, 0, ())
+
+            next_threads: List[Tuple[int, tuple]] = []
+            next_seen: set = set()
+            for pc, path in threads:
+                instruction, a, b = self.program[pc]
+                if instruction == MATCH:
+                    # Threads of lower precedence can be discarded
+                    matched = path
+                    break
+                if i < len(tokens) and a(tokens[i]):
+                    self._add_thread(next_threads, next_seen, pc + 1, path + ((i, b),))
+            threads, seen = next_threads, next_seen
+
+            if matched is not None and not threads:
+                break
+
+        return list(matched) if matched is not None else None
+
+    def finditer(self, tokens: List[Token]) -> Iterator[PatternMatch]:
+        """
+        Finds all non-overlapping constructions in the Tokens.
+        """
+        start = 0
+        while start < len(tokens):
+            match = self.search(tokens, start)
+            if match is None:
+                break
+            yield match
+            start = match[-1][0] + 1
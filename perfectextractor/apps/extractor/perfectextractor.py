@@ -4,29 +4,24 @@ from abc import ABC, abstractmethod
 import codecs
 import string
 import os
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from lxml import etree
 
 from .base import BaseExtractor
-from .models import Perfect
+from .models import Perfect, PRESENT, PAST
 from .wiktionary import get_translations
 
 # List of verbs that have BE instead of HAVE as their auxiliary
 AUX_BE_CONFIG = os.path.join(os.path.dirname(__file__), 'config/{language}_aux_be.txt')
 
-# Tenses
-PRESENT = 'present'
-PAST = 'past'
-# FUTURE = 'future'  # TODO: implement this somewhere in the near future
-
 
 class PerfectExtractor(BaseExtractor, ABC):
     def __init__(self,
                  language_from: str,
                  languages_to: Optional[List[str]] = None,
                  search_in_to: bool = False,
-                 tense: str = PRESENT,
+                 tense: Union[str, List[str]] = PRESENT,
                  **kwargs):
         """
         Initializes the PerfectExtractor for the given source and target language(s).
@@ -35,12 +30,12 @@ class PerfectExtractor(BaseExtractor, ABC):
         :param language_from: the source language
         :param languages_to: the target language(s)
         :param search_in_to: whether to look for perfects in the target language
-        :param tense: whether to search for present, past or future perfects
+        :param tense: whether to search for present, past or future perfects (can be provided as a list)
         """
         super().__init__(language_from, languages_to, **kwargs)
 
         self.search_in_to = search_in_to
-        self.tense = tense
+        self.tenses: List[str] = [tense] if isinstance(tense, str) else list(tense)
 
         languages = [self.l_from]
         if search_in_to:
@@ -66,6 +61,33 @@ class PerfectExtractor(BaseExtractor, ABC):
         """
         pass
 
+    def get_prefilter(self):
+        """
+        When the search is limited to certain lemmata, a Perfect contains at least one of these.
+        If all sentences are classified, all files should be processed.
+        """
+        if self.lemmata_list and not self.one_per_sentence:
+            return [(self.config.get('all', 'lemma_attr'), self.lemmata_list)]
+        return []
+
+    def get_config_for_tense(self, language: str, key: str, tense: str) -> str:
+        """
+        Retrieves the configuration value for the given key in the given tense (e.g. aux_words_past),
+        with a fallback to the value for the present tense (e.g. aux_words).
+        """
+        key_tense = key + ('_{}'.format(tense) if tense != PRESENT else '')
+        l_config = self.config[language]
+        return l_config.get(key_tense, l_config.get(key))
+
+    def find_auxiliaries(self, sentence: etree._Element, language: str, namespaces: Optional[dict] = None):
+        """
+        Finds the potential auxiliaries in a sentence for each of the tenses searched for.
+        :return: tuples of the auxiliary and the tense it was found for
+        """
+        for tense in self.tenses:
+            for e in sentence.xpath(self.get_config_for_tense(language, 'xpath', tense), namespaces=namespaces):
+                yield e, tense
+
     def is_lexically_bound(self,
                            language: str,
                            pp: Perfect,
@@ -114,13 +136,16 @@ class PerfectExtractor(BaseExtractor, ABC):
                       language: str,
                       check_ppp: bool = True,
                       check_ppc: bool = False,
-                      check_preceding: bool = False) -> Optional[Perfect]:
+                      check_preceding: bool = False,
+                      tense: Optional[str] = None) -> Optional[Perfect]:
         """
         Checks whether this element (i.e. the auxiliary) is the start of a Perfect (pp),
-        a Perfect continuous (ppc) or passive Perfect (ppp).
+        a Perfect continuous (ppc) or passive Perfect (ppp) in the given tense
+        (by default, the first tense searched for).
         If it is, the complete construction is returned as a Perfect object.
         If not, None is returned.
         """
+        tense = tense or self.tenses[0]
         perfect_tags = self.config.get(language, 'perfect_tags').split('|')
         check_ppp = check_ppp and self.config.getboolean(language, 'ppp')
         ppp_lemma = self.config.get(language, 'ppp_lemma')
@@ -130,14 +155,11 @@ class PerfectExtractor(BaseExtractor, ABC):
         allow_reversed = self.config.getboolean(language, 'allow_reversed')
 
         # Retrieves the auxiliaries, or a fallback if there are none provided
-        aux_fallback = 'aux_words'
-        aux = aux_fallback + ('_{}'.format(self.tense) if self.tense != PRESENT else '')
-        l_config = self.config[language]
-        aux_words = l_config.get(aux, l_config.get(aux_fallback)).split('|')
+        aux_words = self.get_config_for_tense(language, 'aux_words', tense).split('|')
 
         # Start a potential Perfect
         s = self.get_sentence(auxiliary)
-        pp = Perfect(s)
+        pp = Perfect(s, tense=tense)
         pp.add_word(self.get_text(auxiliary), self.get_lemma(auxiliary),
                     self.get_pos(language, auxiliary), self.get_id(auxiliary))
         is_pp = False
@@ -175,7 +197,8 @@ class PerfectExtractor(BaseExtractor, ABC):
                     ppp = self.check_perfect(sibling, language,
                                              check_ppp=False,
                                              check_ppc=True,
-                                             check_preceding=check_preceding)
+                                             check_preceding=check_preceding,
+                                             tense=tense)
                     if ppp:
                         pp.extend(ppp)
                     elif not self.in_lemmata_list(sibling_lemma):
@@ -197,7 +220,7 @@ class PerfectExtractor(BaseExtractor, ABC):
         # If we haven't yet found a past participle, and we are allowed to look in the other direction,
         # try to find a past participle by looking backwards in the sentence.
         if not is_pp and allow_reversed and not check_preceding:
-            pp = self.check_perfect(auxiliary, language, check_ppp=check_ppp, check_preceding=True)
+            pp = self.check_perfect(auxiliary, language, check_ppp=check_ppp, check_preceding=True, tense=tense)
             if pp:
                 is_pp = True
 
@@ -1,10 +1,20 @@
 from abc import ABC
-from typing import Dict, List, Optional, Tuple
+import itertools
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from lxml import etree
 
 from .base import BaseExtractor
 from .models import MultiWordExpression
+from .vectorised import VectorisedMatcher
+
+# Matching engines
+XPATH = 'xpath'
+VECTORISED = 'vectorised'
+
+# The number of sentences that are matched at once by the vectorised engine
+VECTORISED_BATCH_SIZE = 1000
 
 
 class PoSExtractor(BaseExtractor, ABC):
@@ -13,6 +23,7 @@ class PoSExtractor(BaseExtractor, ABC):
                  languages_to: Optional[List[str]] = None,
                  pos: Optional[List[str]] = None,
                  regex: Optional[List[str]] = None,
+                 engine: str = XPATH,
                  **kwargs) -> None:
         """
         Initializes the extractor for the given source and target language(s).
@@ -21,32 +32,57 @@ class PoSExtractor(BaseExtractor, ABC):
         :param languages_to: the target language(s)
         :param pos: A list of part-of-speech tags
         :param regex: A list of regular expressions
+        :param engine: whether to match words using XPath predicates or vectorised masks
         """
         super().__init__(language_from, languages_to, **kwargs)
 
         self.pos = pos
         self.regex = regex
+        self.engine = engine
 
-    def prepare_xpath(self) -> Tuple[str, Dict[str, str]]:
+    def prepare_filters(self) -> Tuple[List[Tuple[str, List[str]]], Optional[str]]:
+        """
+        Prepares the filters on the words: the allowed values per attribute, and a combined regular expression.
+        """
         id_attr = self.config.get('all', 'id')
         lemma_attr = self.config.get('all', 'lemma_attr')
         pos_attr = self.config.get(self.l_from, 'pos', fallback=self.config.get('all', 'pos'))
 
-        ns = {}
-        predicate = 'contains(" {value} ", concat(" ", @{element}, " "))'
-        predicates = []
-
+        filters = []
         if self.tokens:
-            predicates.append(predicate.format(element=id_attr, value=' '.join(self.tokens.keys())))
+            filters.append((id_attr, list(self.tokens.keys())))
         if self.lemmata_list:
-            predicates.append(predicate.format(element=lemma_attr, value=' '.join(self.lemmata_list)))
+            filters.append((lemma_attr, self.lemmata_list))
         if self.pos:
-            predicates.append(predicate.format(element=pos_attr, value=' '.join(self.pos)))
+            filters.append((pos_attr, list(self.pos)))
+
+        pattern = None
         if self.regex:
             # prepare a pattern that combines multiple regexps using OR operators
             # and non-capturing groups
             pattern = '|'.join('(?:{})'.format(r) for r in self.regex)
 
+        return filters, pattern
+
+    def get_prefilter(self) -> List[Tuple[str, List[str]]]:
+        """
+        A word should satisfy all filters on attributes, so each of these should occur in the file.
+        """
+        filters, _ = self.prepare_filters()
+        return filters
+
+    def get_word_pattern(self) -> Optional[str]:
+        _, pattern = self.prepare_filters()
+        return pattern
+
+    def prepare_xpath(self, include_regex: bool = True) -> Tuple[str, Dict[str, str]]:
+        filters, pattern = self.prepare_filters()
+
+        ns = {}
+        predicate = 'contains(" {value} ", concat(" ", @{element}, " "))'
+        predicates = [predicate.format(element=attr, value=' '.join(values)) for attr, values in filters]
+
+        if pattern and include_regex:
             # special namespace required for enabling regular expression functions
             ns = {"re": "http://exslt.org/regular-expressions"}
             predicates.append('re:test(., "{pattern}", "i")'.format(pattern=pattern))
@@ -57,6 +93,40 @@ class PoSExtractor(BaseExtractor, ABC):
 
         return xpath, ns
 
+    def find_words(self,
+                   s_trees: etree.iterparse,
+                   namespaces: Optional[Dict[str, str]] = None) -> Iterator[Tuple[etree._Element, List[etree._Element]]]:
+        """
+        Finds the words that pass the filters, either by XPath predicates (per sentence),
+        or by vectorised masks (for batches of sentences at once).
+        :return: tuples of each sentence and the found words in this sentence
+        """
+        if self.engine == VECTORISED:
+            matcher = VectorisedMatcher(*self.prepare_filters())
+            s_trees = iter(s_trees)
+            while True:
+                batch = [(s, self.get_words(s)) for _, s in itertools.islice(s_trees, VECTORISED_BATCH_SIZE)]
+                if not batch:
+                    break
+                yield from matcher.find(batch)
+        else:
+            # The regular expression is matched in Python, rather than by calling back from the XPath expression
+            filters, pattern = self.prepare_filters()
+            regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+            xpath, ns = self.prepare_xpath(include_regex=False)
+            ns.update(namespaces or {})
+            for _, s in s_trees:
+                if regex:
+                    # Skip sentences without words matching the regular expression, before evaluating the XPath
+                    words = [w for w in self.get_words(s) if regex.search(''.join(w.itertext()))]
+                    if words and filters:
+                        candidates = set(words)
+                        words = [w for w in s.xpath(xpath, namespaces=ns) if w in candidates]
+                    if words:
+                        yield s, words
+                else:
+                    yield s, s.xpath(xpath, namespaces=ns)
+
     def preprocess_found(self, word: etree._Element) -> List[etree._Element]:
         """
         Preprocesses the found word:
@@ -0,0 +1,216 @@
+import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional
+
+from lxml import etree
+
+from .models import MultiWordExpression
+
+if TYPE_CHECKING:
+    from .base import BaseExtractor
+
+
+# The fields of a result that hold a single column
+FIELDS = ['document', 'sentence', 'type', 'words', 'ids', 'text']
+
+# The fields of a result that are counted when only counting the results
+HIT_FIELDS = ['document', 'type', 'words', 'lemma']
+
+
+class lazy_property:
+    """
+    A property that is computed when first accessed, and then stored on the instance
+    (like functools.cached_property, which is not available before Python 3.8).
+    """
+    def __init__(self, func: Callable) -> None:
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        if instance is None:
+            return self
+        value = instance.__dict__[self.func.__name__] = self.func(instance)
+        return value
+
+
+class Translation(NamedTuple):
+    """
+    The translation of a result in a target language: the type of the alignment (e.g. 1 => 2)
+    and the translated sentence(s).
+    """
+    alignment_type: Optional[str]
+    text: Optional[str]
+
+
+class ResultRecord:
+    """
+    A result found by an Extractor: a sentence (and the construction found in it), with its translations.
+    The fields are computed when these are first accessed, so that a consumer that only needs e.g. the ids or types
+    of the results does not pay for marking or serializing the sentence, nor for looking up its translations.
+    Note that the trees of a file are released once all its results have been generated,
+    so the fields are best accessed while iterating.
+    """
+    def __init__(self,
+                 extractor: 'BaseExtractor',
+                 filename: str,
+                 sentence: Optional[etree._Element],
+                 mwe: Optional[MultiWordExpression] = None,
+                 alignment_trees: Optional[Dict] = None,
+                 translation_trees: Optional[Dict] = None) -> None:
+        self.extractor = extractor
+        self.filename = filename
+        self.element = sentence
+        self.mwe = mwe
+        self.alignment_trees = alignment_trees or dict()
+        self.translation_trees = translation_trees or dict()
+
+    @property
+    def document(self) -> Optional[str]:
+        return os.path.basename(self.filename)
+
+    @lazy_property
+    def sentence(self) -> Optional[str]:
+        """
+        The id of the sentence.
+        """
+        return self.extractor.get_id(self.element)
+
+    @lazy_property
+    def type(self) -> Optional[str]:
+        return self.extractor.get_type(self.element, mwe=self.mwe) if self.mwe else ''
+
+    @lazy_property
+    def words(self) -> Optional[str]:
+        """
+        The words in the construction.
+        """
+        return self.mwe.construction_to_string() if self.mwe else ''
+
+    @lazy_property
+    def ids(self) -> Optional[str]:
+        """
+        The ids of the words in the construction.
+        """
+        return self.mwe.construction_ids() if self.mwe else ''
+
+    @lazy_property
+    def lemma(self) -> Optional[str]:
+        """
+        The lemmata of the words in the construction.
+        """
+        return self.mwe.construction_lemmata() if self.mwe else ''
+
+    @lazy_property
+    def text(self) -> Optional[str]:
+        """
+        The sentence, with the construction marked (or in XML format, depending on the output of the Extractor).
+        """
+        return self.extractor.render_sentence(self.element, self.mwe)
+
+    @lazy_property
+    def metadata(self) -> Dict[str, Optional[str]]:
+        return self.extractor.get_metadata(self.element)
+
+    @lazy_property
+    def translation_columns(self) -> List[Optional[str]]:
+        """
+        The alignment type and translation columns, for all target languages.
+        """
+        return self.extractor.generate_translations(self.alignment_trees, self.translation_trees, self.element)
+
+    @property
+    def translations(self) -> Dict[str, Translation]:
+        """
+        The translations per target language.
+        """
+        columns = self.translation_columns
+        return {language: Translation(*columns[2 * n:2 * n + 2])
+                for n, language in enumerate(self.extractor.l_to) if 2 * n + 1 < len(columns)}
+
+    def result_line(self) -> List[Optional[str]]:
+        """
+        Returns all columns of this result, except for its translations.
+        """
+        result = [self.document, self.sentence, self.type, self.words, self.ids, self.text]
+        result.extend(self.metadata.values())
+        return result
+
+    def to_row(self) -> List[Optional[str]]:
+        """
+        Returns this result as a line in the output file, i.e. in the order of the header of the Extractor.
+        Only the columns selected by the Extractor are computed.
+        """
+        if self.extractor.count_only:
+            return [getattr(self, field) for field in HIT_FIELDS]
+
+        selects = self.extractor.selects
+        result = [getattr(self, field) for field in FIELDS if selects(field)]
+        if selects('metadata'):
+            result.extend(self.metadata.values())
+        if selects('translations'):
+            result.extend(self.translation_columns)
+        return result
+
+
+class RowRecord(ResultRecord):
+    """
+    A result of which the line in the output file has been computed already: either by an Extractor that
+    generates its result lines itself, or as it has been taken from the cache (or from a part of the file).
+    The fields are looked up in the columns of the line (see BaseExtractor.get_row_fields),
+    and are None if the line does not have these.
+    """
+    def __init__(self, extractor: 'BaseExtractor', row: List[Optional[str]]) -> None:
+        super().__init__(extractor, '', None)
+        self.row = row
+
+    @lazy_property
+    def _fields(self) -> List[str]:
+        return self.extractor.get_row_fields()
+
+    def values(self, field: str) -> List[Optional[str]]:
+        """
+        Returns the values of the columns of a field.
+        """
+        return [value for f, value in zip(self._fields, self.row) if f == field]
+
+    def value(self, field: str) -> Optional[str]:
+        values = self.values(field)
+        return values[0] if values else None
+
+    @property
+    def document(self) -> Optional[str]:
+        return self.value('document')
+
+    @property
+    def sentence(self) -> Optional[str]:
+        return self.value('sentence')
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.value('type')
+
+    @property
+    def words(self) -> Optional[str]:
+        return self.value('words')
+
+    @property
+    def ids(self) -> Optional[str]:
+        return self.value('ids')
+
+    @property
+    def lemma(self) -> Optional[str]:
+        return self.value('lemma')
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.value('text')
+
+    @property
+    def metadata(self) -> Dict[str, Optional[str]]:
+        return dict(zip(self.extractor.metadata.keys(), self.values('metadata')))
+
+    @property
+    def translation_columns(self) -> List[Optional[str]]:
+        return self.values('translations')
+
+    def to_row(self) -> List[Optional[str]]:
+        return self.row
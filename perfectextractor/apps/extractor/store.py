@@ -0,0 +1,341 @@
+import json
+import os
+import re
+from functools import reduce
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+from lxml import etree
+
+from .models import Alignment
+from .utils import iterparse_xml
+
+# The suffix of the directory in which the columns of a file are stored
+STORE_SUFFIX = '.store'
+
+# The pseudo-attribute under which the text of the elements is stored
+TEXT = '#text'
+
+META_FILE = 'meta.json'
+VOCABULARY = 'vocabulary'
+OFFSETS = 'offsets'
+
+# Prefixes of the columns for the outer (e.g. sentences) and inner (e.g. words) elements
+OUTER = 'outer'
+INNER = 'inner'
+
+
+def get_store_dir(filename: str) -> str:
+    return filename + STORE_SUFFIX
+
+
+def get_stat(filename: str) -> Tuple[int, float]:
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime
+
+
+def write_store(filename: str, tags: Tuple[str, str], columns: Dict[str, list], offsets: List[int]) -> None:
+    """
+    Writes a columnar store for a file: all values are interned into a (sorted) vocabulary,
+    and each column is written as an array of integer codes into this vocabulary (-1 for a missing value).
+    :param filename: the file that has been converted
+    :param tags: the tags of the outer and inner elements
+    :param columns: the values per column
+    :param offsets: the offsets of the inner elements per outer element
+    """
+    store_dir = get_store_dir(filename)
+    os.makedirs(store_dir, exist_ok=True)
+
+    values = sorted({v for column in columns.values() for v in column if v is not None})
+    vocabulary = np.array(values, dtype=str) if values else np.array([], dtype='<U1')
+    codes = {v: i for i, v in enumerate(values)}
+
+    names = []
+    for n, (name, column) in enumerate(columns.items()):
+        names.append(name)
+        array = np.array([codes[v] if v is not None else -1 for v in column], dtype=np.int32)
+        np.save(os.path.join(store_dir, '{}.npy'.format(n)), array)
+    np.save(os.path.join(store_dir, VOCABULARY + '.npy'), vocabulary)
+    np.save(os.path.join(store_dir, OFFSETS + '.npy'), np.array(offsets, dtype=np.int64))
+
+    size, mtime = get_stat(filename)
+    with open(os.path.join(store_dir, META_FILE), 'w') as f:
+        json.dump(dict(size=size, mtime=mtime, tags=list(tags), columns=names), f)
+
+
+class ColumnStore:
+    """
+    A memory-mapped columnar store of a file: the attributes (and text) of a sequence of outer elements,
+    and of the inner elements in each of these.
+    The offsets determine which inner elements belong to which outer element.
+    """
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.store_dir = get_store_dir(filename)
+        with open(os.path.join(self.store_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.outer_tag, self.inner_tag = self.meta['tags']
+        self.vocabulary = self.load(VOCABULARY)
+        self.offsets = self.load(OFFSETS)
+        self._columns: Dict[str, np.ndarray] = dict()
+        self._values: Optional[List[str]] = None
+        self._escaped: Optional[List[str]] = None
+
+    @classmethod
+    def exists(cls, filename: str) -> bool:
+        """
+        Checks whether a store exists for the file, and whether it is still up-to-date.
+        """
+        meta_file = os.path.join(get_store_dir(filename), META_FILE)
+        if not os.path.isfile(meta_file):
+            return False
+        with open(meta_file) as f:
+            meta = json.load(f)
+        return (meta['size'], meta['mtime']) == get_stat(filename)
+
+    def load(self, name: str) -> np.ndarray:
+        """
+        Memory-maps a column (as a plain array, as slicing a memmap has a considerable overhead).
+        """
+        return np.load(os.path.join(self.store_dir, '{}.npy'.format(name)), mmap_mode='r').view(np.ndarray)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def column(self, level: str, attribute: str) -> Optional[np.ndarray]:
+        name = '{}:{}'.format(level, attribute)
+        if name not in self.meta['columns']:
+            return None
+        if name not in self._columns:
+            self._columns[name] = self.load(str(self.meta['columns'].index(name)))
+        return self._columns[name]
+
+    def attributes(self, level: str) -> List[str]:
+        prefix = level + ':'
+        return [name[len(prefix):] for name in self.meta['columns'] if name.startswith(prefix)]
+
+    def value(self, code: int) -> Optional[str]:
+        return str(self.vocabulary[code]) if code >= 0 else None
+
+    def lookup(self, values: List[str]) -> np.ndarray:
+        """
+        Looks up the codes of the given values (that occur in the vocabulary).
+        """
+        values = np.array(values, dtype=str)
+        positions = np.searchsorted(self.vocabulary, values)
+        in_range = positions < len(self.vocabulary)
+        positions, values = positions[in_range], values[in_range]
+        return positions[self.vocabulary[positions] == values]
+
+    def inner_mask(self, attribute: str, values: List[str]) -> np.ndarray:
+        """
+        Returns a mask of the inner elements of which the attribute has any of the given values.
+        """
+        column = self.column(INNER, attribute)
+        if column is None:
+            return np.zeros(self.offsets[-1], dtype=bool)
+        return np.isin(column, self.lookup(values))
+
+    def inner_regex_mask(self, attribute: str, pattern: str) -> np.ndarray:
+        """
+        Returns a mask of the inner elements of which the attribute (case-insensitively) matches the pattern.
+        The pattern is evaluated only once per distinct value.
+        """
+        column = self.column(INNER, attribute)
+        if column is None:
+            return np.zeros(self.offsets[-1], dtype=bool)
+        regex = re.compile(pattern, re.IGNORECASE)
+        codes = np.unique(column)
+        matching = [c for c in codes if c >= 0 and regex.search(self.value(c))]
+        return np.isin(column, matching)
+
+    def outer_any(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Returns a mask of the outer elements that contain any of the inner elements in the mask.
+        """
+        counts = np.cumsum(np.concatenate(([0], mask.astype(np.int64))))
+        return counts[self.offsets[1:]] > counts[self.offsets[:-1]]
+
+    def decode(self, codes: np.ndarray) -> List[Optional[str]]:
+        """
+        Decodes an array of codes into their values.
+        """
+        if self._values is None:
+            self._values = self.vocabulary.tolist()
+        return [self._values[c] if c >= 0 else None for c in codes.tolist()]
+
+    def escaped(self) -> List[str]:
+        """
+        Returns the vocabulary, escaped for use in XML attributes and text.
+        """
+        if self._escaped is None:
+            self._escaped = [escape(v, {'"': '&quot;'}) for v in self.decode(np.arange(len(self.vocabulary)))]
+        return self._escaped
+
+    def to_xml(self, i: int) -> str:
+        """
+        Serialises the outer element at the given position (and its inner elements) into XML.
+        """
+        escaped = self.escaped()
+        outer_tag, inner_tag = etree.QName(self.outer_tag).localname, etree.QName(self.inner_tag).localname
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+
+        def attributes(level, s, e):
+            result = [''] * (e - s)
+            for a in self.attributes(level):
+                if a != TEXT:
+                    fragment = ' {}="{{}}"'.format(a).format
+                    result = [r + fragment(escaped[c]) if c >= 0 else r
+                              for r, c in zip(result, self.column(level, a)[s:e].tolist())]
+            return result
+
+        text = self.column(INNER, TEXT)
+        texts = text[start:end].tolist() if text is not None else [-1] * (end - start)
+
+        parts = ['<{}{}>'.format(outer_tag, attributes(OUTER, i, i + 1)[0])]
+        for attrib, code in zip(attributes(INNER, start, end), texts):
+            if code >= 0:
+                parts.append('<{0}{1}>{2}</{0}>'.format(inner_tag, attrib, escaped[code]))
+            else:
+                parts.append('<{}{}/>'.format(inner_tag, attrib))
+        parts.append('</{}>'.format(outer_tag))
+        return ''.join(parts)
+
+    def materialise(self, positions: List[int]) -> List[etree._Element]:
+        """
+        Materialises the outer elements at the given positions (and their inner elements) into XML,
+        by serialising these into a single document, which is then parsed in one go.
+        """
+        namespace = etree.QName(self.outer_tag).namespace
+        root = '<root xmlns="{}">'.format(namespace) if namespace else '<root>'
+        xml = root + ''.join(self.to_xml(i) for i in positions) + '</root>'
+        return list(etree.fromstring(xml))
+
+
+class TokenStore(ColumnStore):
+    """
+    A columnar store of the sentences (outer elements) and words (inner elements) in a document.
+    """
+    def __init__(self, filename: str, id_attr: str = 'id') -> None:
+        super().__init__(filename)
+        self.id_attr = id_attr
+        self._positions: Optional[Dict[str, int]] = None
+        self._sentences: Dict[int, etree._Element] = dict()
+
+    @staticmethod
+    def convert(filename: str, sentence_tag: str, word_tag: str) -> None:
+        """
+        Converts a document into a columnar store.
+        """
+        columns: Dict[str, list] = dict()
+        offsets = [0]
+        n_sentences = 0
+        n_words = 0
+
+        def add(level, attribute, n, value):
+            column = columns.setdefault('{}:{}'.format(level, attribute), [])
+            column.extend([None] * (n - len(column)))  # pad values that were missing
+            column.append(value)
+
+        for _, s in iterparse_xml(filename, sentence_tag):
+            for attribute, value in s.attrib.items():
+                add(OUTER, attribute, n_sentences, value)
+            for w in s.iter(word_tag):
+                for attribute, value in w.attrib.items():
+                    add(INNER, attribute, n_words, value)
+                add(INNER, TEXT, n_words, w.text)
+                n_words += 1
+            n_sentences += 1
+            offsets.append(n_words)
+            s.clear()
+
+        for name, column in columns.items():
+            n = n_sentences if name.startswith(OUTER) else n_words
+            column.extend([None] * (n - len(column)))
+
+        write_store(filename, (sentence_tag, word_tag), columns, offsets)
+
+    def find_sentences(self, filters: List[Tuple[str, List[str]]], pattern: Optional[str] = None) -> np.ndarray:
+        """
+        Finds the positions of the sentences that contain a word for each of the filters on attributes,
+        and a word that matches the pattern (if any). Without filters, all sentences are returned.
+        """
+        found = np.ones(len(self), dtype=bool)
+        for attribute, values in filters:
+            found &= self.outer_any(self.inner_mask(attribute, values))
+        if pattern:
+            found &= self.outer_any(self.inner_regex_mask(TEXT, pattern))
+        return np.flatnonzero(found)
+
+    def select(self, queries: List[Tuple[List[Tuple[str, List[str]]], Optional[str]]]) -> np.ndarray:
+        """
+        Selects the positions of the sentences that satisfy any of the queries.
+        """
+        positions = [self.find_sentences(filters, pattern) for filters, pattern in queries]
+        return reduce(np.union1d, positions) if positions else np.arange(len(self))
+
+    def get_sentence(self, position: int) -> etree._Element:
+        if position not in self._sentences:
+            self._sentences[position] = self.materialise([position])[0]
+        return self._sentences[position]
+
+    def get_sentence_by_id(self, sentence_id: str) -> Optional[etree._Element]:
+        if self._positions is None:
+            column = self.column(OUTER, self.id_attr)
+            self._positions = {v: i for i, v in enumerate(self.decode(column))} if column is not None else dict()
+        position = self._positions.get(sentence_id)
+        return self.get_sentence(position) if position is not None else None
+
+    def iter_sentences(self, positions: np.ndarray, batch_size: int = 1000) -> Iterator[Tuple[str, etree._Element]]:
+        """
+        Yields the sentences at the given positions, like an iterparse over the sentences would.
+        The sentences are materialised in batches.
+        """
+        positions = positions.tolist()
+        for n in range(0, len(positions), batch_size):
+            for s in self.materialise(positions[n:n + batch_size]):
+                yield 'end', s
+
+
+class AlignmentStore(ColumnStore):
+    """
+    A columnar store of the link groups (outer elements) and links (inner elements) in an alignment file.
+    """
+    @staticmethod
+    def convert(filename: str) -> None:
+        """
+        Converts an alignment file into a columnar store.
+        """
+        columns: Dict[str, list] = {'{}:fromDoc'.format(OUTER): [], '{}:toDoc'.format(OUTER): [],
+                                    '{}:xtargets'.format(INNER): [], '{}:certainty'.format(INNER): []}
+        offsets = [0]
+        for _, linkGrp in iterparse_xml(filename, 'linkGrp'):
+            columns['{}:fromDoc'.format(OUTER)].append(linkGrp.get('fromDoc'))
+            columns['{}:toDoc'.format(OUTER)].append(linkGrp.get('toDoc'))
+            for link in linkGrp.iter('link'):
+                columns['{}:xtargets'.format(INNER)].append(link.get('xtargets'))
+                columns['{}:certainty'.format(INNER)].append(link.get('certainty'))
+            offsets.append(len(columns['{}:xtargets'.format(INNER)]))
+            linkGrp.clear()
+
+        write_store(filename, ('linkGrp', 'link'), columns, offsets)
+
+    def find_groups(self, attribute: str, docs: List[str]) -> np.ndarray:
+        """
+        Finds the positions of the link groups of which the attribute (fromDoc or toDoc) is any of the documents.
+        """
+        return np.flatnonzero(np.isin(self.column(OUTER, attribute), self.lookup(docs)))
+
+    def get_doc(self, position: int, attribute: str) -> Optional[str]:
+        return self.value(self.column(OUTER, attribute)[position])
+
+    def get_alignments(self, position: int) -> List[Alignment]:
+        xtargets = self.column(INNER, 'xtargets')
+        certainty = self.column(INNER, 'certainty')
+
+        alignments = []
+        for j in range(self.offsets[position], self.offsets[position + 1]):
+            sources, targets = self.value(xtargets[j]).split(';')
+            alignments.append(Alignment(sources.split(' '), targets.split(' '), self.value(certainty[j])))
+        return alignments
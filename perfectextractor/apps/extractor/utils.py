@@ -1,10 +1,21 @@
 import contextlib
 import configparser
 import csv
+import gzip
+import io
+import json
+import os
+import queue
+import sqlite3
+import threading
 from typing import Dict, List, Tuple, Union
 
+import click
+from lxml import etree
 from xlsxwriter import Workbook  # type: ignore
 
+from . import archives
+
 # Output formats for the results
 TXT = 'txt'
 XML = 'xml'
@@ -12,26 +23,68 @@ XML = 'xml'
 # Output format for the file
 CSV = 'csv'
 XLSX = 'xlsx'
+PARQUET = 'parquet'
+SQLITE = 'sqlite'
+JSONL = 'jsonl'
+
+# Compression for the file (for CSV and JSON Lines), with their extensions
+GZIP = 'gzip'
+ZSTD = 'zstd'
+COMPRESSIONS = {GZIP: '.gz', ZSTD: '.zst'}
+
+# The number of rows per row group in Parquet files
+ROW_GROUP_SIZE = 65536
+
+# The number of rows inserted per transaction in SQLite databases
+INSERT_BATCH_SIZE = 100000
+
+# The columns that are indexed in SQLite databases, once all rows have been inserted
+INDEXED_COLUMNS = ['document', 'sentence', 'type']
+
+
+# The maximum number of rows in an Excel worksheet
+MAX_ROWS = 1048576
 
 
 class ExcelWriter:
     """
     Writes xlsx files while mimicking the CSV writer interface.
+    The workbook is written in constant memory mode: each row is flushed to disk once the next row is started,
+    so rows are written in order. Once a worksheet is full, the rows roll over to a new worksheet,
+    which starts with the header again.
     """
-    def __init__(self, filename):
-        self._workbook = Workbook(filename)
-        self._worksheet = self._workbook.add_worksheet()  # this assumes an empty file
+    def __init__(self, filename, max_rows=MAX_ROWS):
+        self._workbook = Workbook(filename, {'constant_memory': True})
+        self._max_rows = max_rows
+        self._header = None
+        self._header_format = None
+        self._worksheet = None
         self._row = 0
+        self.add_worksheet()
 
-    def writerow(self, contents, is_header=False):
-        cell_format = None
+    def add_worksheet(self):
+        self._worksheet = self._workbook.add_worksheet()  # this assumes an empty file
+        self._row = 0
+        if self._header is not None:
+            self.write_header()
 
+    def write_header(self):
         # Add bold formatting and an autofilter
+        self._worksheet.autofilter(self._row, 0, 0, len(self._header) - 1)
+        self._worksheet.write_row(self._row, 0, self._header, self._header_format)
+        self._row += 1
+
+    def writerow(self, contents, is_header=False):
         if is_header:
-            cell_format = self._workbook.add_format({'bold': True})
-            self._worksheet.autofilter(self._row, 0, 0, len(contents) - 1)
+            # Keep the header, to repeat it on every worksheet
+            self._header = contents
+            self._header_format = self._workbook.add_format({'bold': True})
+            self.write_header()
+            return
 
-        self._worksheet.write_row(self._row, 0, contents, cell_format)
+        if self._row >= self._max_rows:
+            self.add_worksheet()
+        self._worksheet.write_row(self._row, 0, contents)
         self._row += 1
 
     def writerows(self, rows):
@@ -42,11 +95,140 @@ class ExcelWriter:
         self._workbook.close()
 
 
+class CsvWriter:
+    """
+    Writes (semicolon-separated) CSV files, allowing to checkpoint the output written so far.
+    """
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._writer = csv.writer(fileobj, delimiter=';')
+
+    def writerow(self, row, is_header=False):
+        self._writer.writerow(row)
+
+    def writerows(self, rows):
+        self._writer.writerows(rows)
+
+    def checkpoint(self):
+        """
+        Makes sure the output written so far is on disk, and returns its size (in bytes).
+        """
+        self._fileobj.flush()
+        os.fsync(self._fileobj.fileno())
+        return self._fileobj.tell()
+
+
+def get_compression(filename):
+    """
+    Returns the compression of a file, based on its extension (None if it is not compressed).
+    """
+    for compression, extension in COMPRESSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+def compressed_filename(filename, compression):
+    """
+    Adds the extension of the compression to a filename (if it does not have it already).
+    """
+    extension = COMPRESSIONS[compression]
+    return filename if filename.endswith(extension) else filename + extension
+
+
+class ThreadedCompressedWriter(io.RawIOBase):
+    """
+    Writes a compressed file, while compressing it in a background thread.
+    The written chunks are passed through a bounded queue, so that compression overlaps with the extraction,
+    without holding the uncompressed output in memory.
+    """
+    def __init__(self, filename, compression, max_chunks=4):
+        super().__init__()
+        self._compressor = get_compressor(compression)  # fail early if the compression is not available
+        self._queue = queue.Queue(max_chunks)
+        self._error = None
+        self._thread = threading.Thread(target=self._compress, args=(filename,), daemon=True)
+        self._thread.start()
+
+    def _compress(self, filename):
+        try:
+            with open(filename, 'wb') as raw, self._compressor(raw) as f:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is None:
+                        break
+                    f.write(chunk)
+        except Exception as e:
+            self._error = e
+            # Keep consuming the chunks, to not block the writer on a full queue
+            while self._queue.get() is not None:
+                pass
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self._error:
+            raise self._error
+        self._queue.put(bytes(b))
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            self._queue.put(None)
+            self._thread.join()
+            super().close()
+            if self._error:
+                raise self._error
+
+
+def get_compressor(compression):
+    """
+    Returns a function that wraps a binary file object in a compressing file object.
+    """
+    if compression == GZIP:
+        return lambda raw: gzip.GzipFile(fileobj=raw, mode='wb')
+    if compression == ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise click.ClickException('Writing zstd-compressed files requires zstandard, '
+                                       'install it with: pip install zstandard')
+        return lambda raw: zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    raise ValueError('Unknown compression: {}'.format(compression))
+
+
+@contextlib.contextmanager
+def open_text(filename, chunk_size=1 << 20):
+    """
+    Opens a text file for writing. If the filename ends with .gz or .zst, the file is compressed on the fly
+    in a background thread.
+    """
+    compression = get_compression(filename)
+    if compression is None:
+        with open(filename, 'w') as fileobj:
+            yield fileobj
+    else:
+        raw = ThreadedCompressedWriter(filename, compression)
+        with io.TextIOWrapper(io.BufferedWriter(raw, chunk_size), encoding='utf-8') as fileobj:
+            yield fileobj
+
+
 @contextlib.contextmanager
-def open_csv(filename):
-    with open(filename, 'w') as fileobj:
-        fileobj.write('\uFEFF')  # the UTF-8 BOM to hint Excel we are using that...
-        yield csv.writer(fileobj, delimiter=';')
+def open_csv(filename, offset=None):
+    """
+    Opens a CSV file for writing. If an offset is given, the existing file is truncated to that size
+    and the output is appended from there (e.g. to resume from a checkpoint).
+    """
+    if offset is None:
+        with open_text(filename) as fileobj:
+            fileobj.write('\uFEFF')  # the UTF-8 BOM to hint Excel we are using that...
+            yield CsvWriter(fileobj)
+    else:
+        with open(filename, 'r+') as fileobj:
+            fileobj.truncate(offset)
+            fileobj.seek(offset)
+            yield CsvWriter(fileobj)
 
 
 @contextlib.contextmanager
@@ -56,6 +238,292 @@ def open_xlsx(filename):
     writer.close()
 
 
+class ParquetWriter:
+    """
+    Writes Parquet files while mimicking the CSV writer interface.
+    The rows are buffered and written as a row group once the buffer is full, so that the file is written
+    while the results stream in. All columns are (nullable) strings, named after the header;
+    duplicate names are numbered like pandas does when reading a CSV file (e.g. alignment type, alignment type.1).
+    """
+    def __init__(self, filename, row_group_size=ROW_GROUP_SIZE):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise click.ClickException('Writing Parquet files requires pyarrow, install it with: pip install pyarrow')
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._filename = filename
+        self._row_group_size = row_group_size
+        self._schema = None
+        self._writer = None
+        self._rows = []
+
+    def writerow(self, contents, is_header=False):
+        if is_header:
+            self._schema = self._pa.schema([(name, self._pa.string()) for name in unique_columns(contents)])
+            self._writer = self._pq.ParquetWriter(self._filename, self._schema)
+            return
+
+        if len(contents) > len(self._schema):
+            raise ValueError('Result has more columns ({}) than the header ({})'.format(
+                len(contents), len(self._schema)))
+        self._rows.append(contents)
+        if len(self._rows) >= self._row_group_size:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        columns = [[] for _ in self._schema]
+        for row in self._rows:
+            for n, column in enumerate(columns):
+                value = row[n] if n < len(row) else None
+                column.append(str(value) if value is not None else None)
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        if self._rows:
+            self.flush()
+        if self._writer is None:
+            raise ValueError('No header has been written')
+        self._writer.close()
+
+
+def unique_columns(header):
+    """
+    Numbers duplicate column names, e.g. alignment type, alignment type.1, alignment type.2.
+    """
+    counts = dict()
+    columns = []
+    for name in header:
+        columns.append('{}.{}'.format(name, counts[name]) if name in counts else name)
+        counts[name] = counts.get(name, 0) + 1
+    return columns
+
+
+@contextlib.contextmanager
+def open_parquet(filename):
+    writer = ParquetWriter(filename)
+    yield writer
+    writer.close()
+
+
+class SqliteWriter:
+    """
+    Writes the results to a table in a SQLite database while mimicking the CSV writer interface.
+    The rows are buffered and inserted in batches with a single prepared statement, each batch in its own transaction.
+    The document, sentence and type columns are indexed once all rows have been inserted, as that is
+    much faster than keeping the indexes up to date while inserting. Column names are made unique as for Parquet files.
+    """
+    def __init__(self, filename, table='results', batch_size=INSERT_BATCH_SIZE):
+        if os.path.exists(filename):
+            os.remove(filename)  # like the other formats, overwrite an existing file
+        self._connection = sqlite3.connect(filename, isolation_level=None)
+        # The database is written from scratch, so there's no need for a rollback journal
+        self._connection.execute('PRAGMA journal_mode = OFF')
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._table = table
+        self._batch_size = batch_size
+        self._columns = None
+        self._statement = None
+        self._rows = []
+
+    def writerow(self, contents, is_header=False):
+        if is_header:
+            self._columns = unique_columns(contents)
+            self._connection.execute('CREATE TABLE {} ({})'.format(
+                quote_identifier(self._table), ', '.join(quote_identifier(c) + ' TEXT' for c in self._columns)))
+            self._statement = 'INSERT INTO {} VALUES ({})'.format(
+                quote_identifier(self._table), ', '.join('?' * len(self._columns)))
+            return
+
+        if len(contents) > len(self._columns):
+            raise ValueError('Result has more columns ({}) than the header ({})'.format(
+                len(contents), len(self._columns)))
+        if len(contents) < len(self._columns):
+            contents = list(contents) + [None] * (len(self._columns) - len(contents))
+        self._rows.append(contents)
+        if len(self._rows) >= self._batch_size:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        with self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.executemany(self._statement, self._rows)
+        self._rows = []
+
+    def create_indexes(self):
+        """
+        Indexes the document, sentence and type columns (the latter is named after the source language, e.g. type en).
+        """
+        for name in INDEXED_COLUMNS:
+            column = next((c for c in self._columns if c == name or c.startswith(name + ' ')), None)
+            if column is not None:
+                self._connection.execute('CREATE INDEX {} ON {} ({})'.format(
+                    quote_identifier('{}_{}'.format(self._table, name)),
+                    quote_identifier(self._table),
+                    quote_identifier(column)))
+
+    def close(self):
+        try:
+            if self._columns is None:
+                raise ValueError('No header has been written')
+            if self._rows:
+                self.flush()
+            self.create_indexes()
+        finally:
+            self._connection.close()
+
+
+def quote_identifier(name):
+    """
+    Quotes a table or column name for use in SQL statements.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+@contextlib.contextmanager
+def open_sqlite(filename):
+    writer = SqliteWriter(filename)
+    yield writer
+    writer.close()
+
+
+class JsonLinesWriter:
+    """
+    Writes JSON Lines files while mimicking the CSV writer interface: each result is written as an object
+    on a line of its own, with the (unique) column names as keys.
+    """
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._columns = None
+
+    def writerow(self, contents, is_header=False):
+        if is_header:
+            self._columns = unique_columns(contents)
+            return
+
+        if len(contents) > len(self._columns):
+            raise ValueError('Result has more columns ({}) than the header ({})'.format(
+                len(contents), len(self._columns)))
+        record = {column: contents[n] if n < len(contents) else None for n, column in enumerate(self._columns)}
+        self._fileobj.write(json.dumps(record, ensure_ascii=False))
+        self._fileobj.write('\n')
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+@contextlib.contextmanager
+def open_jsonl(filename):
+    with open_text(filename) as fileobj:
+        yield JsonLinesWriter(fileobj)
+
+
+OPENERS = {CSV: open_csv, XLSX: open_xlsx, PARQUET: open_parquet, SQLITE: open_sqlite, JSONL: open_jsonl}
+
+
+class ThreadedGzipReader(io.RawIOBase):
+    """
+    Reads a gzip-compressed file, while decompressing it in a background thread.
+    The decompressed chunks are passed through a bounded queue, so that decompression overlaps with parsing,
+    without decompressing the whole file into memory.
+    """
+    def __init__(self, fileobj, chunk_size=1 << 20, max_chunks=4):
+        super().__init__()
+        self._queue = queue.Queue(max_chunks)
+        self._stop = threading.Event()
+        self._buffer = b''
+        self._offset = 0
+        self._eof = False
+        self._thread = threading.Thread(target=self._decompress, args=(fileobj, chunk_size), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # Check regularly whether the reader has been closed, to not block forever on a full queue
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decompress(self, fileobj, chunk_size):
+        try:
+            with gzip.open(fileobj, 'rb') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not self._put(chunk) or not chunk:
+                        break
+        except Exception as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._buffer) and not self._eof:
+            chunk = self._queue.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                self._eof = True
+            self._buffer = chunk
+            self._offset = 0
+
+        n = min(len(b), len(self._buffer) - self._offset)
+        b[:n] = self._buffer[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        super().close()
+
+
+@contextlib.contextmanager
+def open_xml(filename):
+    """
+    Opens an XML file (that might be a member of an archive) for parsing.
+    Gzip-compressed files (.gz) are decompressed on the fly in a background thread.
+    """
+    with archives.open_file(filename) as f:
+        if filename.endswith('.gz'):
+            with ThreadedGzipReader(f) as gz:
+                yield gz
+        else:
+            yield f
+
+
+def parse_xml(filename):
+    """
+    Parses an XML file (that might be gzip-compressed) into a tree.
+    """
+    with open_xml(filename) as f:
+        return etree.parse(f)
+
+
+def iterparse_xml(filename, tag):
+    """
+    Iterates over the elements with the given tag in an XML file (that might be gzip-compressed).
+    The file is closed when the iteration has finished.
+    """
+    with open_xml(filename) as f:
+        yield from etree.iterparse(f, tag=tag)
+
+
 class CachedConfig:
     """
     Caches the parsed config to save time when doing the lookups.
@@ -0,0 +1,80 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from lxml import etree
+
+
+def intern(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interns the given values into integer codes.
+    :return: a tuple of the distinct values and the code for each value
+    """
+    if not values:
+        return np.array([], dtype=str), np.array([], dtype=int)
+    return np.unique(np.array(values, dtype=str), return_inverse=True)
+
+
+def contains_mask(values: Sequence[str], candidates: List[str]) -> np.ndarray:
+    """
+    Returns a mask of the values that are in the list of candidates.
+    This uses the same semantics as the XPath predicate contains(" {candidates} ", concat(" ", {value}, " ")),
+    but evaluates it only once per distinct value.
+    """
+    haystack = ' {} '.format(' '.join(candidates))
+    uniques, codes = intern(values)
+    found = np.fromiter((' {} '.format(u) in haystack for u in uniques), dtype=bool, count=len(uniques))
+    return found[codes]
+
+
+def regex_mask(values: Sequence[str], pattern: str) -> np.ndarray:
+    """
+    Returns a mask of the values that (case-insensitively) match the regular expression,
+    like the EXSLT predicate re:test(., pattern, "i"), but evaluates it only once per distinct value.
+    """
+    regex = re.compile(pattern, re.IGNORECASE)
+    uniques, codes = intern(values)
+    found = np.fromiter((regex.search(u) is not None for u in uniques), dtype=bool, count=len(uniques))
+    return found[codes]
+
+
+class VectorisedMatcher:
+    """
+    Matches words on their attributes by collecting these into arrays and evaluating the filters as masks,
+    as an alternative to XPath predicates.
+    """
+    def __init__(self, filters: List[Tuple[str, List[str]]], pattern: Optional[str] = None) -> None:
+        """
+        :param filters: tuples of an attribute and the values that are allowed for this attribute
+        :param pattern: a regular expression the text of the word should match
+        """
+        self.filters = filters
+        self.pattern = pattern
+
+    def mask(self, words: List[etree._Element]) -> np.ndarray:
+        """
+        Returns a mask of the words that pass all filters.
+        """
+        mask = np.ones(len(words), dtype=bool)
+        for attribute, candidates in self.filters:
+            mask &= contains_mask([w.get(attribute, '') for w in words], candidates)
+        if self.pattern:
+            mask &= regex_mask([''.join(w.itertext()) for w in words], self.pattern)
+        return mask
+
+    def find(self, sentences: List[Tuple[etree._Element, List[etree._Element]]]) \
+            -> List[Tuple[etree._Element, List[etree._Element]]]:
+        """
+        Finds the matching words in the given sentences in one go.
+        :param sentences: tuples of each sentence and its words
+        :return: tuples of each sentence and its matching words
+        """
+        words = [w for _, ws in sentences for w in ws]
+        mask = self.mask(words).tolist()
+
+        results = []
+        offset = 0
+        for s, ws in sentences:
+            results.append((s, [w for w, hit in zip(ws, mask[offset:offset + len(ws)]) if hit]))
+            offset += len(ws)
+        return results
@@ -1,3 +1,9 @@
+import mmap
+import os
+import re
+from xml.sax.saxutils import escape
+
+
 def get_original_language(element):
     """
     Returns the original language for a document.
@@ -21,3 +27,37 @@ def get_adjacent_line_number(segment_number, i):
     split = segment_number.split('s')
     adj = int(split[1]) + i
     return split[0] + 's' + str(adj)
+
+
+def attribute_literals(attribute, values):
+    """
+    Returns the literals (as bytes) for the given attribute and values, as these would appear in a UTF-8 encoded file.
+    """
+    result = []
+    for value in values:
+        escaped = escape(value)
+        result.append('{}="{}"'.format(attribute, escaped.replace('"', '&quot;')).encode('utf-8'))
+        result.append("{}='{}'".format(attribute, escaped.replace("'", '&apos;')).encode('utf-8'))
+    return result
+
+
+def contains_literals(filename, groups):
+    """
+    Checks whether the raw bytes of a file contain at least one of the literals of each group.
+    The file is memory-mapped, so that it is not read into memory as a whole.
+    :param filename: the file name
+    :param groups: a list of groups of literals (as bytes)
+    :return: whether the file contains at least one literal of each group
+    """
+    if not groups:
+        return True
+
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for group in groups:
+                regex = re.compile(b'|'.join(re.escape(literal) for literal in group))
+                if not regex.search(m):
+                    return False
+    return True
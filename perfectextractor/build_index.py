@@ -0,0 +1,29 @@
+import time
+
+import click
+
+from perfectextractor.apps.extractor.index import CorpusIndex, get_index_file
+from perfectextractor.extract import get_extractor_class, BASE, BNC, DPC, OPUS
+
+
+@click.command()
+@click.argument('folder')
+@click.argument('language')
+@click.option('--corpus', default=OPUS, type=click.Choice([OPUS, DPC, BNC]),
+              help='Which type of corpus to use')
+def build_index(folder, language, corpus):
+    """
+    Builds (or incrementally updates) the index over lemmata, part-of-speech tags and word forms
+    for each directory in the folder. Use the index during extraction with --use_index.
+    """
+    extractor = get_extractor_class(corpus, BASE)(language, [])
+    for directory in extractor.list_directories(folder):
+        t0 = time.time()
+        click.echo('Now indexing {} for {}'.format(directory, language))
+        with CorpusIndex(get_index_file(directory)) as index:
+            index.update(extractor, extractor.list_filenames(directory))
+        click.echo('Indexing finished, took {:.3} seconds'.format(time.time() - t0))
+
+
+if __name__ == "__main__":
+    build_index()
@@ -0,0 +1,50 @@
+import os
+import time
+
+import click
+
+from perfectextractor.apps.extractor.store import AlignmentStore, ColumnStore, TokenStore
+from perfectextractor.corpora.opus.base import find_xml
+from perfectextractor.corpora.opus.extractor import OPUSExtractor
+
+
+def convert_file(filename, convert):
+    """
+    Converts a file into a columnar store, unless an up-to-date store already exists.
+    """
+    if ColumnStore.exists(filename):
+        return
+    click.echo('Converting {}...'.format(filename))
+    convert(filename)
+
+
+@click.command()
+@click.argument('folder')
+@click.argument('language_from')
+@click.argument('languages_to', nargs=-1)  # nargs=-1 eats up all remaining arguments
+def build_store(folder, language_from, languages_to):
+    """
+    Converts the documents in the OPUS corpus in the folder (for the given languages), and the alignment files
+    between the source and target languages, into columnar stores. Use the stores during extraction with --use_store.
+    """
+    for language in (language_from,) + languages_to:
+        extractor = OPUSExtractor(language, [])
+        for directory in extractor.list_directories(folder):
+            t0 = time.time()
+            click.echo('Now converting {} for {}'.format(directory, language))
+            for filename in extractor.list_filenames(directory):
+                convert_file(filename, lambda f: TokenStore.convert(f, extractor.sentence_tag, extractor.word_tag))
+            click.echo('Converting finished, took {:.3} seconds'.format(time.time() - t0))
+
+    extractor = OPUSExtractor(language_from, list(languages_to))
+    for language_to in languages_to:
+        sl = extractor.languages_ordered(language_from, language_to)
+        alignment_file = find_xml(os.path.join(folder, '-'.join(sl) + '.xml'))
+        if alignment_file:
+            convert_file(alignment_file, AlignmentStore.convert)
+        else:
+            click.echo('No alignment file found for {} to {}'.format(language_from, language_to))
+
+
+if __name__ == "__main__":
+    build_store()
@@ -3,6 +3,7 @@ import os
 from lxml import etree
 
 from perfectextractor.apps.extractor.perfectextractor import PerfectExtractor
+from perfectextractor.apps.extractor.records import RowRecord
 
 from .extractor import BNCExtractor
 
@@ -15,44 +16,54 @@ class BNCPerfectExtractor(BNCExtractor, PerfectExtractor):
     def get_line_and_pp(self, tree, language_to, segment_number):
         raise NotImplementedError
 
-    def generate_header(self):
-        header = [
-            'document',
-            'genre',
-            'is-perfect',
-            'tense',
-            'words',
-            'lemma',
-            'is-question',
-            'text']
-        return header
-
-    def process_file(self, filename):
+    def get_columns(self):
+        # The tense is the type of the result
+        columns = [
+            ('document', 'document'),
+            ('genre', 'genre'),
+            ('is-perfect', 'is-perfect'),
+            ('type', 'tense'),
+            ('words', 'words'),
+            ('lemma', 'lemma'),
+            ('is-question', 'is-question'),
+            ('text', 'text')]
+        return columns
+
+    def can_split(self, filename):
+        # The genre is read from the header of the complete file
+        return False
+
+    def stream_records(self, filename, loaded=None):
         """
-        Processes a single file.
+        Streams the results of a single file. The file is always parsed here, so any trees loaded beforehand are ignored.
         """
-        results = []
-
         # Retrieve the genre
         tree = etree.parse(filename)
         genre = self.get_genre(tree)
 
         # if not genre.startswith('S'):  # Only spoken genre for the moment
-        #    return results
+        #    return
 
         # Parse the current tree (create a iterator over 's' elements)
         s_trees = etree.iterparse(filename, tag='s')
 
-        # Find potential Perfects
+        # Find potential Perfects (per sentence, for all tenses at once)
         for _, s in s_trees:
             sentence = self.get_sentence_words(s)
             is_question = self.is_question(sentence)
 
-            for e in s.xpath(self.config.get(self.l_from, 'xpath')):
-                pp = self.check_perfect(e, self.l_from)
+            auxiliaries = []
+            for e, tense in self.find_auxiliaries(s, self.l_from):
+                # skip auxiliaries that already formed a perfect in another tense
+                if e in auxiliaries:
+                    continue
+
+                pp = self.check_perfect(e, self.l_from, tense=tense)
 
                 # If this is really a Perfect, add it to the result
                 if pp:
+                    auxiliaries.append(e)
+
                     result = list()
                     result.append(os.path.basename(filename))
                     result.append(genre)
@@ -62,7 +73,7 @@ class BNCPerfectExtractor(BNCExtractor, PerfectExtractor):
                     result.append(pp.perfect_lemma())
                     result.append('1' if is_question else '0')
                     result.append(sentence)
-                    results.append(result)
+                    yield RowRecord(self, self.project(result))
 
                     # If we want (only) one classification per sentence, break the for loop here.
                     if self.one_per_sentence:
@@ -81,9 +92,7 @@ class BNCPerfectExtractor(BNCExtractor, PerfectExtractor):
                     result.append('')
                     result.append('1' if is_question else '0')
                     result.append(sentence)
-                    results.append(result)
-
-        return results
+                    yield RowRecord(self, self.project(result))
 
     def is_question(self, sentence):
         """
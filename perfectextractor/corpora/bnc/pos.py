@@ -8,23 +8,14 @@ class BNCPoSExtractor(BNCExtractor, PoSExtractor):
         """
         Processes a single file.
         """
-        results = []
-
-        # Prepare the search predicates
-        xpath, ns = self.prepare_xpath()
-
-        for _, s in s_trees:
-            for w in s.xpath(xpath, namespaces=ns):
+        for s, found in self.find_words(s_trees):
+            for w in found:
                 words = self.preprocess_found(w)
 
                 if not words:
                     continue
 
-                result = self.generate_result_line(filename, s, self.words2mwe(words, s))
-                result.extend(self.generate_translations(alignment_trees, translation_trees, s))
-                results.append(result)
-
-        return results
+                yield self.create_record(filename, s, self.words2mwe(words, s), alignment_trees, translation_trees)
 
     def generate_translations(self, alignment_trees, translation_trees, sentence):
         return [''] * 2
@@ -43,6 +43,16 @@ class DPCExtractor(BaseDPC, BaseExtractor):
             s.append(w.text.strip() if w.text else ' ')
         return ' '.join(s)
 
+    def get_aligned_files(self, filename):
+        document = filename.split(self.l_from + '-tei.xml')[0]
+        aligned_files = []
+        for language_to in self.l_to:
+            not_nl = language_to if language_to != NL else self.l_from
+            for aligned_file in [document + language_to + '-tei.xml', document + NL + '-' + not_nl + '-tei.xml']:
+                if os.path.isfile(aligned_file):
+                    aligned_files.append(aligned_file)
+        return aligned_files
+
     def parse_alignment_trees(self, filename):
         document = filename.split(self.l_from + '-tei.xml')[0]
         translation_trees = dict()
@@ -110,6 +120,9 @@ class DPCExtractor(BaseDPC, BaseExtractor):
 
         return set(result), alignment_type
 
+    def get_words(self, sentence):
+        return sentence.xpath('.//ns:w', namespaces=TEI_NS)
+
     def get_sentence(self, element):
         return element.xpath('ancestor::ns:s', namespaces=TEI_NS)[0]
 
@@ -27,8 +27,8 @@ class DPCPerfectExtractor(DPCExtractor, PerfectExtractor):
             sentence = s.getprevious().text
 
             if self.search_in_to:
-                for e in s.xpath(self.config.get(language_to, 'xpath'), namespaces=TEI_NS):
-                    pp = self.check_perfect(e, language_to)
+                for e, tense in self.find_auxiliaries(s, language_to, namespaces=TEI_NS):
+                    pp = self.check_perfect(e, language_to, tense=tense)
                     if pp:
                         sentence = pp.mark_sentence()
                         break
@@ -46,17 +46,22 @@ class DPCPerfectExtractor(DPCExtractor, PerfectExtractor):
         """
         Processes a single file.
         """
-        results = []
-
         document = filename.split(self.l_from + '-tei.xml')[0]
 
-        # Find potential Perfects
+        # Find potential Perfects (per sentence, for all tenses at once)
         for _, s in s_trees:
-            for e in s.xpath(self.config.get(self.l_from, 'xpath'), namespaces=TEI_NS):
-                pp = self.check_perfect(e, self.l_from)
+            auxiliaries = []
+            for e, tense in self.find_auxiliaries(s, self.l_from, namespaces=TEI_NS):
+                # skip auxiliaries that already formed a perfect in another tense
+                if e in auxiliaries:
+                    continue
+
+                pp = self.check_perfect(e, self.l_from, tense=tense)
 
                 # If this is really a Perfect, add it to the result
                 if pp:
+                    auxiliaries.append(e)
+
                     result = list()
                     result.append(document[:-1])
                     result.append(self.get_original_language(document))
@@ -82,6 +87,4 @@ class DPCPerfectExtractor(DPCExtractor, PerfectExtractor):
                             # If no translation is available, add empty columns
                             result.extend([''] * 4)
 
-                    results.append(result)
-
-        return results
+                    yield result
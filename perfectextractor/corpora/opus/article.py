@@ -1,34 +1,24 @@
-from .pos import OPUSPoSExtractor
+import os
 
+from .pattern import OPUSPatternExtractor
 
-class OPUSFrenchArticleExtractor(OPUSPoSExtractor):
+
+class OPUSFrenchArticleExtractor(OPUSPatternExtractor):
     def __init__(self, language_from, languages_to):
         """
-        Initializes the OPUSFrenchArticleExtractor with a set of part-of-speeches and lemmata that the found
-        words should adhere to. Also initializes a list of particles that could appear before a determiner.
-        :param language_from: The language to find the specified part-of-speeches in.
+        Initializes the OPUSFrenchArticleExtractor, so that it finds the articles that may be preceded by a particle.
+        The pattern for this construction is defined in article.cfg.
+        Also initializes the list of particles that could appear before a determiner.
+        :param language_from: The language to find the articles in.
         :param languages_to: The languages to extract the aligned sentences from.
         """
-        super().__init__(language_from, languages_to, pos=['DET:ART', 'PRP:det'])
+        super().__init__(language_from, languages_to, construction='article')
 
-        self.lemmata_list = ['le', 'un', 'du']
         self.particles = ['de', 'du']
 
-    def preprocess_found(self, word):
-        """
-        Removes a word if does not occur in the lemmata list, and then checks if it might be preceded by a particle.
-        If so, add the particle to the found words.
-        """
-        result = []
-
-        for w in super().preprocess_found(word):
-            prev = w.getprevious()
-            if prev is not None and self.get_lemma(prev) in self.particles:
-                result.append(prev)
-
-            result.append(word)
-
-        return result
+    def get_config(self):
+        article_config = os.path.join(os.path.dirname(__file__), 'article.cfg')
+        return super().get_config() + [article_config]
 
     def get_type(self, sentence, mwe=None):
         """
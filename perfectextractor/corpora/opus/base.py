@@ -1,6 +1,9 @@
-import glob
 import os
 
+from perfectextractor.apps.extractor import archives
+from perfectextractor.apps.extractor.discovery import scan_files
+from perfectextractor.apps.extractor.store import STORE_SUFFIX
+
 BASE_CONFIG = os.path.join(os.path.dirname(__file__), 'base.cfg')
 
 
@@ -9,4 +12,34 @@ class BaseOPUS(object):
         return BASE_CONFIG
 
     def list_filenames(self, dir_name):
-        return sorted(glob.glob(os.path.join(dir_name, '*.xml')))
+        return list(self.iter_filenames(dir_name))
+
+    def iter_filenames(self, dir_name):
+        """
+        Lazily yields the (potentially gzip-compressed) XML files in a directory and its subdirectories,
+        as e.g. OpenSubtitles uses nested year/movie folders.
+        If both a plain and a compressed version of a file exist, the plain version is used.
+        """
+        plain_files = set()
+        for entry in scan_files(dir_name, ['*.xml', '*.xml.gz'], exclude=['*' + STORE_SUFFIX]):
+            # The plain version of a file is listed before the compressed version (though not necessarily right before)
+            if entry.path.endswith('.gz'):
+                if entry.path[:-3] in plain_files:
+                    continue
+            else:
+                plain_files.add(entry.path)
+            yield entry.path
+
+
+def find_xml(filename):
+    """
+    Finds an XML file, either in plain or in gzip-compressed form (OPUS uses .gz natively).
+    :param filename: the file name, with or without the .gz extension
+    :return: the existing file, or None if neither form exists
+    """
+    if filename.endswith('.gz'):
+        filename = filename[:-3]
+    for f in (filename, filename + '.gz'):
+        if archives.isfile(f):
+            return f
+    return None
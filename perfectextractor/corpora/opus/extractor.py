@@ -7,8 +7,9 @@ from lxml import etree
 
 from perfectextractor.apps.extractor.base import BaseExtractor
 from perfectextractor.apps.extractor.models import Alignment, MARKUP
-from perfectextractor.apps.extractor.utils import XML
-from .base import BaseOPUS
+from perfectextractor.apps.extractor.store import AlignmentStore, TokenStore
+from perfectextractor.apps.extractor.utils import XML, parse_xml
+from .base import BaseOPUS, find_xml
 
 
 class OPUSExtractor(BaseOPUS, BaseExtractor):
@@ -19,15 +20,11 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
         :param s_trees: The XML trees for all 's' elements in the file
         :param alignment_trees: The alignment XML trees, per target language
         :param translation_trees: The translation XML trees, per target language
-        :return: All results in a list
+        :return: A generator over the results
         """
-        results = list()
         # Loop over all sentences
         for _, s in s_trees:
-            result = self.generate_result_line(filename, s)
-            result.extend(self.generate_translations(alignment_trees, translation_trees, s))
-            results.append(result)
-        return results
+            yield self.create_record(filename, s, None, alignment_trees, translation_trees)
 
     def generate_translations(self, alignment_trees, translation_trees, sentence):
         result = []
@@ -89,6 +86,8 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
         return siblings
 
     def _segment_by_id(self, tree, id):
+        if isinstance(tree, TokenStore):
+            return tree.get_sentence_by_id(id)
         if tree not in self._index:
             self._index[tree] = dict()
             for segment in tree.xpath('//s'):
@@ -146,28 +145,87 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
 
         return from_lines, to_lines, alignment_str
 
-    def parse_alignment_trees(self, filename, include_translations=True):
-        data_folder = os.path.dirname(os.path.dirname(filename))
+    def split_document_path(self, filename):
+        """
+        Splits the path of a document into the data folder (that contains the language folders and alignment files)
+        and the path of the document as used in the alignment files, e.g. en/1999/123/456.xml.
+        The language folder is the nearest folder that is named after the source language,
+        as documents can be nested within the language folder (e.g. in OpenSubtitles).
+        """
+        if filename.endswith('.gz'):
+            filename = filename[:-3]
 
-        # Cache the alignment XMLs on the first run
+        folder = os.path.dirname(filename)
+        while folder and os.path.basename(folder) != self.l_from and os.path.dirname(folder) != folder:
+            folder = os.path.dirname(folder)
+        if os.path.basename(folder) != self.l_from:
+            folder = os.path.dirname(filename)
+
+        relative_path = os.path.relpath(filename, folder).replace(os.sep, '/')
+        return os.path.dirname(folder), '{}/{}'.format(self.l_from, relative_path)
+
+    def find_alignment_file(self, data_folder, language_to):
+        sl = self.languages_ordered(self.l_from, language_to)
+        return find_xml(os.path.join(data_folder, '-'.join(sl) + '.xml'))
+
+    def cache_alignment_xmls(self, filename, data_folder, include_translations=True):
+        """
+        Caches the alignment XMLs (or their columnar stores) on the first run.
+        """
         if not self.alignment_xmls:
             for language_to in self.l_to:
-                sl = self.languages_ordered(self.l_from, language_to)
-                alignment_file = os.path.join(data_folder, '-'.join(sl) + '.xml')
-                if os.path.isfile(alignment_file):
-                    alignment_tree = etree.parse(alignment_file)
+                alignment_file = self.find_alignment_file(data_folder, language_to)
+                if self.store_enabled() and alignment_file and AlignmentStore.exists(alignment_file):
+                    self.alignment_xmls[language_to] = AlignmentStore(alignment_file)
+                elif alignment_file:
+                    alignment_tree = parse_xml(alignment_file)
                     self.alignment_xmls[language_to] = alignment_tree
                 elif include_translations:
                     click.echo('No alignment file found for {} to {}'.format(filename, language_to))
 
+    def find_translation_links(self, alignment_tree, language_to, doc):
+        """
+        Finds the documents the given document is aligned with in an alignment XML (or its columnar store).
+        """
+        sl = self.languages_ordered(self.l_from, language_to)
+        docs = [doc, doc + '.gz']  # OPUS uses .gz natively, deal with both options
+        if isinstance(alignment_tree, AlignmentStore):
+            from_attr, to_attr = ('fromDoc', 'toDoc') if sl[0] == self.l_from else ('toDoc', 'fromDoc')
+            positions = alignment_tree.find_groups(from_attr, docs)
+            return [alignment_tree.get_doc(position, to_attr) for position in positions]
+
+        path = '@fromDoc="{}"' if sl[0] == self.l_from else '@toDoc="{}"'
+        linkGrps = alignment_tree.xpath('//linkGrp[{} or {}]'.format(path.format(docs[0]), path.format(docs[1])))
+        return [linkGrp.get('toDoc') if sl[0] == self.l_from else linkGrp.get('fromDoc') for linkGrp in linkGrps]
+
+    def get_aligned_files(self, filename):
+        data_folder, doc = self.split_document_path(filename)
+        self.cache_alignment_xmls(filename, data_folder, include_translations=False)
+
+        aligned_files = []
+        for language_to, alignment_tree in self.alignment_xmls.items():
+            aligned_files.append(self.find_alignment_file(data_folder, language_to))
+            for translation_link in self.find_translation_links(alignment_tree, language_to, doc):
+                translation_file = find_xml(os.path.join(data_folder, translation_link))
+                if translation_file:
+                    aligned_files.append(translation_file)
+        return aligned_files
+
+    def parse_alignment_trees(self, filename, include_translations=True):
+        data_folder, doc = self.split_document_path(filename)
+        self.cache_alignment_xmls(filename, data_folder, include_translations)
+
         alignment_trees = dict()
         translation_trees = dict()
         for language_to in self.alignment_xmls.keys():
             sl = self.languages_ordered(self.l_from, language_to)
             alignment_tree = self.alignment_xmls[language_to]
-            base_filename = os.path.basename(filename)
-            doc = '{}/{}'.format(self.l_from, base_filename)
             doc_gz = doc + '.gz'  # OPUS uses .gz natively, deal with both options
+            if isinstance(alignment_tree, AlignmentStore):
+                self.parse_alignment_store(alignment_tree, language_to, data_folder, [doc, doc_gz],
+                                           alignment_trees, translation_trees, include_translations)
+                continue
+
             path = '@fromDoc="{}"' if sl[0] == self.l_from else '@toDoc="{}"'
             linkGrps = alignment_tree.xpath('//linkGrp[{} or {}]'.format(path.format(doc), path.format(doc_gz)))
 
@@ -179,10 +237,7 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
 
                 if include_translations:
                     translation_link = linkGrp.get('toDoc') if sl[0] == self.l_from else linkGrp.get('fromDoc')
-                    if translation_link.endswith('.gz'):   # See comment above: OPUS uses .gz as extension
-                        translation_link = translation_link[:-3]
-                    translation_file = os.path.join(data_folder, translation_link)
-                    translation_trees[language_to] = etree.parse(translation_file)
+                    self.add_translation(translation_trees, language_to, data_folder, translation_link)
 
                 alignments = []
                 for link in linkGrp.xpath('./link'):
@@ -198,6 +253,47 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
 
         return alignment_trees, translation_trees
 
+    def parse_alignment_store(self, alignment_store, language_to, data_folder, docs,
+                              alignment_trees, translation_trees, include_translations):
+        """
+        Retrieves the alignments (and translation) for a file from the columnar store of the alignment file.
+        """
+        sl = self.languages_ordered(self.l_from, language_to)
+        from_attr, to_attr = ('fromDoc', 'toDoc') if sl[0] == self.l_from else ('toDoc', 'fromDoc')
+        positions = alignment_store.find_groups(from_attr, docs)
+
+        if len(positions) == 0:
+            if include_translations:
+                click.echo('No translation found for {} to {}'.format(docs[0], language_to))
+        elif len(positions) == 1:
+            position = positions[0]
+
+            if include_translations:
+                translation_link = alignment_store.get_doc(position, to_attr)
+                self.add_translation(translation_trees, language_to, data_folder, translation_link)
+
+            alignment_trees[language_to] = alignment_store.get_alignments(position)
+        else:
+            click.echo('Multiple translations found for {} to {}'.format(docs[0], language_to))
+
+    def add_translation(self, translation_trees, language_to, data_folder, translation_link):
+        """
+        Adds the translation tree for the translated document, which can be either plain or gzip-compressed.
+        """
+        translation_file = find_xml(os.path.join(data_folder, translation_link))
+        if translation_file:
+            translation_trees[language_to] = self.parse_translation(translation_file)
+        else:
+            click.echo('Translation file {} not found'.format(translation_link))
+
+    def parse_translation(self, translation_file):
+        """
+        Parses a translation file, or opens its columnar store (if available).
+        """
+        if self.store_enabled() and TokenStore.exists(translation_file):
+            return TokenStore(translation_file, self.config.get('all', 'id'))
+        return parse_xml(translation_file)
+
     def average_alignment_certainty(self, alignment_trees):
         certainties_sum = 0
         certainties_len = 0
@@ -221,7 +317,7 @@ class OPUSExtractor(BaseOPUS, BaseExtractor):
     def filter_by_file_size(self, file_names):
         results = []
         for file_name in file_names:
-            file_size = etree.parse(file_name).xpath('count(//s)')
+            file_size = parse_xml(file_name).xpath('count(//s)')
             if self.min_file_size <= file_size <= self.max_file_size:
                 results.append(file_name)
 
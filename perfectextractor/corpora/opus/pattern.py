@@ -0,0 +1,31 @@
+import os
+
+from perfectextractor.apps.extractor.patternextractor import PatternExtractor
+
+from .extractor import OPUSExtractor
+
+PATTERNS_CONFIG = os.path.join(os.path.dirname(__file__), 'patterns.cfg')
+
+
+class OPUSPatternExtractor(OPUSExtractor, PatternExtractor):
+    def get_config(self):
+        return [super().get_config(), PATTERNS_CONFIG]
+
+    def fetch_results(self, filename, s_trees, alignment_trees, translation_trees):
+        """
+        Processes a single file.
+        """
+        # Find the constructions (per sentence)
+        for _, s in s_trees:
+            for mwe in self.find_constructions(s, self.l_from):
+                # apply position filter
+                if self.position and not mwe.words[0].xml_id.endswith('.' + str(self.position)):
+                    continue
+
+                yield self.create_record(filename, s, mwe, alignment_trees, translation_trees)
+
+    def get_type(self, sentence, mwe=None):
+        """
+        Return the type for the found construction. A sensible default is the name of the construction.
+        """
+        return self.construction
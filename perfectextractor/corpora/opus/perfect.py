@@ -2,7 +2,7 @@ import os
 
 from lxml import etree
 
-from perfectextractor.apps.extractor.perfectextractor import PerfectExtractor, PRESENT
+from perfectextractor.apps.extractor.perfectextractor import PerfectExtractor
 from perfectextractor.apps.extractor.xml_utils import get_sentence_from_element
 
 from .extractor import OPUSExtractor
@@ -28,8 +28,8 @@ class OPUSPerfectExtractor(OPUSExtractor, PerfectExtractor):
             sentence = get_sentence_from_element(first_w)
 
             if self.search_in_to:
-                for e in s.xpath(self.config.get(language_to, 'xpath')):
-                    pp = self.check_perfect(e, language_to)
+                for e, tense in self.find_auxiliaries(s, language_to):
+                    pp = self.check_perfect(e, language_to, tense=tense)
                     if pp:
                         sentence = pp.mark_sentence()
                         break
@@ -40,17 +40,15 @@ class OPUSPerfectExtractor(OPUSExtractor, PerfectExtractor):
         """
         Processes a single file.
         """
-        results = []
-        # Find potential present/past perfects (per sentence)
+        # Find potential present/past perfects (per sentence, for all tenses at once)
         for _, s in s_trees:
-            # Retrieves the xpath expression for the auxiliary in the given tense or a fallback
-            xpath_fallback = 'xpath'
-            xpath = xpath_fallback + ('_{}'.format(self.tense) if self.tense != PRESENT else '')
-            l_config = self.config[self.l_from]
-            aux_xpath = l_config.get(xpath, l_config.get(xpath_fallback))
+            auxiliaries = []
+            for e, tense in self.find_auxiliaries(s, self.l_from):
+                # skip auxiliaries that already formed a perfect in another tense
+                if e in auxiliaries:
+                    continue
 
-            for e in s.xpath(aux_xpath):
-                pp = self.check_perfect(e, self.l_from)
+                pp = self.check_perfect(e, self.l_from, tense=tense)
 
                 # apply position filter
                 if self.position and not e.get('id').endswith('.' + str(self.position)):
@@ -58,29 +56,27 @@ class OPUSPerfectExtractor(OPUSExtractor, PerfectExtractor):
 
                 # If this is really a present/past perfect, add it to the result
                 if pp:
-                    result = self.generate_result_line(filename, s, mwe=pp)
-                    result.extend(self.generate_translations(alignment_trees, translation_trees, s))
-                    results.append(result)
+                    auxiliaries.append(e)
+
+                    yield self.create_record(filename, s, pp, alignment_trees, translation_trees)
 
                     # If we want (only) one classification per sentence, break the for loop here.
                     if self.one_per_sentence:
                         break
-            else:
-                # If we want one classification per sentence, add the sentence with a classification here.
-                if self.one_per_sentence:
-                    tense, tenses = self.get_tenses(s)
-
-                    result = list()
-                    result.append(os.path.basename(filename))
-                    result.append(s.get('id'))
-                    result.append(tense)
-                    result.append(','.join(tenses))
-                    result.append('')
-                    result.append(self.mark_sentence(s))
-                    self.append_metadata(s, result)
-                    results.append(result)
-
-        return results
+
+            # If we want one classification per sentence, add the sentence with a classification here.
+            if self.one_per_sentence and not auxiliaries:
+                tense, tenses = self.get_tenses(s)
+
+                result = list()
+                result.append(os.path.basename(filename))
+                result.append(s.get('id'))
+                result.append(tense)
+                result.append(','.join(tenses))
+                result.append('')
+                result.append(self.mark_sentence(s))
+                self.append_metadata(s, result)
+                yield result
 
     def get_type(self, sentence, mwe=None):
         return mwe.perfect_type()
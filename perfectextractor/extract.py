@@ -9,12 +9,17 @@ from perfectextractor.corpora.dpc.extractor import DPCExtractor
 from perfectextractor.corpora.dpc.perfect import DPCPerfectExtractor
 from perfectextractor.corpora.dpc.pos import DPCPoSExtractor
 from perfectextractor.corpora.opus.extractor import OPUSExtractor
+from perfectextractor.corpora.opus.pattern import OPUSPatternExtractor
 from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
 from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
 from perfectextractor.corpora.opus.recentpast import OPUSRecentPastExtractor
 from perfectextractor.corpora.opus.since import OPUSSinceDurationExtractor
-from perfectextractor.apps.extractor.utils import TXT, XML, CSV, XLSX
+from perfectextractor.apps.extractor.base import COLUMNS
+from perfectextractor.apps.extractor.cache import CACHE_SIZE
+from perfectextractor.apps.extractor.parts import SPLIT_SIZE
+from perfectextractor.apps.extractor.utils import TXT, XML, CSV, XLSX, PARQUET, SQLITE, JSONL, GZIP, ZSTD
 from perfectextractor.apps.extractor.perfectextractor import PRESENT, PAST
+from perfectextractor.apps.extractor.posextractor import XPATH, VECTORISED
 
 # Corpora
 BNC = 'bnc'
@@ -27,6 +32,7 @@ POS = 'pos'
 PERFECT = 'perfect'
 RECENT_PAST = 'recent_past'
 SINCE_DURATION = 'since_duration'
+PATTERN = 'pattern'
 
 
 def process_data_folders(extractor, path):
@@ -37,14 +43,63 @@ def process_data_folders(extractor, path):
         click.echo('Processing finished, took {:.3} seconds'.format(time.time() - t0))
 
 
+def get_extractor_class(corpus, extractor):
+    """
+    Determines the extractor class to be used for the given corpus and extractor type.
+    """
+    # TODO: add more varieties
+    resulting_extractor = None
+    if corpus == OPUS:
+        if extractor == POS:
+            resulting_extractor = OPUSPoSExtractor
+        elif extractor == PERFECT:
+            resulting_extractor = OPUSPerfectExtractor
+        elif extractor == RECENT_PAST:
+            resulting_extractor = OPUSRecentPastExtractor
+        elif extractor == SINCE_DURATION:
+            resulting_extractor = OPUSSinceDurationExtractor
+        elif extractor == PATTERN:
+            resulting_extractor = OPUSPatternExtractor
+        else:
+            resulting_extractor = OPUSExtractor
+    elif corpus == DPC:
+        if extractor == POS:
+            resulting_extractor = DPCPoSExtractor
+        elif extractor == PERFECT:
+            resulting_extractor = DPCPerfectExtractor
+        elif extractor == RECENT_PAST:
+            raise click.ClickException('Corpus or extractor type not implemented!')
+        elif extractor in [SINCE_DURATION, PATTERN]:
+            raise click.ClickException('Corpus or extractor type not implemented!')
+        else:
+            resulting_extractor = DPCExtractor
+    elif corpus == BNC:
+        if extractor == POS:
+            resulting_extractor = BNCPoSExtractor
+        elif extractor == PERFECT:
+            resulting_extractor = BNCPerfectExtractor
+        elif extractor == RECENT_PAST:
+            raise click.ClickException('Corpus or extractor type not implemented!')
+        elif extractor in [SINCE_DURATION, PATTERN]:
+            raise click.ClickException('Corpus or extractor type not implemented!')
+        else:
+            resulting_extractor = BNCExtractor
+
+    if not resulting_extractor:
+        raise click.ClickException('Unknown value for either corpus or extractor type')
+
+    return resulting_extractor
+
+
 @click.command()
 @click.argument('folder')
 @click.argument('language_from')
 @click.argument('languages_to', nargs=-1)  # nargs=-1 eats up all remaining arguments
 @click.option('--corpus', default=OPUS, type=click.Choice([OPUS, DPC, BNC]),
               help='Which type of corpus to use')
-@click.option('--extractor', default=BASE, type=click.Choice([BASE, POS, PERFECT, RECENT_PAST, SINCE_DURATION]),
-              help='Which kind of extractor to use')
+@click.option('--extractor', 'extractors', default=[BASE], multiple=True,
+              type=click.Choice([BASE, POS, PERFECT, RECENT_PAST, SINCE_DURATION, PATTERN]),
+              help='Which kind of extractor to use (repeat to combine extractors in a single pass)')
 @click.option('--file_names', '-f', multiple=True,
               help='Limits the file names searched into')
 @click.option('--sentence_ids', '-s', multiple=True,
@@ -55,97 +110,118 @@ def process_data_folders(extractor, path):
               help='Use regular expression to match words')
 @click.option('--pos', '-p', multiple=True,
               help='Limits the POS-tags searched for')
+@click.option('--engine', default=XPATH, type=click.Choice([XPATH, VECTORISED]),
+              help='Match the words searched for using XPath predicates or vectorised masks')
 @click.option('--tokens', '-t', multiple=True, type=click.Tuple([str, str]),
               help='Limits the tokens searched for. Format: -t [start_token] [end_token]')
 @click.option('--metadata', '-m', multiple=True, type=click.Tuple([str, str]),
               help='Adds additional metadata. Format: -m [tag] [level]')
+@click.option('--construction',
+              help='The construction to search for with the pattern extractor (as defined in patterns.cfg)')
 @click.option('--outfile', '-o',
               help='Output file')
 @click.option('--position', default=0,
               help='The position of the searched item')
 @click.option('--search_in_to', is_flag=True,
               help='Also search for perfects in the to language(s)?')
-@click.option('--tense', default=PRESENT, type=click.Choice([PRESENT, PAST]),
-              help='The tense of perfect (present, past, future)')
+@click.option('--tense', default=[PRESENT], multiple=True, type=click.Choice([PRESENT, PAST]),
+              help='The tense of perfect (present, past, future), repeat to search for multiple tenses in a single pass')
 @click.option('--output', default=TXT, type=click.Choice([TXT, XML]),
               help='Output results in text or XML format')
-@click.option('--format', 'format_', default=CSV, type=click.Choice([CSV, XLSX]),
-              help='Output file in .csv or .xlsx format')
+@click.option('--format', 'format_', default=CSV, type=click.Choice([CSV, XLSX, PARQUET, SQLITE, JSONL]),
+              help='Output file in .csv, .xlsx, .parquet, .sqlite or .jsonl (JSON Lines) format')
+@click.option('--compression', type=click.Choice([GZIP, ZSTD]),
+              help='Compress the output file (CSV and JSON Lines only), '
+                   'also inferred from an outfile ending in .gz or .zst')
+@click.option('--columns', '-c', multiple=True,
+              help='Limits the output to these columns: {} (the others are not computed)'.format(', '.join(COLUMNS)))
+@click.option('--count_only', is_flag=True,
+              help='Only output the number of results per file, type, construction and lemma')
+@click.option('--sample', default=0,
+              help='Only output a random sample of this number of results (per extractor)')
+@click.option('--seed', type=int,
+              help='The seed for drawing the random sample, to draw the same sample again')
 @click.option('--one_per_sentence', is_flag=True,
               help='Output all sentences, and only one classification per sentence')
 @click.option('--sort_by_certainty', is_flag=True,
               help='Sort by certainty?')
 @click.option('--no_order_languages', is_flag=True,
               help='Do not order the languages alphabetically on alignment')
+@click.option('--prefilter', is_flag=True,
+              help='Skip files that cannot contain a match, based on a search in their raw bytes')
+@click.option('--use_index', is_flag=True,
+              help='Only search in the candidate files and sentences from the index (see build_index.py)')
+@click.option('--use_store', is_flag=True,
+              help='Read the files from their columnar stores instead of parsing XML (see build_store.py)')
+@click.option('--prefetch', default=0,
+              help='Load this number of files (and their translations) in the background while processing')
+@click.option('--workers', default=0,
+              help='Search in the parts of large files with this number of processes in parallel')
+@click.option('--split_size', default=SPLIT_SIZE,
+              help='Split files larger than this size (in bytes) into parts of about this size')
+@click.option('--resume', is_flag=True,
+              help='Resume an interrupted run from its checkpoints, skipping the completed files '
+                   '(uncompressed CSV output only)')
+@click.option('--cache_dir',
+              help='Cache the results per file in this directory, and take unchanged files from the cache')
+@click.option('--cache_size', default=CACHE_SIZE,
+              help='The maximum size (in bytes) of the cache')
 @click.option('--file_limit', default=0,
               help='Limit number of files searched')
 @click.option('--min_file_size', default=0,
               help='Limits the minimal size of the files searched')
 @click.option('--max_file_size', default=0,
               help='Limits the maximal size of the files searched')
-def extract(folder, language_from, languages_to, corpus='opus', extractor='base',
-            pos=None, search_in_to=False, tense=PRESENT,
-            output=TXT, format_=CSV, file_names=None, sentence_ids=None,
+def extract(folder, language_from, languages_to, corpus='opus', extractors=(BASE,),
+            pos=None, engine=XPATH, construction=None, search_in_to=False, tense=(PRESENT,),
+            output=TXT, format_=CSV, compression=None, file_names=None, sentence_ids=None,
             lemmata=None, regex=None, position=None, tokens=None, metadata=None,
             outfile=None, one_per_sentence=False, sort_by_certainty=False,
-            no_order_languages=False,
+            no_order_languages=False, prefilter=False, use_index=False, use_store=False, prefetch=0,
+            workers=0, split_size=SPLIT_SIZE, resume=False,
+            cache_dir=None, cache_size=CACHE_SIZE, columns=None, count_only=False, sample=0, seed=None,
             file_limit=0, min_file_size=0, max_file_size=0):
     # Set the default arguments
     kwargs = dict(output=output, file_names=file_names, sentence_ids=sentence_ids,
                   lemmata=lemmata, regex=regex, position=position, tokens=tokens, metadata=metadata,
-                  outfile=outfile, format_=format_, one_per_sentence=one_per_sentence,
+                  outfile=outfile, format_=format_, compression=compression, one_per_sentence=one_per_sentence,
                   sort_by_certainty=sort_by_certainty, no_order_languages=no_order_languages,
-                  file_limit=file_limit, min_file_size=min_file_size, max_file_size=max_file_size)
+                  file_limit=file_limit, min_file_size=min_file_size, max_file_size=max_file_size,
+                  prefilter=prefilter, use_index=use_index, use_store=use_store, prefetch=prefetch,
+                  workers=workers, split_size=split_size, resume=resume,
+                  cache_dir=cache_dir, cache_size=cache_size, columns=columns,
+                  count_only=count_only, sample=sample, seed=seed)
+
+    # The results of combined extractors are tagged by their type, so each type can only be used once
+    if len(set(extractors)) != len(extractors):
+        raise click.BadParameter('Each extractor type can only be used once', param_hint='--extractor')
+
+    # Create the extractor(s) to be used
+    resulting_extractors = []
+    for extractor in extractors:
+        resulting_extractor = get_extractor_class(corpus, extractor)
+
+        extractor_kwargs = dict(kwargs)
+        if extractor == PERFECT:
+            extractor_kwargs['search_in_to'] = search_in_to
+            extractor_kwargs['tense'] = tense
 
-    # Determine the extractor to be used
-    # TODO: add more varieties
-    resulting_extractor = None
-    if corpus == OPUS:
-        if extractor == POS:
-            resulting_extractor = OPUSPoSExtractor
-        elif extractor == PERFECT:
-            resulting_extractor = OPUSPerfectExtractor
-        elif extractor == RECENT_PAST:
-            resulting_extractor = OPUSRecentPastExtractor
-        elif extractor == SINCE_DURATION:
-            resulting_extractor = OPUSSinceDurationExtractor
-        else:
-            resulting_extractor = OPUSExtractor
-    elif corpus == DPC:
-        if extractor == POS:
-            resulting_extractor = DPCPoSExtractor
-        elif extractor == PERFECT:
-            resulting_extractor = DPCPerfectExtractor
-        elif extractor == RECENT_PAST:
-            raise click.ClickException('Corpus or extractor type not implemented!')
-        elif extractor == SINCE_DURATION:
-            raise click.ClickException('Corpus or extractor type not implemented!')
-        else:
-            resulting_extractor = DPCExtractor
-    elif corpus == BNC:
         if extractor == POS:
-            resulting_extractor = BNCPoSExtractor
-        elif extractor == PERFECT:
-            resulting_extractor = BNCPerfectExtractor
-        elif extractor == RECENT_PAST:
-            raise click.ClickException('Corpus or extractor type not implemented!')
-        elif extractor == SINCE_DURATION:
-            raise click.ClickException('Corpus or extractor type not implemented!')
-        else:
-            resulting_extractor = BNCExtractor
+            extractor_kwargs['pos'] = pos
+            extractor_kwargs['engine'] = engine
 
-    if extractor == PERFECT:
-        kwargs['search_in_to'] = search_in_to
-        kwargs['tense'] = tense
+        if extractor == PATTERN:
+            extractor_kwargs['construction'] = construction
 
-    if extractor == POS:
-        kwargs['pos'] = pos
+        resulting_extractors.append(resulting_extractor(language_from, languages_to, **extractor_kwargs))
 
-    if not resulting_extractor:
-        raise click.ClickException('Unknown value for either corpus or extractor type')
+    # Combine the extractors: the first extractor determines the files and the output
+    main_extractor = resulting_extractors[0]
+    for other_extractor in resulting_extractors[1:]:
+        main_extractor.add_extractor(other_extractor)
 
     # Start the extraction!
-    process_data_folders(resulting_extractor(language_from, languages_to, **kwargs), folder)
+    process_data_folders(main_extractor, folder)
 
 
 if __name__ == "__main__":
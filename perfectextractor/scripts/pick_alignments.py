@@ -1,4 +1,7 @@
 import argparse
+import contextlib
+import os
+import re
 
 from lxml import etree
 
@@ -15,16 +18,88 @@ def remove_alignments(tree, search_string):
     return tree
 
 
+def get_doctype(docinfo):
+    """
+    Returns the doctype of a document, re-adding the empty system URL that lxml deletes during parsing.
+    """
+    if docinfo.public_id:
+        return '<!DOCTYPE {} PUBLIC "{}" "{}">'.format(docinfo.root_name, docinfo.public_id, docinfo.system_url or '')
+    return docinfo.doctype
+
+
+def partition_alignments(file_in, file_out, pattern):
+    """
+    Partitions an alignment file into shards in a single (streaming) pass.
+    Every linkGrp-tag is written to the shard that is keyed by the match of the pattern on its fromDoc attribute:
+    the first group of the pattern if it has one, the complete match otherwise.
+    linkGrp-tags that do not match the pattern are skipped.
+    :param file_in: the alignment file
+    :param file_out: the output file name, with a {} placeholder for the key (e.g. split/{}/en-nl.xml)
+    :param pattern: the (regular expression) pattern
+    :return: the file names of the shards, per key
+    """
+    regex = re.compile(pattern)
+    shards = dict()
+
+    with contextlib.ExitStack() as stack:
+        root = None
+        doctype = None
+        context = etree.iterparse(file_in, events=('start', 'end'))
+        for event, element in context:
+            if root is None:
+                # The first event is the start of the root element: retrieve the document information
+                root = element
+                docinfo = root.getroottree().docinfo
+                doctype = get_doctype(docinfo)
+                continue
+
+            if event != 'end' or element.tag != 'linkGrp':
+                continue
+
+            match = regex.search(element.get('fromDoc', ''))
+            if match:
+                key = match.group(1) if regex.groups else match.group(0)
+                if key not in shards:
+                    filename = file_out.format(key)
+                    if os.path.dirname(filename):
+                        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+                    # The shards are always written in UTF-8 (with a matching declaration): lxml only reports
+                    # the encoding of the input once parsing has finished, and decodes the input anyway
+                    xf = stack.enter_context(etree.xmlfile(filename, encoding='utf-8'))
+                    xf.write_declaration()
+                    if doctype:
+                        xf.write_doctype(doctype)
+                    stack.enter_context(xf.element(root.tag, root.attrib))
+                    xf.write('\n')
+                    shards[key] = (filename, xf)
+
+                shards[key][1].write(element, pretty_print=True)
+
+            # Free the memory of the processed linkGrp-tags
+            element.clear()
+            while element.getprevious() is not None:
+                del root[0]
+
+    return {key: filename for key, (filename, _) in shards.items()}
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('file_in', help='Input file')
-    parser.add_argument('file_out', help='Output file')
-    parser.add_argument('search_string', help='Search string')
+    parser.add_argument('file_out', help='Output file (with a {} placeholder for the key when partitioning)')
+    parser.add_argument('search_string',
+                        help='Search string (a regular expression when partitioning), '
+                             'preceded by -- if it starts with a dash (e.g. -- "-([0-9]+)-")')
+    parser.add_argument('--partition', action='store_true',
+                        help='Partition the input file into shards keyed by the search string in a single pass')
     args = parser.parse_args()
 
-    in_tree = etree.parse(args.file_in)
-    out_tree = remove_alignments(in_tree, args.search_string)
-    doctype = in_tree.docinfo.doctype.replace('>', ' "">')  # Re-add the space that lxml deletes during parsing.
-    out_tree.write(args.file_out, pretty_print=True, xml_declaration=True,
-                   encoding=in_tree.docinfo.encoding,
-                   doctype=doctype)
+    if args.partition:
+        partition_alignments(args.file_in, args.file_out, args.search_string)
+    else:
+        in_tree = etree.parse(args.file_in)
+        out_tree = remove_alignments(in_tree, args.search_string)
+        out_tree.write(args.file_out, pretty_print=True, xml_declaration=True,
+                       encoding=in_tree.docinfo.encoding,
+                       doctype=get_doctype(in_tree.docinfo))
@@ -3,6 +3,7 @@
 import os
 import unittest
 
+from perfectextractor.apps.extractor.perfectextractor import PRESENT, PAST
 from perfectextractor.corpora.bnc.perfect import BNCPerfectExtractor
 from perfectextractor.corpora.bnc.pos import BNCPoSExtractor
 
@@ -17,7 +18,7 @@ class TestBNCExtractor(unittest.TestCase):
         self.filename = os.path.join(DATA_FOLDER, 'ALP-formatted.xml')
 
     def merge_results(self, generator):
-        return sum(list(generator), [])
+        return [result for results in generator for result in results]
 
     def test_init(self):
         self.assertEqual(self.extractor.config.get(self.language, 'perfect_tags'), 'VBN|VDN|VHN|VVN')
@@ -36,6 +37,23 @@ class TestBNCExtractor(unittest.TestCase):
         self.assertEqual(results[3][VERBS_COLUMN], 'has been running')
         self.assertEqual(results[4][VERBS_COLUMN], 'has devoted')
 
+        # The results should be the same when generated for the folder
+        generated = [result for results in self.extractor.generate_results(DATA_FOLDER, [self.filename])
+                     for result in results]
+        self.assertEqual(generated, results)
+
+    def test_multiple_tenses(self):
+        past_results = BNCPerfectExtractor(self.language, tense=PAST).process_file(self.filename)
+        self.assertEqual(len(past_results), 94)
+        self.assertEqual(past_results[0][VERBS_COLUMN], 'had been appointed')
+        self.assertEqual(past_results[0][3], 'past perfect passive')
+
+        # Both tenses are found in a single pass
+        results = BNCPerfectExtractor(self.language, tense=[PRESENT, PAST]).process_file(self.filename)
+        self.assertEqual(len(results), 60 + 94)
+        self.assertEqual(results[0][VERBS_COLUMN], 'has been presented')
+        self.assertEqual(results[0][3], 'present perfect passive')
+
     def test_ppc(self):
         # Test whether a Perfect continuous is ignored when check_ppc is set to False
         # Only works on Python 3 for some reason...
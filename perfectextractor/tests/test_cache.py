@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from perfectextractor.apps.extractor.cache import ResultCache, fingerprint
+from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
+from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def merge_results(self, generator):
+        return [result for results in generator for result in results]
+
+    def test_cache(self):
+        folder = os.path.join(EUROPARL_DATA, 'en')
+        results = self.merge_results(OPUSPerfectExtractor('en', ['nl', 'fr']).generate_results(folder))
+
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir)
+        self.assertEqual(self.merge_results(extractor.generate_results(folder)), results)
+        self.assertEqual(len(ResultCache(self.cache_dir).entries()), 1)
+
+        # The results should now be taken from the cache, without searching the file
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir, prefetch=2)
+        with mock.patch.object(OPUSPerfectExtractor, 'search_records', side_effect=AssertionError):
+            self.assertEqual(self.merge_results(extractor.generate_results(folder)), results)
+
+        # Parameters that do not change the results should not change the key either
+        filename = os.path.join(folder, 'ep-00-12-15.xml')
+        key = OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir).cache_key(filename)
+        self.assertEqual(OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir,
+                                              prefilter=True, outfile='out.csv').cache_key(filename), key)
+        self.assertNotEqual(OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir,
+                                                 search_in_to=True).cache_key(filename), key)
+        self.assertNotEqual(OPUSPerfectExtractor('en', ['nl'], cache_dir=self.cache_dir).cache_key(filename), key)
+
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir)
+        extractor.aux_be_list['en'].append('extra')
+        self.assertNotEqual(extractor.cache_key(filename), key)
+
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], cache_dir=self.cache_dir)
+        extractor.add_extractor(OPUSPoSExtractor('en', ['nl', 'fr'], lemmata=['when']))
+        self.assertNotEqual(extractor.cache_key(filename), key)
+
+    def test_changed_translation(self):
+        # Copy the corpus, and change a translation
+        folder = tempfile.mkdtemp()
+        shutil.rmtree(folder)
+        shutil.copytree(EUROPARL_DATA, folder)
+
+        try:
+            filename = os.path.join(folder, 'en', 'ep-00-12-15.xml')
+            key = OPUSPerfectExtractor('en', ['nl'], cache_dir=self.cache_dir).cache_key(filename)
+            self.assertEqual(OPUSPerfectExtractor('en', ['nl'], cache_dir=self.cache_dir).cache_key(filename), key)
+
+            with open(os.path.join(folder, 'nl', 'ep-00-12-15.xml'), 'a') as f:
+                f.write('\n')
+            self.assertNotEqual(OPUSPerfectExtractor('en', ['nl'], cache_dir=self.cache_dir).cache_key(filename), key)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_renamed_document(self):
+        # A copy of a document under another name should not share its results (which hold the name)
+        folder = tempfile.mkdtemp()
+        try:
+            shutil.copy(os.path.join(EUROPARL_DATA, 'en', 'ep-00-12-15.xml'), os.path.join(folder, 'a.xml'))
+            shutil.copy(os.path.join(EUROPARL_DATA, 'en', 'ep-00-12-15.xml'), os.path.join(folder, 'b.xml'))
+            extractor = OPUSPerfectExtractor('en', [], cache_dir=self.cache_dir)
+            self.assertNotEqual(extractor.cache_key(os.path.join(folder, 'a.xml')),
+                                extractor.cache_key(os.path.join(folder, 'b.xml')))
+
+            results = self.merge_results(extractor.generate_results(folder))
+            self.assertEqual(len(ResultCache(self.cache_dir).entries()), 2)
+            self.assertEqual({result[0] for result in results}, {'a.xml', 'b.xml'})
+            self.assertEqual(self.merge_results(extractor.generate_results(folder)), results)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_overwrite(self):
+        cache = ResultCache(self.cache_dir)
+        cache.put('a' * 64, [['x' * 1000]])
+        size = cache.size
+        cache.put('a' * 64, [['x' * 1000]])
+        self.assertEqual(cache.size, size)
+
+    def test_eviction(self):
+        cache = ResultCache(self.cache_dir)
+        cache.put('a' * 64, [['x' * 1000]])
+        size = cache.size
+        self.assertEqual(cache.get('a' * 64), [['x' * 1000]])
+        self.assertIsNone(cache.get('b' * 64))
+
+        cache = ResultCache(self.cache_dir, max_size=size * 2)
+        self.assertEqual(cache.size, size)
+        os.utime(cache.path('a' * 64), (0, 0))  # make sure this is the least recently used entry
+        cache.put('b' * 64, [['y' * 1000]])
+        cache.put('c' * 64, [['z' * 1000]])
+        self.assertNotIn('a' * 64, cache)
+        self.assertIn('b' * 64, cache)
+        self.assertIn('c' * 64, cache)
+        self.assertLessEqual(cache.size, size * 2)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint({'b': {2, 1}, 'a': (1, None)}), [['a', [1, None]], ['b', [1, 2]]])
+        self.assertEqual(fingerprint(object()), 'object')
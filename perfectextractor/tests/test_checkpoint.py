@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import click
+
+from perfectextractor.apps.extractor.checkpoint import Journal
+from perfectextractor.apps.extractor.utils import XLSX
+from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
+
+DCEP_DATA = os.path.join(os.path.dirname(__file__), 'data/dcep')
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_after(n):
+    def progress_cb(i, _):
+        if i == n:
+            raise Crash()
+    return progress_cb
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.dir_name = os.path.join(DCEP_DATA, 'en')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def create_extractor(self, outfile, **kwargs):
+        return OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['when', 'if', 'Hamas'],
+                                outfile=os.path.join(self.folder, outfile), **kwargs)
+
+    def test_resume(self):
+        # An uninterrupted run
+        self.create_extractor('complete.csv').process_folder(self.dir_name)
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'complete.csv.journal')))
+        with open(os.path.join(self.folder, 'complete.csv'), 'rb') as f:
+            expected = f.read()
+
+        # A run that crashes after two files, in the middle of writing the results of the third one
+        result_file = os.path.join(self.folder, 'resumed.csv')
+        with self.assertRaises(Crash):
+            self.create_extractor('resumed.csv').process_folder(self.dir_name, progress_cb=crash_after(2))
+        with open(result_file, 'a') as f:
+            f.write('partial;result')
+        with open(result_file + '.journal', 'a') as f:
+            f.write('{"file": "partial')
+
+        checkpoints = Journal(result_file).read()
+        self.assertEqual(len(checkpoints), 2)
+        self.assertEqual(checkpoints[-1].offset, os.path.getsize(result_file) - len('partial;result'))
+
+        # Resume the run: the output should be identical to the uninterrupted run
+        processed = []
+        self.create_extractor('resumed.csv', resume=True).process_folder(
+            self.dir_name, progress_cb=lambda i, _: processed.append(i))
+        self.assertEqual(processed, [3])
+        self.assertFalse(os.path.exists(result_file + '.journal'))
+        with open(result_file, 'rb') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_resume_without_checkpoints(self):
+        self.create_extractor('complete.csv').process_folder(self.dir_name)
+        self.create_extractor('resumed.csv', resume=True).process_folder(self.dir_name)
+        with open(os.path.join(self.folder, 'complete.csv'), 'rb') as f1:
+            with open(os.path.join(self.folder, 'resumed.csv'), 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_resume_mismatch(self):
+        with self.assertRaises(Crash):
+            self.create_extractor('resumed.csv').process_folder(self.dir_name, progress_cb=crash_after(1))
+        with self.assertRaises(click.ClickException):
+            self.create_extractor('resumed.csv', resume=True, file_names=['other.xml']).process_folder(self.dir_name)
+        with self.assertRaises(click.ClickException):
+            self.create_extractor('resumed.xlsx', resume=True, format_=XLSX).process_folder(self.dir_name)
@@ -0,0 +1,35 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+from perfectextractor.apps.extractor.discovery import scan_directories, scan_files
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for path in ['a.xml', 'b.txt', 'c/d.xml', 'c/e/f.xml', 'c/e/g.xml.gz', 'h.store/i.xml', 'j/k.xml']:
+            path = os.path.join(self.folder, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('<s/>')
+
+    def test_scan_files(self):
+        expected = sorted(f for f in glob.glob(os.path.join(self.folder, '**', '*.xml*'), recursive=True)
+                          if '.store' not in f)
+        for workers in [1, 4]:
+            entries = list(scan_files(self.folder, ['*.xml', '*.xml.gz'], exclude=['*.store'], workers=workers))
+            self.assertEqual([e.path for e in entries], expected)
+            self.assertEqual({e.size for e in entries}, {4})
+
+        entries = scan_files(self.folder, ['*.xml'], recursive=False)
+        self.assertEqual([e.path for e in entries], [os.path.join(self.folder, 'a.xml')])
+
+    def test_scan_directories(self):
+        self.assertEqual(scan_directories(self.folder),
+                         [os.path.join(self.folder, d) for d in ['c', 'h.store', 'j']])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
@@ -24,7 +24,7 @@ class TestDPCExtractor(unittest.TestCase):
         self.alignmenttrees = {'en': align_en, 'fr': align_fr}
 
     def merge_results(self, generator):
-        return sum(list(generator), [])
+        return [result for results in generator for result in results]
 
     def test_init(self):
         self.assertEqual(self.en_extractor.config.get('en', 'perfect_tags'), 'VBN')
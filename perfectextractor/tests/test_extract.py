@@ -19,6 +19,9 @@ class TestCLI(unittest.TestCase):
         result = runner.invoke(extract)
         self.assertEqual(result.exit_code, 2)  # need to provide arguments
 
+        result = runner.invoke(extract, [EUROPARL_DATA, 'en', 'nl', '--extractor', 'perfect', '--extractor', 'perfect'])
+        self.assertEqual(result.exit_code, 2)  # cannot combine extractors of the same type
+
     def test_perfectextractor(self):
         os.mkdir(self.folder_out)
 
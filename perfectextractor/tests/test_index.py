@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from perfectextractor.apps.extractor.index import INDEX_FILE, CorpusIndex, get_index_file
+from perfectextractor.corpora.opus.extractor import OPUSExtractor
+from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
+
+DCEP_DATA = os.path.join(os.path.dirname(__file__), 'data/dcep')
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copytree(DCEP_DATA, os.path.join(self.folder, 'dcep'))
+        self.en_folder = os.path.join(self.folder, 'dcep', 'en')
+        self.hamas_file = os.path.join(self.en_folder, '16451293__IM-PRESS__20060131-IPR-04891__EN.xml')
+
+        extractor = OPUSExtractor('en', [])
+        with CorpusIndex(get_index_file(self.en_folder)) as index:
+            index.update(extractor, extractor.list_filenames(self.en_folder))
+
+    def merge_results(self, generator):
+        return [result for results in generator for result in results]
+
+    def test_queries(self):
+        queries = [dict(lemmata=['Hamas']),
+                   dict(lemmata=['be', 'have'], pos=['VBZ', 'VHZ']),
+                   dict(regex=['^wh.*', '^how$'], position=1),
+                   dict(pos=['NP'], regex=['^G'])]
+        for query in queries:
+            extractor = OPUSPoSExtractor('en', ['nl', 'de'], **query)
+            results = self.merge_results(extractor.generate_results(self.en_folder))
+            index_extractor = OPUSPoSExtractor('en', ['nl', 'de'], use_index=True, **query)
+            self.assertTrue(results)
+            self.assertEqual(self.merge_results(index_extractor.generate_results(self.en_folder)), results)
+
+    def test_candidates(self):
+        extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['Hamas'], use_index=True)
+        self.assertEqual(extractor.collect_file_names(self.en_folder), [self.hamas_file])
+        self.assertEqual(len(extractor._candidates[self.hamas_file]), 3)
+
+        extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['Hezbollah'], use_index=True)
+        self.assertEqual(extractor.collect_file_names(self.en_folder), [])
+
+        # Without filters, the index cannot restrict the search
+        extractor = OPUSExtractor('en', ['nl', 'de'], use_index=True)
+        file_names = extractor.list_filenames(self.en_folder)
+        self.assertEqual(len(file_names), 3)
+        self.assertEqual(extractor.collect_file_names(self.en_folder), file_names)
+        self.assertIsNone(extractor._candidates[self.hamas_file])
+
+    def test_update(self):
+        # Changed files are searched as a whole until the index is updated
+        stat = os.stat(self.hamas_file)
+        os.utime(self.hamas_file, (stat.st_atime, stat.st_mtime + 10))
+        extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['Hezbollah'], use_index=True)
+        self.assertEqual(extractor.collect_file_names(self.en_folder), [self.hamas_file])
+        self.assertIsNone(extractor._candidates[self.hamas_file])
+
+        with CorpusIndex(get_index_file(self.en_folder)) as index:
+            index.update(extractor, extractor.list_filenames(self.en_folder))
+            self.assertEqual(len(index.get_files()), 3)
+        self.assertEqual(extractor.collect_file_names(self.en_folder), [])
+
+        with CorpusIndex(get_index_file(self.en_folder)) as index:
+
+            index.update(extractor, [])
+            self.assertEqual(index.get_files(), dict())
+        self.assertEqual(len(extractor.collect_file_names(self.en_folder)), 3)
+
+    def test_archive(self):
+        # Index the documents in a zip archive: the index is stored next to the archive
+        zip_file = os.path.join(self.folder, 'dcep.zip')
+        with zipfile.ZipFile(zip_file, 'w') as z:
+            for file_name in os.listdir(self.en_folder):
+                if file_name.endswith('.xml'):
+                    z.write(os.path.join(self.en_folder, file_name), 'en/' + file_name)
+        en_folder = os.path.join(zip_file, 'en')
+        hamas_file = os.path.join(en_folder, os.path.basename(self.hamas_file))
+
+        extractor = OPUSExtractor('en', [])
+        with CorpusIndex(get_index_file(en_folder)) as index:
+            index.update(extractor, extractor.list_filenames(en_folder))
+            self.assertEqual(len(index.get_files()), 3)
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'dcep.zip-en' + INDEX_FILE)))
+
+        extractor = OPUSPoSExtractor('en', [], lemmata=['Hamas'], use_index=True)
+        self.assertEqual(extractor.collect_file_names(en_folder), [hamas_file])
+        self.assertEqual(len(extractor._candidates[hamas_file]), 3)
+        results = self.merge_results(OPUSPoSExtractor('en', [], lemmata=['Hamas']).generate_results(en_folder))
+        self.assertTrue(results)
+        self.assertEqual(self.merge_results(extractor.generate_results(en_folder)), results)
+
+        # Once the archive changes, all its documents are searched as a whole until the index is updated
+        stat = os.stat(zip_file)
+        os.utime(zip_file, (stat.st_atime, stat.st_mtime + 10))
+        extractor = OPUSPoSExtractor('en', [], lemmata=['Hezbollah'], use_index=True)
+        self.assertEqual(len(extractor.collect_file_names(en_folder)), 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
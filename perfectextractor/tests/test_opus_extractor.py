@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import gzip
 import os
+import shutil
+import tarfile
+import tempfile
 import unittest
+from unittest import mock
+import zipfile
+
+import click
 
 from lxml import etree
 
-from perfectextractor.apps.extractor.perfectextractor import PAST
+from perfectextractor.apps.extractor.perfectextractor import PRESENT, PAST
+from perfectextractor.apps.extractor.posextractor import VECTORISED
 from perfectextractor.corpora.opus.article import OPUSFrenchArticleExtractor
 from perfectextractor.corpora.opus.extractor import OPUSExtractor
+from perfectextractor.corpora.opus.pattern import OPUSPatternExtractor
 from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
 from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
 from perfectextractor.corpora.opus.recentpast import OPUSRecentPastExtractor
@@ -33,7 +44,7 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
         self.en_alignmenttrees, self.en_translationtrees = self.en_extractor.parse_alignment_trees(self.en_filename)
 
     def merge_results(self, generator):
-        return sum(list(generator), [])
+        return [result for results in generator for result in results]
 
     def test_init(self):
         self.assertEqual(self.nl_extractor.config.get('nl', 'perfect_tags'), 'verbpapa')
@@ -136,6 +147,23 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
         self.assertEqual(results[2][3], u'viens d\' évoquer')
         self.assertEqual(results[3][3], u'vient d\' être dit')
 
+    def test_combined_extractors(self):
+        fr_extractor = OPUSPerfectExtractor('fr', ['nl'])
+        fr_extractor.add_extractor(OPUSRecentPastExtractor('fr', ['nl']))
+        self.assertEqual(fr_extractor.generate_header()[:2], ['extractor', 'document'])
+
+        results = fr_extractor.process_file(self.fr_filename)
+        perfects = [r[1:] for r in results if r[0] == 'OPUSPerfectExtractor']
+        recent_pasts = [r[1:] for r in results if r[0] == 'OPUSRecentPastExtractor']
+        self.assertEqual(len(perfects) + len(recent_pasts), len(results))
+        self.assertEqual(perfects, OPUSPerfectExtractor('fr', ['nl']).process_file(self.fr_filename))
+        self.assertEqual(recent_pasts, OPUSRecentPastExtractor('fr', ['nl']).process_file(self.fr_filename))
+
+        self.assertRaises(ValueError, fr_extractor.add_extractor, OPUSRecentPastExtractor('fr', ['en']))
+        # Extractors of the same type cannot be combined, as their results are tagged by type
+        self.assertRaises(ValueError, fr_extractor.add_extractor, OPUSRecentPastExtractor('fr', ['nl']))
+        self.assertRaises(ValueError, fr_extractor.add_extractor, OPUSPerfectExtractor('fr', ['nl']))
+
     def test_position(self):
         when_extractor = OPUSPoSExtractor('en', ['nl'], lemmata=['when'], position=1)
         results = self.merge_results(when_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
@@ -192,6 +220,11 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
         self.assertEqual(results[2][3], u'What')
         self.assertEqual(results[3][3], u'When')
 
+        # The results should be the same as with the EXSLT regular expression in the XPath expression
+        xpath, ns = regex_extractor.prepare_xpath()
+        words = etree.parse(self.en_filename).xpath(xpath, namespaces=ns)
+        self.assertEqual(len([w for w in words if w.get('id').endswith('.1')]), len(results))
+
     def test_regex_and_pos(self):
         # Primitive search for wh-questions
         regex_extractor = OPUSPoSExtractor('en', ['nl'], regex=['^wh.*'], pos=['WP'], position=1)
@@ -212,7 +245,143 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
 
         tokens_extractor = OPUSPoSExtractor('en', ['nl'], tokens=[('w1.19', 'w1.17')])
         generator = tokens_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en'))
-        self.assertRaises(ValueError, next, generator)
+        self.assertRaises(ValueError, self.merge_results, generator)
+
+    def test_vectorised(self):
+        queries = [dict(lemmata=['when'], position=1),
+                   dict(regex=['^wh.*', '^how$'], position=1),
+                   dict(regex=['^wh.*'], pos=['WP', 'WRB']),
+                   dict(lemmata=['be', 'have'], pos=['VBZ', 'VHZ']),
+                   dict(tokens=[('w1.13', 'w1.15'), ('w2.5', 'w2.8')])]
+        for query in queries:
+            xpath_extractor = OPUSPoSExtractor('en', ['nl'], **query)
+            xpath_results = self.merge_results(xpath_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+            vectorised_extractor = OPUSPoSExtractor('en', ['nl'], engine=VECTORISED, **query)
+            results = self.merge_results(vectorised_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+            self.assertTrue(results)
+            self.assertEqual(results, xpath_results)
+
+    def test_prefilter(self):
+        folder = os.path.join(DCEP_DATA, 'en')
+        extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['Hamas'])
+        prefilter_extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['Hamas'], prefilter=True)
+        results = self.merge_results(prefilter_extractor.generate_results(folder))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results, self.merge_results(extractor.generate_results(folder)))
+
+        hamas_file = os.path.join(folder, '16451293__IM-PRESS__20060131-IPR-04891__EN.xml')
+        for filename in prefilter_extractor.list_filenames(folder):
+            self.assertEqual(prefilter_extractor.may_contain_results(filename), filename == hamas_file)
+
+    def test_prefetch(self):
+        folder = os.path.join(DCEP_DATA, 'en')
+        extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['when', 'if'])
+        prefetch_extractor = OPUSPoSExtractor('en', ['nl', 'de'], lemmata=['when', 'if'], prefetch=2)
+        results = self.merge_results(extractor.generate_results(folder))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.merge_results(prefetch_extractor.generate_results(folder)), results)
+
+        # Prefetching should also work with combined extractors and when stopping early
+        prefetch_extractor.add_extractor(OPUSPerfectExtractor('en', ['nl', 'de']))
+        generator = prefetch_extractor.generate_results(folder)
+        self.assertIsInstance(list(next(generator)), list)
+        generator.close()
+
+    def test_streaming(self):
+        folder = os.path.join(EUROPARL_DATA, 'en')
+        results = self.merge_results(self.en_extractor.generate_results(folder))
+
+        # The results of a file should be generated one by one
+        stream = next(OPUSPerfectExtractor('en', ['nl'], search_in_to=True).generate_results(folder))
+        self.assertNotIsInstance(stream, list)
+        self.assertEqual(next(stream), results[0])
+        self.assertEqual(list(stream), results[1:])
+
+    def test_gzip(self):
+        # Compress all documents and alignment files
+        folder = tempfile.mkdtemp()
+        for root, _, file_names in os.walk(EUROPARL_DATA):
+            for file_name in file_names:
+                if file_name.endswith('.xml'):
+                    out_dir = os.path.join(folder, os.path.relpath(root, EUROPARL_DATA))
+                    os.makedirs(out_dir, exist_ok=True)
+                    with open(os.path.join(root, file_name), 'rb') as f_in:
+                        with gzip.open(os.path.join(out_dir, file_name + '.gz'), 'wb') as f_out:
+                            shutil.copyfileobj(f_in, f_out)
+
+        try:
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'])
+            gzip_extractor = OPUSPerfectExtractor('en', ['nl', 'fr'])
+            self.assertEqual(gzip_extractor.list_filenames(os.path.join(folder, 'en')),
+                             [os.path.join(folder, 'en', 'ep-00-12-15.xml.gz')])
+
+            results = self.merge_results(extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+            gzip_results = self.merge_results(gzip_extractor.generate_results(os.path.join(folder, 'en')))
+            self.assertEqual(len(gzip_results), 81)
+            for result, gzip_result in zip(results, gzip_results):
+                self.assertEqual(gzip_result[0], result[0] + '.gz')
+                self.assertEqual(gzip_result[1:], result[1:])
+        finally:
+            shutil.rmtree(folder)
+
+    def test_gzip_duplicates(self):
+        # The plain version of a file is used, even if another file is listed in between
+        folder = tempfile.mkdtemp()
+        file_names = ['ep-00-12-15.xml', 'ep-00-12-15.xml-annex.xml', 'ep-00-12-15.xml.gz', 'ep-00-12-16.xml.gz']
+        for file_name in file_names:
+            open(os.path.join(folder, file_name), 'w').close()
+
+        try:
+            self.assertEqual(OPUSPerfectExtractor('en', []).list_filenames(folder),
+                             [os.path.join(folder, file_name) for file_name in file_names if file_name != file_names[2]])
+        finally:
+            shutil.rmtree(folder)
+
+    def test_archives(self):
+        folder = tempfile.mkdtemp()
+        zip_file = os.path.join(folder, 'europarl.zip')
+        tar_file = os.path.join(folder, 'europarl.tar')
+        with zipfile.ZipFile(zip_file, 'w') as z, tarfile.open(tar_file, 'w') as t:
+            for root, _, file_names in os.walk(EUROPARL_DATA):
+                for file_name in file_names:
+                    if file_name.endswith('.xml'):
+                        path = os.path.join(root, file_name)
+                        z.write(path, os.path.relpath(path, EUROPARL_DATA))
+                        t.add(path, os.path.relpath(path, EUROPARL_DATA))
+
+        try:
+            results = self.merge_results(self.en_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+            for archive in [zip_file, tar_file]:
+                extractor = OPUSPerfectExtractor('en', ['nl'], search_in_to=True)
+                self.assertEqual(list(extractor.list_directories(archive)), [os.path.join(archive, 'en')])
+                self.assertEqual(self.merge_results(extractor.generate_results(os.path.join(archive, 'en'))), results)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_nested(self):
+        # Move the documents into nested folders, like in OpenSubtitles
+        folder = tempfile.mkdtemp()
+        for language in ['en', 'nl']:
+            os.makedirs(os.path.join(folder, language, '2000', '12'))
+            shutil.copy(os.path.join(EUROPARL_DATA, language, 'ep-00-12-15.xml'),
+                        os.path.join(folder, language, '2000', '12'))
+        with open(os.path.join(EUROPARL_DATA, 'en-nl.xml')) as f_in:
+            with open(os.path.join(folder, 'en-nl.xml'), 'w') as f_out:
+                f_out.write(f_in.read().replace('/ep-00-12-15.xml', '/2000/12/ep-00-12-15.xml'))
+
+        try:
+            extractor = OPUSPerfectExtractor('en', ['nl'], search_in_to=True)
+            file_name = os.path.join(folder, 'en', '2000', '12', 'ep-00-12-15.xml')
+            self.assertEqual(extractor.list_filenames(os.path.join(folder, 'en')), [file_name])
+            self.assertEqual(extractor.split_document_path(file_name), (folder, 'en/2000/12/ep-00-12-15.xml'))
+            # A nested folder that merely ends with the language is not the language folder
+            self.assertEqual(extractor.split_document_path(os.path.join(folder, 'en', 'queen', '1.xml')),
+                             (folder, 'en/queen/1.xml'))
+
+            results = self.merge_results(self.en_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+            self.assertEqual(self.merge_results(extractor.generate_results(os.path.join(folder, 'en'))), results)
+        finally:
+            shutil.rmtree(folder)
 
     def test_metadata(self):
         metadata_extractor = OPUSPoSExtractor('en', [], lemmata=['when'],
@@ -236,6 +405,15 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
         self.assertEqual(len(results), 2041)
         self.assertEqual(results[0][2], u'indefinite partitive')
 
+    def test_patterns(self):
+        pattern_extractor = OPUSPatternExtractor('en', [], construction='hot_news_perfect')
+        results = self.merge_results(pattern_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][2], u'hot_news_perfect')
+        self.assertEqual(results[0][3], u'has just said')
+
+        self.assertRaises(click.ClickException, OPUSPatternExtractor, 'en', [], construction='unknown')
+
     def test_past_perfect(self):
         past_perfect_extractor = OPUSPerfectExtractor('en', [], tense=PAST)
         results = self.merge_results(past_perfect_extractor.generate_results(os.path.join(EUROPARL_DATA, 'en')))
@@ -262,6 +440,86 @@ class TestEuroparlPerfectExtractor(unittest.TestCase):
         self.assertEqual(len(results), 7)
         self.assertEqual(results[0][3], u'hade kunnat')
 
+    def test_multiple_tenses(self):
+        de_folder = os.path.join(DCEP_DATA, 'de')
+        present_results = self.merge_results(OPUSPerfectExtractor('de', []).generate_results(de_folder))
+        past_results = self.merge_results(OPUSPerfectExtractor('de', [], tense=PAST).generate_results(de_folder))
+
+        extractor = OPUSPerfectExtractor('de', [], tense=[PRESENT, PAST])
+        results = self.merge_results(extractor.generate_results(de_folder))
+        self.assertEqual(len(results), len(present_results) + len(past_results))
+        self.assertEqual([r for r in results if r[2] == 'present perfect'], present_results)
+        self.assertEqual([r for r in results if r[2] == 'past perfect'], past_results)
+        self.assertEqual(past_results[0][3], u'hatte beschlossen')
+
+    def test_columns(self):
+        folder = os.path.join(EUROPARL_DATA, 'en')
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], metadata=[('id', 's')], one_per_sentence=True)
+        results = self.merge_results(extractor.generate_results(folder))
+
+        # The header and results should be limited to the selected columns, in the order of the header
+        columns = ['type', 'document', 'sentence', 'metadata']
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], metadata=[('id', 's')], one_per_sentence=True,
+                                         columns=columns)
+        self.assertEqual(extractor.generate_header(), ['document', 'sentence', 'type en', 'id'])
+
+        # As the translations are not selected, the translation files should not be parsed at all
+        with mock.patch.object(OPUSPerfectExtractor, 'parse_alignment_trees', side_effect=AssertionError):
+            projected = self.merge_results(extractor.generate_results(folder))
+        self.assertEqual(projected, [[r[0], r[1], r[2], r[6]] for r in results])
+
+        # The rendered sentences and translations should not be computed either
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], columns=['sentence', 'translations'])
+        with mock.patch.object(OPUSPerfectExtractor, 'render_sentence', side_effect=AssertionError):
+            projected = self.merge_results(extractor.generate_results(folder))
+        results = self.merge_results(OPUSPerfectExtractor('en', ['nl', 'fr']).generate_results(folder))
+        self.assertEqual(projected, [[r[1]] + r[6:] for r in results])
+
+        self.assertRaises(click.ClickException, OPUSPerfectExtractor, 'en', ['nl'], columns=['sentences'])
+
+    def test_count_only(self):
+        folder = os.path.join(EUROPARL_DATA, 'en')
+        results = self.merge_results(OPUSPerfectExtractor('en', ['nl', 'fr']).generate_results(folder))
+        expected = collections.Counter((r[0], r[2], r[3]) for r in results)
+
+        # Neither the translations nor the sentences should be needed for counting
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], count_only=True)
+        self.assertEqual(extractor.generate_header(), ['document', 'type', 'construction', 'lemma', 'count'])
+        with mock.patch.object(OPUSPerfectExtractor, 'parse_alignment_trees', side_effect=AssertionError), \
+                mock.patch.object(OPUSPerfectExtractor, 'render_sentence', side_effect=AssertionError):
+            counts = self.merge_results(extractor.generate_results(folder))
+        self.assertEqual(counts[0], ['ep-00-12-15.xml', 'present perfect', 'have reached', 'have reach', '3'])
+        self.assertEqual(collections.Counter({(c[0], c[1], c[2]): int(c[4]) for c in counts}), expected)
+
+        # The counts should be the same when searching in the parts of the file
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], count_only=True, workers=2, split_size=20000)
+        self.assertEqual(self.merge_results(extractor.generate_results(folder)), counts)
+
+    def test_sample(self):
+        folder = os.path.join(DCEP_DATA, 'en')
+        results = self.merge_results(OPUSPerfectExtractor('en', ['nl', 'de']).generate_results(folder))
+        self.assertEqual(len(results), 7)
+
+        # The sample should be drawn from the results, in document order, and be the same for the same seed
+        extractor = OPUSPerfectExtractor('en', ['nl', 'de'], sample=3, seed=3)
+        sample = self.merge_results(extractor.generate_results(folder))
+        self.assertEqual(len(sample), 3)
+        indices = [results.index(result) for result in sample]
+        self.assertEqual(indices, sorted(indices))
+        self.assertEqual(self.merge_results(extractor.generate_results(folder)), sample)
+
+        # The translations should only be loaded for the file that holds the sampled result
+        extractor = OPUSPerfectExtractor('en', ['nl', 'de'], sample=1, seed=1)
+        with mock.patch.object(OPUSPerfectExtractor, 'parse_alignment_trees',
+                               wraps=extractor.parse_alignment_trees) as parse_alignment_trees:
+            sample = self.merge_results(extractor.generate_results(folder))
+        self.assertEqual(parse_alignment_trees.call_count, 1)
+        self.assertIn(sample[0], results)
+
+        # A sample larger than the number of results holds all results
+        extractor = OPUSPerfectExtractor('en', ['nl', 'de'], sample=10)
+        self.assertEqual(self.merge_results(extractor.generate_results(folder)), results)
+
     def test_languages(self):
         sv_extractor = OPUSPerfectExtractor('sv', [])
         results = self.merge_results(sv_extractor.generate_results(os.path.join(EUROPARL_DATA, 'sv')))
@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from lxml import etree
+
+from perfectextractor.apps.extractor.parts import parse_part, split_file
+from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
+
+
+class TestParts(unittest.TestCase):
+    def setUp(self):
+        self.en_filename = os.path.join(EUROPARL_DATA, 'en/ep-00-12-15.xml')
+
+    def test_split_file(self):
+        parts = split_file(self.en_filename, 's', 100000)
+        self.assertEqual(len(parts), 15)
+        self.assertEqual(parts[0].start, 0)
+        self.assertEqual(parts[-1].end, os.path.getsize(self.en_filename))
+        for part, next_part in zip(parts, parts[1:]):
+            self.assertEqual(part.end, next_part.start)
+
+        # All sentences should be found exactly once, with the same ancestors
+        tree = etree.parse(self.en_filename)
+        sentences = [s for part in parts for s in parse_part(self.en_filename, part).iter('s')]
+        self.assertEqual([s.get('id') for s in sentences], [s.get('id') for s in tree.iter('s')])
+        for s, original in zip(sentences, tree.iter('s')):
+            self.assertEqual([(a.tag, dict(a.attrib)) for a in s.iterancestors()],
+                             [(a.tag, dict(a.attrib)) for a in original.iterancestors()])
+
+    def test_small_file(self):
+        parts = split_file(self.en_filename, 's', os.path.getsize(self.en_filename))
+        self.assertEqual(len(parts), 1)
+        self.assertEqual(parts[0].prefix, b'')
+        self.assertEqual(parts[0].suffix, b'')
+
+    def test_workers(self):
+        folder = os.path.join(EUROPARL_DATA, 'en')
+        metadata = [('id', 'p'), ('NAME', 'text')]
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], search_in_to=True, metadata=metadata)
+        parts_extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], search_in_to=True, metadata=metadata,
+                                               workers=2, split_size=100000)
+        self.assertTrue(parts_extractor.can_split(self.en_filename))
+        self.assertFalse(extractor.can_split(self.en_filename))
+
+        results = [r for part in extractor.generate_results(folder) for r in part]
+        self.assertEqual(len(results), 81)
+        self.assertEqual([r for part in parts_extractor.generate_results(folder) for r in part], results)
+        self.assertIsNone(parts_extractor._pool)
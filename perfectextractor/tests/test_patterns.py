@@ -0,0 +1,59 @@
+import unittest
+
+from perfectextractor.apps.extractor.patterns import Token, TokenPattern
+
+
+def tokenize(sentence):
+    """
+    Creates Tokens from a sentence in the form word/lemma/pos.
+    """
+    return [Token(None, *w.split('/')) for w in sentence.split()]
+
+
+class TestTokenPattern(unittest.TestCase):
+    def setUp(self):
+        self.tokens = tokenize('je/je/PRO:PER viens/venir/VER:pres tout/tout/ADV juste/juste/ADV de/de/PRP '
+                               'le/le/PRO:PER voir/voir/VER:infi ././PUN')
+
+    def test_sequence(self):
+        pattern = TokenPattern('[lemma=venir] [pos=ADV] [pos^=ADV]')
+        self.assertEqual(list(pattern.finditer(self.tokens)), [[(1, True), (2, True), (3, True)]])
+
+        pattern = TokenPattern('[lemma=venir] [pos=PRP]')
+        self.assertEqual(list(pattern.finditer(self.tokens)), [])
+
+    def test_gaps(self):
+        pattern = TokenPattern('[lemma=venir] [!punct & pos!^=VER]* [lemma=de] []* [pos=VER:infi]')
+        match = pattern.search(self.tokens)
+        self.assertEqual([i for i, in_construction in match if in_construction], [1, 4, 6])
+        self.assertEqual([i for i, in_construction in match if not in_construction], [2, 3, 5])
+
+        # The gap stops at a word that does not satisfy its constraints
+        pattern = TokenPattern('[lemma=venir] [pos!=PRP]* [pos=VER:infi]')
+        self.assertIsNone(pattern.search(self.tokens))
+
+    def test_optional(self):
+        pattern = TokenPattern('[lemma=de]? [lemma=le]')
+        self.assertEqual(list(pattern.finditer(self.tokens)), [[(4, True), (5, True)]])
+
+        tokens = tokenize('le/le/DET:ART chat/chat/NOM de/de/PRP le/le/DET:ART voisin/voisin/NOM')
+        self.assertEqual(list(pattern.finditer(tokens)), [[(0, True)], [(2, True), (3, True)]])
+
+    def test_alternatives(self):
+        pattern = TokenPattern('''
+            [lemma=voir] [word=.]
+            [lemma=voir]
+        ''')
+        self.assertEqual(pattern.search(self.tokens), [(6, True), (7, True)])
+
+        pattern = TokenPattern('''
+            [lemma=voir] [word=!]
+            [lemma=voir]
+        ''')
+        self.assertEqual(pattern.search(self.tokens), [(6, True)])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, TokenPattern, '')
+        self.assertRaises(ValueError, TokenPattern, '[lemma=de]?')
+        self.assertRaises(ValueError, TokenPattern, '[lemma=de')
+        self.assertRaises(ValueError, TokenPattern, '[tag=de]')
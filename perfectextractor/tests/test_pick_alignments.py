@@ -0,0 +1,80 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from lxml import etree
+
+from perfectextractor.scripts.pick_alignments import get_doctype, partition_alignments
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'pick_alignments.py')
+PATTERN = '-([0-9]+)-'
+
+
+class TestPickAlignments(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+        # Add the alignments of documents from other years (and of a document without a year)
+        tree = etree.parse(os.path.join(EUROPARL_DATA, 'en-nl.xml'))
+        link_grp = tree.find('linkGrp')
+        for doc in ['ep-01-01-15', 'ep-00-12-16', 'ep-intro']:
+            copy = etree.fromstring(etree.tostring(link_grp))
+            copy.set('fromDoc', 'en/{}.xml.gz'.format(doc))
+            copy.set('toDoc', 'nl/{}.xml.gz'.format(doc))
+            tree.getroot().append(copy)
+        self.alignment_file = os.path.join(self.folder, 'en-nl.xml')
+        tree.write(self.alignment_file, xml_declaration=True, encoding='utf-8', doctype=get_doctype(tree.docinfo))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def check_shards(self, alignment_file, shards):
+        tree = etree.parse(alignment_file)
+        expected = [etree.tostring(g, with_tail=False) for g in tree.iter('linkGrp') if re.search(PATTERN, g.get('fromDoc'))]
+
+        link_grps = []
+        for key, filename in sorted(shards.items()):
+            shard = etree.parse(filename)
+            self.assertEqual(get_doctype(shard.docinfo), get_doctype(tree.docinfo))
+            self.assertEqual(shard.getroot().tag, tree.getroot().tag)
+            self.assertEqual(dict(shard.getroot().attrib), dict(tree.getroot().attrib))
+            for link_grp in shard.iter('linkGrp'):
+                self.assertEqual(re.search(PATTERN, link_grp.get('fromDoc')).group(1), key)
+                link_grps.append(etree.tostring(link_grp, with_tail=False))
+        self.assertEqual(sorted(link_grps), sorted(expected))
+
+    def test_partition(self):
+        # The original alignment file holds a single year
+        file_out = os.path.join(self.folder, 'original', '{}', 'en-nl.xml')
+        alignment_file = os.path.join(EUROPARL_DATA, 'en-nl.xml')
+        shards = partition_alignments(alignment_file, file_out, PATTERN)
+        self.assertEqual(shards, {'00': file_out.format('00')})
+        self.check_shards(alignment_file, shards)
+
+        file_out = os.path.join(self.folder, 'split', '{}', 'en-nl.xml')
+        shards = partition_alignments(self.alignment_file, file_out, PATTERN)
+        self.assertEqual(shards, {'00': file_out.format('00'), '01': file_out.format('01')})
+        self.assertEqual(len(etree.parse(shards['00']).findall('linkGrp')), 2)
+        self.assertEqual(len(etree.parse(shards['01']).findall('linkGrp')), 1)
+        self.check_shards(self.alignment_file, shards)
+
+    def test_cli(self):
+        # The pattern starts with a dash, so it is preceded by --
+        file_out = os.path.join(self.folder, 'split', '{}', 'en-nl.xml')
+        result = subprocess.run([sys.executable, SCRIPT, '--partition', self.alignment_file, file_out,
+                                 '--', PATTERN], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.folder, 'split'))), ['00', '01'])
+        self.check_shards(self.alignment_file, {key: file_out.format(key) for key in ['00', '01']})
+
+        # Without partitioning, only the alignments of the documents that contain the search string are kept
+        file_out = os.path.join(self.folder, 'en-nl-01.xml')
+        result = subprocess.run([sys.executable, SCRIPT, self.alignment_file, file_out, '--', 'ep-01-'],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual([g.get('fromDoc') for g in etree.parse(file_out).iter('linkGrp')], ['en/ep-01-01-15.xml.gz'])
@@ -0,0 +1,58 @@
+import os
+import unittest
+from unittest import mock
+
+from perfectextractor.apps.extractor.records import ResultRecord, RowRecord, Translation
+from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
+from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.folder = os.path.join(EUROPARL_DATA, 'en')
+
+    def test_records(self):
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], metadata=[('id', 's')])
+        results = [result for results in extractor.generate_results(self.folder) for result in results]
+
+        records = list(extractor.generate_records(self.folder))
+        self.assertEqual([record.to_row() for record in records], results)
+
+        record = records[0]
+        self.assertIsInstance(record, ResultRecord)
+        self.assertEqual(record.document, 'ep-00-12-15.xml')
+        self.assertEqual(record.sentence, '6')
+        self.assertEqual(record.type, 'present perfect')
+        self.assertEqual(record.words, 'has said')
+        self.assertEqual(record.metadata, {'id': '6'})
+        self.assertEqual(record.translations['nl'], Translation('1 => 1', results[0][8]))
+        self.assertEqual(record.translations['fr'].alignment_type, '1 => 1')
+
+    def test_lazy_fields(self):
+        # Only the requested fields should be computed
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'])
+        with mock.patch.object(OPUSPerfectExtractor, 'generate_translations', side_effect=AssertionError), \
+                mock.patch.object(OPUSPerfectExtractor, 'render_sentence', side_effect=AssertionError):
+            types = [(record.sentence, record.type) for record in extractor.generate_records(self.folder)]
+        self.assertEqual(len(types), 81)
+        self.assertEqual(types[0], ('6', 'present perfect'))
+
+    def test_row_records(self):
+        # Results that are taken as result lines (here: from the parts of a file) have the same fields
+        extractor = OPUSPerfectExtractor('en', ['nl', 'fr'])
+        extractor.add_extractor(OPUSPoSExtractor('en', ['nl', 'fr'], lemmata=['can']))
+        records = list(extractor.generate_records(self.folder))
+
+        split_extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], workers=2, split_size=20000)
+        split_extractor.add_extractor(OPUSPoSExtractor('en', ['nl', 'fr'], lemmata=['can']))
+        row_records = list(split_extractor.generate_records(self.folder))
+
+        self.assertIsInstance(row_records[0], RowRecord)
+        self.assertEqual(len(row_records), len(records))
+        for record, row_record in zip(records, row_records):
+            self.assertEqual(row_record.extractor.name, record.extractor.name)
+            self.assertEqual(row_record.to_row(), record.to_row())
+            for field in ['document', 'sentence', 'type', 'words', 'ids', 'text', 'metadata', 'translations']:
+                self.assertEqual(getattr(row_record, field), getattr(record, field))
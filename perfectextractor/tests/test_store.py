@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+from lxml import etree
+
+from perfectextractor.apps.extractor.store import AlignmentStore, TokenStore
+from perfectextractor.build_store import build_store
+from perfectextractor.corpora.opus.extractor import OPUSExtractor
+from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
+from perfectextractor.corpora.opus.pos import OPUSPoSExtractor
+from perfectextractor.corpora.opus.recentpast import OPUSRecentPastExtractor
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
+
+
+class TestTokenStore(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.europarl_folder = os.path.join(self.folder, 'europarl')
+        shutil.copytree(EUROPARL_DATA, self.europarl_folder)
+        self.en_file = os.path.join(self.europarl_folder, 'en', 'ep-00-12-15.xml')
+
+        result = CliRunner().invoke(build_store, [self.europarl_folder, 'en', 'nl', 'fr'])
+        self.assertEqual(result.exit_code, 0)
+
+    def merge_results(self, generator):
+        return [result for results in generator for result in results]
+
+    def test_convert(self):
+        self.assertTrue(TokenStore.exists(self.en_file))
+        self.assertTrue(AlignmentStore.exists(os.path.join(self.europarl_folder, 'en-nl.xml')))
+
+        store = TokenStore(self.en_file)
+        sentences = [s for _, s in etree.iterparse(self.en_file, tag='s')]
+        self.assertEqual(len(store), len(sentences))
+        for (_, s), original in zip(store.iter_sentences(store.select([([], None)])), sentences):
+            self.assertEqual(dict(s.attrib), dict(original.attrib))
+            self.assertEqual([(dict(w.attrib), w.text) for w in s.iter('w')],
+                             [(dict(w.attrib), w.text) for w in original.iter('w')])
+
+        self.assertEqual(store.get_sentence_by_id('3').get('id'), '3')
+        self.assertEqual(len(store.find_sentences([('lem', ['when'])])), 20)  # one sentence contains 'when' twice
+
+    def test_results(self):
+        en_folder = os.path.join(self.europarl_folder, 'en')
+        fr_folder = os.path.join(self.europarl_folder, 'fr')
+        extractors = [(OPUSExtractor, en_folder, 'en', dict()),
+                      (OPUSPoSExtractor, en_folder, 'en', dict(lemmata=['when'])),
+                      (OPUSPoSExtractor, en_folder, 'en', dict(regex=['^wh.*'], pos=['WP', 'WRB'])),
+                      (OPUSPerfectExtractor, en_folder, 'en', dict(search_in_to=True)),
+                      (OPUSRecentPastExtractor, fr_folder, 'fr', dict())]
+        for extractor_class, folder, language_from, kwargs in extractors:
+            extractor = extractor_class(language_from, ['nl', 'fr'], **kwargs)
+            results = self.merge_results(extractor.generate_results(folder))
+            store_extractor = extractor_class(language_from, ['nl', 'fr'], use_store=True, **kwargs)
+            self.assertTrue(results)
+            self.assertEqual(self.merge_results(store_extractor.generate_results(folder)), results)
+
+    def test_tokens(self):
+        # Tokens are looked up in the XML, which holds the chunks the words are in
+        en_folder = os.path.join(self.europarl_folder, 'en')
+        tokens = [('w1.13', 'w1.15'), ('w2.5', 'w2.8')]
+        extractor = OPUSPoSExtractor('en', ['nl'], tokens=tokens)
+        store_extractor = OPUSPoSExtractor('en', ['nl'], tokens=tokens, use_store=True)
+        self.assertIsNone(store_extractor.open_store(self.en_file))
+        results = self.merge_results(extractor.generate_results(en_folder))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.merge_results(store_extractor.generate_results(en_folder)), results)
+
+        # A range of tokens that crosses a chunk is not found with either backend
+        for use_store in [False, True]:
+            extractor = OPUSPoSExtractor('en', ['nl'], tokens=[('w1.6', 'w1.8')], use_store=use_store)
+            self.assertRaises(ValueError, self.merge_results, extractor.generate_results(en_folder))
+
+    def test_fallback(self):
+        # Changed files are parsed as XML
+        stat = os.stat(self.en_file)
+        os.utime(self.en_file, (stat.st_atime, stat.st_mtime + 10))
+        self.assertFalse(TokenStore.exists(self.en_file))
+
+        extractor = OPUSPoSExtractor('en', ['nl'], lemmata=['when'], use_store=True)
+        self.assertIsNone(extractor.open_store(self.en_file))
+        results = self.merge_results(extractor.generate_results(os.path.join(self.europarl_folder, 'en')))
+        self.assertEqual(len(results), 21)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
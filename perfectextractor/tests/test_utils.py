@@ -1,7 +1,34 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
 import unittest
+import zipfile
 
+import click
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from perfectextractor.apps.extractor.utils import ExcelWriter, ParquetWriter, SqliteWriter, CSV, PARQUET, \
+    SQLITE, JSONL, GZIP, ZSTD, unique_columns
 from perfectextractor.apps.extractor.xml_utils import get_adjacent_line_number
 from perfectextractor.corpora.dpc.utils import is_nl
+from perfectextractor.corpora.opus.perfect import OPUSPerfectExtractor
+
+EUROPARL_DATA = os.path.join(os.path.dirname(__file__), 'data/europarl')
 
 
 class TestUtils(unittest.TestCase):
@@ -14,3 +41,133 @@ class TestUtils(unittest.TestCase):
     def test_is_nl(self):
         self.assertEqual(is_nl('nl'), 1)
         self.assertEqual(is_nl('en'), 0)
+
+    def test_excel_writer(self):
+        folder = tempfile.mkdtemp()
+        filename = os.path.join(folder, 'results.xlsx')
+        try:
+            writer = ExcelWriter(filename, max_rows=3)
+            writer.writerow(['document', 'sentence'], is_header=True)
+            writer.writerows([['doc', str(n)] for n in range(5)])
+            writer.close()
+
+            # The rows should roll over to new worksheets, each starting with the header
+            with zipfile.ZipFile(filename) as z:
+                sheets = sorted(n for n in z.namelist() if n.startswith('xl/worksheets/sheet'))
+                self.assertEqual(len(sheets), 3)
+                texts = [re.findall(r'<t>([^<]*)</t>', z.read(sheet).decode('utf-8')) for sheet in sheets]
+            self.assertEqual(texts[0], ['document', 'sentence', 'doc', '0', 'doc', '1'])
+            self.assertEqual(texts[1], ['document', 'sentence', 'doc', '2', 'doc', '3'])
+            self.assertEqual(texts[2], ['document', 'sentence', 'doc', '4'])
+        finally:
+            shutil.rmtree(folder)
+
+    def test_unique_columns(self):
+        self.assertEqual(unique_columns(['en', 'alignment type', 'nl', 'alignment type', 'fr']),
+                         ['en', 'alignment type', 'nl', 'alignment type.1', 'fr'])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_writer(self):
+        folder = tempfile.mkdtemp()
+        filename = os.path.join(folder, 'results.parquet')
+        try:
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename, format_=PARQUET)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            results = extractor.process_file(os.path.join(EUROPARL_DATA, 'en', 'ep-00-12-15.xml'))
+
+            table = pyarrow.parquet.read_table(filename)
+            self.assertEqual(table.column_names, unique_columns(extractor.generate_header()))
+            self.assertEqual(table.column_names[-4:], ['alignment type', 'nl', 'alignment type.1', 'fr'])
+            self.assertEqual(table.num_rows, 81)
+            self.assertEqual([list(row.values()) for row in table.to_pylist()], results)
+
+            # The rows should be written in row groups while these are coming in
+            writer = ParquetWriter(filename, row_group_size=2)
+            writer.writerow(['document', 'sentence', 'metadata'], is_header=True)
+            writer.writerows([['doc', str(n)] for n in range(5)])
+            writer.close()
+            self.assertEqual(pyarrow.parquet.ParquetFile(filename).num_row_groups, 3)
+            self.assertEqual(pyarrow.parquet.read_table(filename).column('metadata').to_pylist(), [None] * 5)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_sqlite_writer(self):
+        folder = tempfile.mkdtemp()
+        filename = os.path.join(folder, 'results.sqlite')
+        try:
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename, format_=SQLITE)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            results = extractor.process_file(os.path.join(EUROPARL_DATA, 'en', 'ep-00-12-15.xml'))
+
+            with contextlib.closing(sqlite3.connect(filename)) as connection:
+                cursor = connection.execute('SELECT * FROM results ORDER BY rowid')
+                self.assertEqual([d[0] for d in cursor.description], unique_columns(extractor.generate_header()))
+                self.assertEqual([list(row) for row in cursor], results)
+                indexes = connection.execute('SELECT name, sql FROM sqlite_master WHERE type = "index"').fetchall()
+                self.assertEqual(sorted(name for name, _ in indexes),
+                                 ['results_document', 'results_sentence', 'results_type'])
+                self.assertIn('"type en"', dict(indexes)['results_type'])
+
+            # The rows should be inserted in batches, padding missing columns
+            writer = SqliteWriter(filename, batch_size=2)
+            writer.writerow(['document', 'sentence', 'metadata'], is_header=True)
+            writer.writerows([['doc', str(n)] for n in range(5)])
+            writer.close()
+            with contextlib.closing(sqlite3.connect(filename)) as connection:
+                self.assertEqual(connection.execute('SELECT COUNT(*) FROM results WHERE metadata IS NULL').fetchone(),
+                                 (5,))
+                self.assertEqual(len(connection.execute('PRAGMA index_list(results)').fetchall()), 2)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_compressed_output(self):
+        folder = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(folder, 'results.csv')
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            with open(filename) as f:
+                expected = f.read()
+
+            # The compression is inferred from the extension...
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename + '.gz')
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            with gzip.open(filename + '.gz', 'rt', encoding='utf-8') as f:
+                self.assertEqual(f.read(), expected)
+
+            # ... or set explicitly, which adds the extension
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=os.path.join(folder, 'results.jsonl'),
+                                             format_=JSONL, compression=GZIP)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            with gzip.open(os.path.join(folder, 'results.jsonl.gz'), 'rt', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), 81)
+            self.assertEqual(list(records[0].keys()), unique_columns(extractor.generate_header()))
+            results = extractor.process_file(os.path.join(EUROPARL_DATA, 'en', 'ep-00-12-15.xml'))
+            self.assertEqual([list(record.values()) for record in records], results)
+
+            # Resuming and compressing other formats is not supported
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename, compression=GZIP, resume=True)
+            self.assertRaises(click.ClickException, extractor.process_folder, os.path.join(EUROPARL_DATA, 'en'))
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=os.path.join(folder, 'results.sqlite.gz'),
+                                             format_=SQLITE)
+            self.assertRaises(click.ClickException, extractor.process_folder, os.path.join(EUROPARL_DATA, 'en'))
+        finally:
+            shutil.rmtree(folder)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_output(self):
+        folder = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(folder, 'results.csv')
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            with open(filename, newline='') as f:
+                expected = f.read()
+
+            extractor = OPUSPerfectExtractor('en', ['nl', 'fr'], outfile=filename, format_=CSV, compression=ZSTD)
+            extractor.process_folder(os.path.join(EUROPARL_DATA, 'en'))
+            with open(filename + '.zst', 'rb') as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                self.assertEqual(io.TextIOWrapper(reader, encoding='utf-8', newline='').read(), expected)
+        finally:
+            shutil.rmtree(folder)
@@ -29,6 +29,11 @@ setuptools.setup(
     install_requires=[
         'click',
         'lxml',
+        'numpy',
         'requests',
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'zstd': ['zstandard'],
+    },
 )